@@ -0,0 +1,78 @@
+"""Side-by-side SQLite vs DuckDB benchmark over the generator's tables.
+
+Usage:
+    python -m benchmarks.bench_backends --scales 10000 100000 --repeat 5
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+from src.core.interfaces import IDatabase
+from src.data.generator import generate_data
+from src.data.sqlite_db import SQLiteDatabase
+from src.data.duckdb_db import DuckDBDatabase
+
+# Representative shapes of LLM-generated SQL: GROUP BY/SUM over trades joined to risk_metrics.
+QUERIES = {
+    "pnl_by_desk": """
+        SELECT t.desk, SUM(r.pnl) AS total_pnl
+        FROM trades t JOIN risk_metrics r ON t.trade_id = r.trade_id
+        GROUP BY t.desk ORDER BY total_pnl DESC
+    """,
+    "dv01_by_instrument": """
+        SELECT t.instrument, SUM(r.dv01) AS total_dv01
+        FROM trades t JOIN risk_metrics r ON t.trade_id = r.trade_id
+        WHERE t.desk = 'Rates'
+        GROUP BY t.instrument
+    """,
+    "greeks_by_trader_date": """
+        SELECT t.trader_name, r.calc_date, SUM(r.delta) AS delta, SUM(r.gamma) AS gamma, SUM(r.vega) AS vega
+        FROM trades t JOIN risk_metrics r ON t.trade_id = r.trade_id
+        GROUP BY t.trader_name, r.calc_date ORDER BY r.calc_date
+    """,
+    "top_notional": "SELECT * FROM trades ORDER BY notional DESC LIMIT 10",
+}
+
+def time_query(db: IDatabase, sql: str, repeat: int) -> float:
+    """Returns the median wall-clock latency in milliseconds (after one warm-up run)."""
+    db.execute_query(sql)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        db.execute_query(sql)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def run(scales: List[int], repeat: int) -> List[Dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            db_path = os.path.join(tmp, f"risk_{scale}.db")
+            generate_data(db_path, num_trades=scale)
+
+            sqlite_db = SQLiteDatabase(db_path)
+            start = time.perf_counter()
+            duck_db = DuckDBDatabase(db_path, mode="import")
+            import_ms = (time.perf_counter() - start) * 1000
+            print(f"\n[{scale:,} trades] DuckDB import: {import_ms:.1f} ms")
+            print(f"{'query':<24}{'sqlite ms':>12}{'duckdb ms':>12}{'speedup':>10}")
+
+            for name, sql in QUERIES.items():
+                sqlite_ms = time_query(sqlite_db, sql, repeat)
+                duck_ms = time_query(duck_db, sql, repeat)
+                speedup = sqlite_ms / duck_ms if duck_ms else float("inf")
+                print(f"{name:<24}{sqlite_ms:>12.2f}{duck_ms:>12.2f}{speedup:>9.1f}x")
+                results.append({"scale": scale, "query": name, "sqlite_ms": sqlite_ms,
+                                "duckdb_ms": duck_ms, "speedup": speedup})
+            sqlite_db.pool.close()
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.scales, args.repeat)
@@ -0,0 +1,66 @@
+"""Latency saved by the rule-based dashboard planner versus the text2dashboard LLM call.
+
+Runs representative result shapes against a generated database, plans each dashboard with
+HeuristicDashboardPlanner, and reports coverage and the LLM latency avoided per query.
+
+Usage:
+    python -m benchmarks.bench_dashboard_planner --trades 10000 --llm-latency-ms 1500
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from src.agents.dashboard_planner import HeuristicDashboardPlanner
+from src.data.generator import generate_data
+from src.data.sqlite_db import SQLiteDatabase
+
+# (user query, SQL the text2sql agent would produce)
+CASES = [
+    ("Total PnL by desk", "SELECT t.desk, SUM(r.pnl) AS total_pnl FROM trades t JOIN risk_metrics r ON t.trade_id = r.trade_id GROUP BY t.desk"),
+    ("DV01 by instrument for Rates", "SELECT t.instrument, SUM(r.dv01) AS dv01 FROM trades t JOIN risk_metrics r ON t.trade_id = r.trade_id WHERE t.desk = 'Rates' GROUP BY t.instrument"),
+    ("Daily PnL trend", "SELECT r.calc_date, SUM(r.pnl) AS pnl FROM risk_metrics r GROUP BY r.calc_date ORDER BY r.calc_date"),
+    ("Daily PnL per desk", "SELECT r.calc_date, t.desk, SUM(r.pnl) AS pnl FROM trades t JOIN risk_metrics r ON t.trade_id = r.trade_id GROUP BY r.calc_date, t.desk"),
+    ("Notional by desk and trader", "SELECT desk, trader_name, SUM(notional) AS notional FROM trades GROUP BY desk, trader_name"),
+    ("Greeks by trader", "SELECT t.trader_name, SUM(r.delta) AS delta, SUM(r.gamma) AS gamma, SUM(r.vega) AS vega FROM trades t JOIN risk_metrics r ON t.trade_id = r.trade_id GROUP BY t.trader_name"),
+    ("Quantity vs price", "SELECT quantity, price FROM trades"),
+    ("Top 5 trades by notional", "SELECT * FROM trades ORDER BY notional DESC LIMIT 5"),
+    ("Total PnL", "SELECT SUM(pnl) AS total_pnl FROM risk_metrics"),
+]
+
+def run(num_trades: int, llm_latency_ms: float, repeat: int):
+    planner = HeuristicDashboardPlanner()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "risk.db")
+        generate_data(db_path, num_trades=num_trades)
+        db = SQLiteDatabase(db_path)
+
+        print(f"\n{'query':<32}{'plan':<18}{'planner ms':>12}{'saved ms':>10}")
+        saved = []
+        for query, sql in CASES:
+            sample = db.preview_query(sql, limit=5)
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                config = planner.plan(query, sample)
+                timings.append((time.perf_counter() - start) * 1000)
+            planner_ms = statistics.median(timings)
+            plan = "+".join(p["type"] for p in config["panels"]) if config else "-> LLM"
+            saved_ms = llm_latency_ms - planner_ms if config else -planner_ms
+            saved.append(saved_ms)
+            print(f"{query:<32}{plan:<18}{planner_ms:>12.3f}{saved_ms:>10.1f}")
+
+        covered = sum(1 for ms in saved if ms > 0)
+        print(f"\nHeuristic coverage: {covered}/{len(CASES)}; "
+              f"mean latency saved per query: {statistics.mean(saved):.1f} ms "
+              f"(assuming {llm_latency_ms:.0f} ms per text2dashboard LLM call)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trades", type=int, default=10_000)
+    parser.add_argument("--llm-latency-ms", type=float, default=1500.0,
+                        help="Measured text2dashboard LLM latency on your setup.")
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+    run(args.trades, args.llm_latency_ms, args.repeat)
@@ -0,0 +1,288 @@
+"""End-to-end /query benchmark against a stub LLM, without Ollama.
+
+For each scale: generates a dataset with the data generator, starts the API (uvicorn, one
+process) pointed at an OpenAI-compatible stub LLM with a fixed latency, warms it up and then
+drives POST /query at each concurrency level. Reports throughput and p50/p95/p99 latency of
+every pipeline stage (the API's `timings` breakdown plus the client-side round trip), and the
+peak RSS of the generator and of the API process during startup and each load level.
+
+Results are saved as JSON; pass a previous file to --compare to print the change per run.
+
+Usage:
+    python -m benchmarks.bench_query --scales 10000 100000 --concurrency 1 8 32 --requests 200 \\
+        --llm-latency-ms 500 --output bench_query.json --compare previous.json
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from benchmarks.stub_llm import CANNED_SQL, StubLLMServer
+
+QUESTIONS = list(CANNED_SQL)
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an unsorted sample."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {"count": len(samples), "mean": round(sum(samples) / len(samples), 3),
+            "p50": round(percentile(samples, 50), 3), "p95": round(percentile(samples, 95), 3),
+            "p99": round(percentile(samples, 99), 3)}
+
+def read_rss_mb(pid: int) -> Optional[float]:
+    """Current resident set size of a process (Linux /proc), or None where unavailable."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+class RSSMonitor:
+    """Samples a process's RSS in the background and keeps the peak per named phase."""
+
+    def __init__(self, pid: int, interval: float = 0.05):
+        self.pid = pid
+        self.interval = interval
+        self.peaks: Dict[str, Optional[float]] = {}
+        self._phase: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-monitor", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self):
+        rss, phase = read_rss_mb(self.pid), self._phase
+        if rss is not None and phase is not None:
+            peak = self.peaks.get(phase)
+            self.peaks[phase] = rss if peak is None else max(peak, rss)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        self._phase = name
+        self.peaks.setdefault(name, None)
+        self._sample()
+        try:
+            yield
+        finally:
+            self._sample()
+            self._phase = None
+
+    def start(self) -> "RSSMonitor":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+def generate(db_path: str, num_trades: int, num_days: int, seed: int) -> Dict[str, Any]:
+    """Runs the generator in a child process so its peak RSS is measured in isolation."""
+    cmd = [sys.executable, "-m", "src.data.generator", "--db_path", db_path, "--num_trades", str(num_trades),
+           "--num_days", str(num_days), "--seed", str(seed)]
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL)
+    peak_rss_mb = None
+    if hasattr(os, "wait4"):
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        # ru_maxrss is in KiB on Linux and bytes on macOS.
+        peak_rss_mb = usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    else:
+        proc.wait()
+    if proc.returncode != 0:
+        raise RuntimeError(f"Data generation failed with exit code {proc.returncode}")
+    return {"seconds": round(time.perf_counter() - start, 3), "peak_rss_mb": peak_rss_mb}
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def post_query(base_url: str, query: str, timeout: float) -> Tuple[float, Dict[str, Any]]:
+    """POSTs one query; returns (round-trip ms, response body or {"error": ...})."""
+    body = json.dumps({"query": query, "include_timings": True}).encode("utf-8")
+    request = urllib.request.Request(f"{base_url}/query", data=body, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            payload = json.loads(response.read())
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        payload = {"error": f"HTTP request failed: {e}"}
+    return (time.perf_counter() - start) * 1000, payload
+
+@contextmanager
+def api_server(db_path: str, llm_base_url: str, env_overrides: Dict[str, str],
+               startup_timeout: float = 120.0) -> Iterator[Tuple[str, subprocess.Popen]]:
+    """Starts the API with uvicorn in a child process and waits until GET /ready answers 200."""
+    port = free_port()
+    env = dict(os.environ, DB_PATH=db_path, LLM_BASE_URL=llm_base_url, LLM_MODEL_NAME="stub", **env_overrides)
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "src.api.app:app", "--host", "127.0.0.1",
+                             "--port", str(port), "--log-level", "warning"], env=env)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            if proc.poll() is not None:
+                raise RuntimeError(f"API exited during startup with code {proc.returncode}")
+            try:
+                urllib.request.urlopen(f"{base_url}/ready", timeout=1).close()
+                break
+            except (urllib.error.URLError, OSError):
+                # Includes the 503 answered while the warm-up is still running.
+                if time.monotonic() > deadline:
+                    raise RuntimeError("API did not start in time")
+                time.sleep(0.1)
+        yield base_url, proc
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+def run_load(base_url: str, concurrency: int, num_requests: int, cold: bool, timeout: float) -> Dict[str, Any]:
+    """Issues `num_requests` queries from `concurrency` clients; returns throughput and stage latencies."""
+    def one(i: int) -> Tuple[float, Dict[str, Any]]:
+        query = QUESTIONS[i % len(QUESTIONS)]
+        # Distinct numbers per request (and level) make both the exact and the semantic SQL cache miss.
+        return post_query(base_url, f"{query} #{concurrency}-{i}" if cold else query, timeout)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(num_requests)))
+    wall = time.perf_counter() - start
+
+    stages: Dict[str, List[float]] = {"client": []}
+    errors = 0
+    for client_ms, payload in results:
+        stages["client"].append(client_ms)
+        if payload.get("error"):
+            errors += 1
+        for stage, ms in (payload.get("timings") or {}).items():
+            stages.setdefault(stage, []).append(ms)
+    return {
+        "concurrency": concurrency,
+        "requests": num_requests,
+        "errors": errors,
+        "seconds": round(wall, 3),
+        "throughput_rps": round(num_requests / wall, 3),
+        "latency_ms": {stage: summarize(samples) for stage, samples in sorted(stages.items())},
+    }
+
+def print_load(load: Dict[str, Any]):
+    print(f"\n  concurrency {load['concurrency']}: {load['throughput_rps']:.2f} req/s, "
+          f"{load['errors']}/{load['requests']} errors, peak RSS {format_mb(load.get('peak_rss_mb'))}")
+    print(f"  {'stage':<28}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage, s in load["latency_ms"].items():
+        print(f"  {stage:<28}{s['p50']:>10.1f}{s['p95']:>10.1f}{s['p99']:>10.1f}")
+
+def format_mb(value: Optional[float]) -> str:
+    return f"{value:.0f} MiB" if value is not None else "n/a"
+
+def run(scales: List[int], concurrency: List[int], num_requests: int, num_days: int, llm_latency_ms: float,
+        llm_jitter_ms: float, cold: bool, dashboard_mode: str, seed: int, timeout: float) -> Dict[str, Any]:
+    env_overrides = {"DASHBOARD_MODE": dashboard_mode}
+    if cold:
+        env_overrides["RESULT_CACHE_MAX_BYTES"] = "0"
+    report = {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "host": {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+        "config": {"scales": scales, "concurrency": concurrency, "requests": num_requests, "num_days": num_days,
+                   "llm_latency_ms": llm_latency_ms, "llm_jitter_ms": llm_jitter_ms, "cold": cold,
+                   "dashboard_mode": dashboard_mode, "seed": seed},
+        "runs": [],
+    }
+    with StubLLMServer(latency_ms=llm_latency_ms, jitter_ms=llm_jitter_ms, seed=seed) as llm, \
+            tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            db_path = os.path.join(tmp, f"risk_{scale}.db")
+            gen = generate(db_path, scale, num_days, seed)
+            print(f"\n[{scale:,} trades] generated in {gen['seconds']:.1f} s, peak RSS {format_mb(gen['peak_rss_mb'])}")
+
+            startup_start = time.perf_counter()
+            with api_server(db_path, llm.base_url, env_overrides) as (base_url, proc):
+                ready_seconds = time.perf_counter() - startup_start
+                monitor = RSSMonitor(proc.pid).start()
+                try:
+                    with monitor.phase("startup"):
+                        # The first request shows what the warm-up left cold; one pass over the
+                        # questions then fills the SQL and result caches for --warm-cache runs.
+                        first_ms, _ = post_query(base_url, QUESTIONS[0], timeout)
+                        for question in QUESTIONS[1:]:
+                            post_query(base_url, question, timeout)
+                    startup = {"seconds": round(time.perf_counter() - startup_start, 3),
+                               "ready_seconds": round(ready_seconds, 3), "first_query_ms": round(first_ms, 1)}
+                    loads = []
+                    for level in concurrency:
+                        with monitor.phase(f"load_c{level}"):
+                            load = run_load(base_url, level, num_requests, cold, timeout)
+                        load["peak_rss_mb"] = monitor.peaks.get(f"load_c{level}")
+                        print_load(load)
+                        loads.append(load)
+                finally:
+                    monitor.stop()
+                startup["peak_rss_mb"] = monitor.peaks.get("startup")
+            print(f"  API ready in {startup['ready_seconds']:.1f} s, first query {startup['first_query_ms']:.0f} ms, "
+                  f"startup + cache fill {startup['seconds']:.1f} s, peak RSS {format_mb(startup['peak_rss_mb'])}")
+            report["runs"].append({"scale": scale, "generate": gen, "startup": startup, "loads": loads})
+    return report
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]):
+    """Prints the throughput and end-to-end p95 change of each (scale, concurrency) against a baseline."""
+    previous = {(run["scale"], load["concurrency"]): load for run in baseline.get("runs", []) for load in run["loads"]}
+    print(f"\n{'scale':>10}{'conc':>6}{'req/s':>10}{'change':>9}{'p95 ms':>10}{'change':>9}")
+    for run in report["runs"]:
+        for load in run["loads"]:
+            before = previous.get((run["scale"], load["concurrency"]))
+            if before is None:
+                continue
+            rps, old_rps = load["throughput_rps"], before["throughput_rps"]
+            p95, old_p95 = load["latency_ms"]["client"]["p95"], before["latency_ms"]["client"]["p95"]
+            print(f"{run['scale']:>10,}{load['concurrency']:>6}{rps:>10.2f}{(rps / old_rps - 1) * 100:>8.1f}%"
+                  f"{p95:>10.1f}{(p95 / old_p95 - 1) * 100:>8.1f}%")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=100, help="Requests per concurrency level.")
+    parser.add_argument("--num-days", type=int, default=7)
+    parser.add_argument("--llm-latency-ms", type=float, default=500.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--warm-cache", action="store_true",
+                        help="Repeat the same questions so the SQL and result caches hit (default: every request misses).")
+    parser.add_argument("--dashboard-mode", default="hybrid", choices=["hybrid", "heuristic", "llm"])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=300.0, help="Per-request timeout in seconds.")
+    parser.add_argument("--output", default="bench_query.json")
+    parser.add_argument("--compare", default=None, help="Previous --output file to compare against.")
+    args = parser.parse_args()
+
+    result = run(args.scales, args.concurrency, args.requests, args.num_days, args.llm_latency_ms,
+                 args.llm_jitter_ms, not args.warm_cache, args.dashboard_mode, args.seed, args.timeout)
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nSaved results to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(result, json.load(f))
@@ -0,0 +1,144 @@
+"""OpenAI-compatible stub LLM server for offline benchmarks.
+
+Serves POST /v1/chat/completions with a fixed (optionally jittered) latency. Text2SQL prompts
+get the canned SQL of the first known question contained in the prompt's "User query:" line,
+text2dashboard prompts get a canned dashboard config. Token usage is approximated by
+whitespace-separated words so the token metrics are populated.
+
+Usage:
+    python -m benchmarks.stub_llm --port 11435 --latency-ms 800 --jitter-ms 200
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+# user question -> SQL the text2sql agent would produce for the generator's tables
+CANNED_SQL = {
+    "total pnl by desk": "SELECT t.desk, SUM(r.pnl) AS total_pnl FROM trades t JOIN risk_metrics r ON t.trade_id = r.trade_id GROUP BY t.desk",
+    "dv01 by instrument for rates": "SELECT t.instrument, SUM(r.dv01) AS dv01 FROM trades t JOIN risk_metrics r ON t.trade_id = r.trade_id WHERE t.desk = 'Rates' GROUP BY t.instrument",
+    "daily pnl trend": "SELECT calc_date, SUM(pnl) AS pnl FROM daily_risk_rollup GROUP BY calc_date ORDER BY calc_date",
+    "greeks by trader": "SELECT trader_name, SUM(delta) AS delta, SUM(gamma) AS gamma, SUM(vega) AS vega FROM daily_risk_rollup GROUP BY trader_name",
+    "notional by desk and trader": "SELECT desk, trader_name, SUM(notional) AS notional FROM trades GROUP BY desk, trader_name",
+    "top trades by notional": "SELECT * FROM trades ORDER BY notional DESC LIMIT 20",
+    "all trades": "SELECT * FROM trades",
+}
+DEFAULT_SQL = CANNED_SQL["total pnl by desk"]
+
+_USER_QUERY = re.compile(r"User [Qq]uery:\s*(.*)")
+
+def canned_dashboard(query: str) -> Dict[str, Any]:
+    return {"title": query or "Result", "panels": [{"type": "table", "title": "Result"}]}
+
+def canned_reply(prompt: str) -> str:
+    """Picks the canned completion for a text2sql or text2dashboard prompt."""
+    match = _USER_QUERY.search(prompt)
+    query = match.group(1).strip() if match else ""
+    if "Text2Dashboard" in prompt:
+        return json.dumps(canned_dashboard(query))
+    lowered = query.lower()
+    return next((sql for question, sql in CANNED_SQL.items() if question in lowered), DEFAULT_SQL)
+
+class StubLLMServer:
+    """Threaded HTTP server answering chat completions after `latency_ms` (+/- `jitter_ms`)."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 500.0,
+                 jitter_ms: float = 0.0, seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.requests = 0
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _delay(self) -> float:
+        with self._rng_lock:
+            jitter = self._rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+            self.requests += 1
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/").endswith("/models"):
+                    self._send(200, {"object": "list", "data": [{"id": "stub", "object": "model"}]})
+                else:
+                    self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+                    return
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+                time.sleep(server._delay())
+                content = canned_reply(prompt)
+                prompt_tokens, completion_tokens = len(prompt.split()), len(content.split())
+                self._send(200, {
+                    "id": f"chatcmpl-{uuid.uuid4().hex}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "stub"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": content}}],
+                    "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                              "total_tokens": prompt_tokens + completion_tokens},
+                })
+
+            def _send(self, status: int, payload: Dict[str, Any]):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "StubLLMServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="stub-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StubLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency-ms", type=float, default=500.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    server = StubLLMServer(args.host, args.port, args.latency_ms, args.jitter_ms)
+    print(f"Stub LLM listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
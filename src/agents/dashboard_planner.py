@@ -0,0 +1,156 @@
+import re
+import threading
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+DASHBOARD_MODES = ("llm", "heuristic", "hybrid")
+
+# Column kinds inferred from result values.
+NUMERIC, DATE, CATEGORICAL, IDENTIFIER, OTHER = "numeric", "date", "categorical", "identifier", "other"
+
+_DATE_STRING = re.compile(r"^\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2})?)?$")
+# Column kinds by words in a result column type (SQLite declared types, Arrow/DuckDB type names).
+_TYPE_KINDS = (
+    (("date", "time"), DATE),
+    (("int", "real", "double", "float", "decimal", "numeric"), NUMERIC),
+    (("char", "text", "string", "utf8", "bool"), CATEGORICAL),
+)
+MAX_PANELS = 3
+MAX_CHART_COLUMNS = 4
+
+def _value_kind(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return CATEGORICAL
+    if isinstance(value, (int, float)):
+        return NUMERIC
+    if isinstance(value, (date, datetime)):
+        return DATE
+    if isinstance(value, str):
+        return DATE if _DATE_STRING.match(value) else CATEGORICAL
+    return OTHER
+
+def infer_column_kinds(rows: List[Dict[str, Any]]) -> Dict[str, str]:
+    """Infers a kind per column from the result rows (a sample is enough)."""
+    if not rows:
+        return {}
+    kinds = {}
+    for column in rows[0].keys():
+        if column == "id" or column.endswith("_id"):
+            kinds[column] = IDENTIFIER
+            continue
+        seen = {_value_kind(row.get(column)) for row in rows} - {None}
+        # All-null or mixed-type columns are not safe to chart.
+        kinds[column] = seen.pop() if len(seen) == 1 else OTHER
+        if kinds[column] == CATEGORICAL and column.endswith("_date"):
+            kinds[column] = DATE
+    return kinds
+
+def kinds_from_types(columns: List[Dict[str, Any]]) -> Dict[str, str]:
+    """Infers a kind per column from the result's column types (IDatabase.describe_query rows)."""
+    kinds = {}
+    for column in columns:
+        name, col_type = column["name"], (column.get("type") or "").lower()
+        if name == "id" or name.endswith("_id"):
+            kinds[name] = IDENTIFIER
+            continue
+        # Untyped columns are not safe to chart.
+        kinds[name] = next((kind for words, kind in _TYPE_KINDS if any(word in col_type for word in words)), OTHER)
+        if kinds[name] == CATEGORICAL and name.endswith("_date"):
+            kinds[name] = DATE
+    return kinds
+
+def _humanize(column: str) -> str:
+    return column.replace("_", " ").strip().title()
+
+class HeuristicDashboardPlanner:
+    """Deterministic dashboard planner for the obvious cases.
+
+    Emits the same dashboard_config schema as the text2dashboard agent and returns None when
+    the result shape is ambiguous, so the caller can fall back to the LLM.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._heuristic = 0
+        self._ambiguous = 0
+
+    def plan(self, query: str, rows: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Plans from (a sample of) the result rows."""
+        return self._count(self._plan(query, infer_column_kinds(rows), len(rows)))
+
+    def plan_columns(self, query: str, columns: List[Dict[str, Any]], single_row: bool = False) -> Optional[Dict[str, Any]]:
+        """Plans from the result's column types alone, before any row is known."""
+        return self._count(self._plan(query, kinds_from_types(columns), 1 if single_row else None))
+
+    def _count(self, config: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if config is None:
+                self._ambiguous += 1
+            else:
+                self._heuristic += 1
+        return config
+
+    def _plan(self, query: str, kinds: Dict[str, str], row_count: Optional[int]) -> Optional[Dict[str, Any]]:
+        title = query.strip().rstrip("?.!").strip() or "Query Result"
+        title = title[0].upper() + title[1:]
+
+        numeric = [col for col, kind in kinds.items() if kind == NUMERIC]
+        dates = [col for col, kind in kinds.items() if kind == DATE]
+        categorical = [col for col, kind in kinds.items() if kind == CATEGORICAL]
+        chartable = numeric + dates + categorical
+
+        # Nothing to chart, explicit tabular request, or wide raw rows: a table.
+        if not kinds or row_count == 0 or not numeric or len(chartable) > MAX_CHART_COLUMNS or re.search(r"\b(table|list)\b", query.lower()):
+            return self._config(title, [{"type": "table", "title": title}])
+        if OTHER in kinds.values():
+            return None
+        # A single row of measures (e.g. "total PnL") reads best as a table.
+        if row_count == 1 and not dates and not categorical:
+            return self._config(title, [{"type": "table", "title": title}])
+
+        # Time series: date on x, optional category as series.
+        if len(dates) == 1 and len(categorical) <= 1:
+            color = categorical[0] if categorical else None
+            return self._config(title, [
+                self._panel("line", y, dates[0], color) for y in numeric[:MAX_PANELS]
+            ])
+
+        # Aggregation by category: bar, a second category becomes the color grouping.
+        if not dates and 1 <= len(categorical) <= 2:
+            color = categorical[1] if len(categorical) == 2 else None
+            return self._config(title, [
+                self._panel("bar", y, categorical[0], color) for y in numeric[:MAX_PANELS]
+            ])
+
+        # Two measures and nothing else: relationship between them.
+        if not dates and not categorical and len(numeric) == 2:
+            return self._config(title, [self._panel("scatter", numeric[1], numeric[0], None)])
+
+        return None
+
+    @staticmethod
+    def _panel(chart_type: str, y: str, x: str, color: Optional[str]) -> Dict[str, Any]:
+        panel = {
+            "type": chart_type,
+            "title": f"{_humanize(y)} by {_humanize(x)}",
+            "x_axis": x,
+            "y_axis": y,
+        }
+        if color:
+            panel["color"] = color
+        return panel
+
+    @staticmethod
+    def _config(title: str, panels: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {"title": title, "panels": panels}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self._heuristic + self._ambiguous
+            return {
+                "heuristic_plans": self._heuristic,
+                "ambiguous": self._ambiguous,
+                "coverage": round(self._heuristic / total, 4) if total else 0.0,
+            }
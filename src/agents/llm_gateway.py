@@ -0,0 +1,272 @@
+import asyncio
+import heapq
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+import httpx
+import openai
+from langchain_openai import ChatOpenAI
+
+from src.core.metrics import MetricsRegistry, record_timing
+from src.agents.llm_priority import PRIORITIES, current_llm_priority, llm_priority  # noqa: F401 (re-export)
+
+# Transient failures worth another attempt (possibly on another backend).
+RETRYABLE_ERRORS = (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)
+
+class LLMQueueTimeout(TimeoutError):
+    """No backend slot became free within the gateway's queue timeout."""
+
+class LLMBackend:
+    """One OpenAI-compatible server with its own keep-alive connection pool and in-flight cap."""
+
+    def __init__(self, base_url: str, model_name: str, max_in_flight: int, call_timeout: Optional[float]):
+        self.base_url = base_url
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+        self.llm = ChatOpenAI(
+            base_url=base_url,
+            api_key="ollama",  # required but not used by local ollama
+            model=model_name,
+            temperature=0,
+            timeout=call_timeout,
+            max_retries=0,  # retries are the gateway's job, so they can move to another backend
+            http_client=httpx.Client(limits=limits),
+            http_async_client=httpx.AsyncClient(limits=limits),
+        )
+
+    @property
+    def load(self) -> float:
+        return self.in_flight / self.max_in_flight
+
+class _Waiter:
+    __slots__ = ("priority", "notify", "backend", "cancelled")
+
+    def __init__(self, priority: str, notify: Callable[[], None]):
+        self.priority = priority
+        self.notify = notify
+        self.backend: Optional[LLMBackend] = None
+        self.cancelled = False
+
+class LLMGateway:
+    """Routes chat calls over one or more LLM backends.
+
+    Each call takes a slot on the least-loaded backend with capacity. When all backends are
+    full, callers queue by priority (interactive before batch, FIFO within a priority) and are
+    handed the next free slot. Transient failures are retried with exponential backoff and
+    jitter, re-routing each attempt.
+    """
+
+    def __init__(self, base_urls: Union[str, Sequence[str]], model_name: str = "llama3.1",
+                 max_in_flight: Optional[int] = 4, call_timeout: Optional[float] = 120.0,
+                 queue_timeout: Optional[float] = 60.0, max_retries: Optional[int] = 2,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0, metrics: Optional[MetricsRegistry] = None):
+        if isinstance(base_urls, str):
+            base_urls = base_urls.split(",")
+        urls = [url.strip() for url in base_urls if url.strip()]
+        if not urls:
+            raise ValueError("At least one LLM base URL is required.")
+        self.backends = [LLMBackend(url, model_name, max_in_flight or 4, call_timeout or None) for url in urls]
+        self.queue_timeout = queue_timeout or None
+        self.max_retries = max_retries if max_retries is not None else 2
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._lock = threading.Lock()
+        self._queue: List[tuple] = []
+        self._seq = itertools.count()
+        self._depth = {priority: 0 for priority in PRIORITIES}
+        self._init_metrics(metrics or MetricsRegistry())
+
+    def _init_metrics(self, metrics: MetricsRegistry):
+        self._queue_depth = metrics.gauge("llm_queue_depth", "LLM calls waiting for a backend slot.", ["priority"])
+        self._queue_wait = metrics.histogram("llm_queue_wait_seconds", "Time spent waiting for a backend slot.", ["priority"])
+        self._in_flight = metrics.gauge("llm_backend_in_flight", "LLM calls in flight per backend.", ["backend"])
+        self._backend_duration = metrics.histogram("llm_backend_request_duration_seconds", "LLM call latency per backend.", ["backend"])
+        self._backend_errors = metrics.counter("llm_backend_errors_total", "LLM calls that raised, per backend.", ["backend"])
+        self._retries = metrics.counter("llm_retries_total", "LLM calls retried after a transient error.", ["backend"])
+        self._queue_timeouts = metrics.counter("llm_queue_timeouts_total", "LLM calls that gave up waiting for a slot.", ["priority"])
+        for priority in PRIORITIES:
+            self._queue_depth.set(0, priority=priority)
+        for backend in self.backends:
+            self._in_flight.set(0, backend=backend.base_url)
+
+    # _enqueue, _set_depth, _take_slot, _dispatch and _cancel expect self._lock to be held.
+
+    def _enqueue(self, priority: str, notify: Callable[[], None]) -> _Waiter:
+        waiter = _Waiter(priority, notify)
+        heapq.heappush(self._queue, (PRIORITIES[priority], next(self._seq), waiter))
+        self._set_depth(priority, 1)
+        return waiter
+
+    def _set_depth(self, priority: str, delta: int):
+        self._depth[priority] += delta
+        self._queue_depth.set(self._depth[priority], priority=priority)
+
+    def _take_slot(self) -> Optional[LLMBackend]:
+        free = [b for b in self.backends if b.in_flight < b.max_in_flight]
+        if not free:
+            return None
+        backend = min(free, key=lambda b: (b.load, b.in_flight))
+        backend.in_flight += 1
+        self._in_flight.set(backend.in_flight, backend=backend.base_url)
+        return backend
+
+    def _dispatch(self):
+        """Hands free slots to the queued waiters in priority order."""
+        while self._queue:
+            waiter = self._queue[0][2]
+            if waiter.cancelled:
+                heapq.heappop(self._queue)
+                continue
+            backend = self._take_slot()
+            if backend is None:
+                return
+            heapq.heappop(self._queue)
+            self._set_depth(waiter.priority, -1)
+            waiter.backend = backend
+            waiter.notify()
+
+    def _cancel(self, waiter: _Waiter) -> Optional[LLMBackend]:
+        """Withdraws a waiter; returns the slot it was granted meanwhile, if any."""
+        if waiter.backend is None:
+            waiter.cancelled = True
+            self._set_depth(waiter.priority, -1)
+        return waiter.backend
+
+    def _release(self, backend: LLMBackend):
+        with self._lock:
+            backend.in_flight -= 1
+            self._in_flight.set(backend.in_flight, backend=backend.base_url)
+            self._dispatch()
+
+    def _record_wait(self, priority: str, seconds: float):
+        self._queue_wait.observe(seconds, priority=priority)
+        record_timing("llm.queue", seconds)
+
+    def _acquire(self, priority: str) -> LLMBackend:
+        granted = threading.Event()
+        start = time.perf_counter()
+        with self._lock:
+            waiter = self._enqueue(priority, granted.set)
+            self._dispatch()
+        if not granted.wait(self.queue_timeout):
+            with self._lock:
+                backend = self._cancel(waiter)
+            if backend is None:
+                self._queue_timeouts.inc(priority=priority)
+                raise LLMQueueTimeout(f"No LLM backend slot free after {self.queue_timeout:.0f}s")
+        self._record_wait(priority, time.perf_counter() - start)
+        return waiter.backend
+
+    async def _aacquire(self, priority: str) -> LLMBackend:
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def notify():
+            # May run on another thread (a sync caller releasing its slot).
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(None))
+
+        start = time.perf_counter()
+        with self._lock:
+            waiter = self._enqueue(priority, notify)
+            self._dispatch()
+        try:
+            await asyncio.wait_for(asyncio.shield(granted), self.queue_timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                backend = self._cancel(waiter)
+            if backend is None:
+                self._queue_timeouts.inc(priority=priority)
+                raise LLMQueueTimeout(f"No LLM backend slot free after {self.queue_timeout:.0f}s")
+        except asyncio.CancelledError:
+            with self._lock:
+                backend = self._cancel(waiter)
+            if backend is not None:
+                self._release(backend)
+            raise
+        self._record_wait(priority, time.perf_counter() - start)
+        return waiter.backend
+
+    def _backoff(self, attempt: int) -> float:
+        return min(self.backoff_max, self.backoff_base * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+    def _finish(self, backend: LLMBackend, seconds: float, error: Optional[BaseException]):
+        backend.requests += 1
+        self._backend_duration.observe(seconds, backend=backend.base_url)
+        # Cancellation is the caller giving up, not a backend failure.
+        if isinstance(error, Exception):
+            backend.errors += 1
+            self._backend_errors.inc(backend=backend.base_url)
+        self._release(backend)
+
+    def _should_retry(self, backend: LLMBackend, error: BaseException, attempt: int) -> bool:
+        if not isinstance(error, RETRYABLE_ERRORS) or attempt >= self.max_retries:
+            return False
+        self._retries.inc(backend=backend.base_url)
+        return True
+
+    def invoke(self, messages: List[Any]) -> Any:
+        """Sends a chat call through the least-loaded backend, queueing at the context's priority."""
+        priority = current_llm_priority()
+        for attempt in itertools.count():
+            backend = self._acquire(priority)
+            start = time.perf_counter()
+            try:
+                response = backend.llm.invoke(messages)
+            except BaseException as e:
+                self._finish(backend, time.perf_counter() - start, e)
+                if not self._should_retry(backend, e, attempt):
+                    raise
+            else:
+                self._finish(backend, time.perf_counter() - start, None)
+                return response
+            time.sleep(self._backoff(attempt))
+
+    async def ainvoke(self, messages: List[Any]) -> Any:
+        """Async variant of invoke."""
+        priority = current_llm_priority()
+        for attempt in itertools.count():
+            backend = await self._aacquire(priority)
+            start = time.perf_counter()
+            try:
+                response = await backend.llm.ainvoke(messages)
+            except BaseException as e:
+                self._finish(backend, time.perf_counter() - start, e)
+                if not self._should_retry(backend, e, attempt):
+                    raise
+            else:
+                self._finish(backend, time.perf_counter() - start, None)
+                return response
+            await asyncio.sleep(self._backoff(attempt))
+
+    def warm_up(self, prompt: str = "Reply with OK.") -> Dict[str, Any]:
+        """Sends a one-token prompt to every backend, so model loading happens before real traffic.
+
+        Returns the latency per backend (or the error); backends are warmed concurrently.
+        """
+        def ping(backend: LLMBackend) -> Any:
+            start = time.perf_counter()
+            try:
+                backend.llm.bind(max_tokens=1).invoke(prompt)
+            except Exception as e:
+                return f"{type(e).__name__}: {e}"
+            return round(time.perf_counter() - start, 3)
+
+        with ThreadPoolExecutor(max_workers=len(self.backends)) as executor:
+            return dict(zip((b.base_url for b in self.backends), executor.map(ping, self.backends)))
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns queue depth per priority and load, request and error counts per backend."""
+        with self._lock:
+            return {
+                "queue_depth": dict(self._depth),
+                "backends": [{"base_url": b.base_url, "in_flight": b.in_flight, "max_in_flight": b.max_in_flight,
+                              "requests": b.requests, "errors": b.errors} for b in self.backends],
+            }
@@ -0,0 +1,24 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+# Lower value is served first when every backend is at capacity.
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+# Priority of LLM calls made in this context; the batch endpoint lowers it to "batch".
+# Kept apart from the gateway so the API can set it without importing the LLM client stack.
+_llm_priority: ContextVar[str] = ContextVar("llm_priority", default="interactive")
+
+@contextmanager
+def llm_priority(priority: str) -> Iterator[None]:
+    """Runs LLM calls made in this context (and tasks/threads that copy it) at `priority`."""
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown LLM priority: {priority}")
+    token = _llm_priority.set(priority)
+    try:
+        yield
+    finally:
+        _llm_priority.reset(token)
+
+def current_llm_priority() -> str:
+    return _llm_priority.get()
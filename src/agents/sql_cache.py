@@ -0,0 +1,219 @@
+import hashlib
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.core.interfaces import ISharedCache
+from src.core.shared_cache import make_key
+
+# Filler words that carry no meaning for the generated SQL.
+STOPWORDS = {
+    "a", "an", "the", "me", "show", "give", "list", "display", "what", "whats", "is", "are", "was", "were",
+    "of", "for", "by", "per", "in", "on", "to", "and", "please", "can", "you", "i", "want", "see", "get",
+    "each", "all", "our", "my", "tell", "how", "much", "many", "do", "does", "with", "across", "broken", "down",
+    "total", "overall",
+}
+
+# Words that flip a filter or a sort; like numbers, they must match for a semantic hit.
+CONSTRAINT_WORDS = {
+    "<", "<=", ">", ">=", "=", "<>", "not", "no", "without", "except", "excluding", "between",
+    "above", "over", "greater", "more", "higher", "exceeding", "exceeds", "below", "under", "less", "lower",
+    "fewer", "smaller", "positive", "negative", "asc", "ascending", "desc", "descending", "increasing",
+    "decreasing", "top", "bottom", "highest", "lowest", "largest", "smallest", "biggest", "best", "worst",
+    "most", "least", "first", "last",
+}
+
+def normalize_query_text(text: str) -> str:
+    """Lower-cased query text with punctuation stripped and whitespace collapsed.
+
+    Comparison operators are kept as separate tokens ("!=" becomes "<>").
+    """
+    text = text.lower().replace("!=", "<>")
+    text = re.sub(r"[^\w\s./<>=-]", " ", text)
+    text = re.sub(r"(<>|<=|>=|<|>|=)", r" \1 ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+def _tokens(normalized: str) -> List[str]:
+    return [tok for tok in normalized.split(" ") if tok and tok not in STOPWORDS]
+
+def _constraints(normalized: str, literals: Iterable[str]) -> Tuple[Tuple[str, ...], ...]:
+    """The parts of a question that change the SQL without changing its wording much.
+
+    Numbers and comparison/sort words in order of appearance, plus the catalog values it
+    names (traders, desks, instruments).
+    """
+    numbers = tuple(re.findall(r"\d+(?:\.\d+)?", normalized))
+    words = tuple(tok for tok in normalized.split(" ") if tok in CONSTRAINT_WORDS)
+    named = {value for value in map(normalize_query_text, literals)
+             if value and re.search(rf"(?<!\w){re.escape(value)}(?!\w)", normalized)}
+    return numbers, words, tuple(sorted(named))
+
+class SemanticSQLCache:
+    """Caches generated SQL by natural-language query so repeated questions skip the text2sql LLM call.
+
+    Lookups try an exact match on the normalized query text first, then a cosine-similarity
+    search over hashed TF-IDF vectors (word unigrams + character trigrams) held in a NumPy
+    matrix. Entries are scoped to a database and schema fingerprint, so a schema change
+    invalidates them.
+    A semantic hit also needs the same numbers, comparison and sort words, and catalog
+    values (`literals`), since "Alice" vs "Bob" or "<" vs ">" barely move the similarity.
+
+    With a `shared` cache, generated SQL is also published by exact normalized text for the
+    other worker processes; a local miss that is found there joins the local index, so it
+    also serves similar questions from then on.
+    """
+
+    def __init__(self, similarity_threshold: Optional[float] = 0.8, max_entries: Optional[int] = 1000,
+                 dim: int = 4096, shared: Optional[ISharedCache] = None):
+        self.similarity_threshold = similarity_threshold if similarity_threshold is not None else 0.8
+        self.max_entries = max_entries or 1000
+        self.dim = dim
+        self.shared = shared
+        self._lock = threading.Lock()
+
+        self._scope: Optional[Tuple[str, str]] = None
+        self._exact: Dict[str, str] = {}
+        self._texts: List[str] = []
+        self._sqls: List[str] = []
+        self._constraints: List[Tuple[Tuple[str, ...], ...]] = []
+        self._matrix = np.zeros((0, dim), dtype=np.float32)
+        self._doc_freq = np.zeros(dim, dtype=np.float32)
+
+        # Metrics
+        self._exact_hits = 0
+        self._semantic_hits = 0
+        self._shared_hits = 0
+        self._misses = 0
+        self._llm_latency_ema: Optional[float] = None
+        self._saved_seconds = 0.0
+
+    def _vectorize(self, normalized: str) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for tok in _tokens(normalized):
+            features = [f"w:{tok}"] + [f"c:{tok[i:i + 3]}" for i in range(max(1, len(tok) - 2))]
+            for feature in features:
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                vec[int.from_bytes(digest, "little") % self.dim] += 1.0
+        return vec
+
+    def _idf(self) -> np.ndarray:
+        n = len(self._texts)
+        return np.log((1.0 + n) / (1.0 + self._doc_freq)) + 1.0
+
+    def _reset(self, scope: Tuple[str, str]):
+        self._scope = scope
+        self._exact.clear()
+        self._texts, self._sqls, self._constraints = [], [], []
+        self._matrix = np.zeros((0, self.dim), dtype=np.float32)
+        self._doc_freq = np.zeros(self.dim, dtype=np.float32)
+
+    def lookup(self, query: str, database_id: str, schema_hash: str,
+               literals: Iterable[str] = ()) -> Optional[Tuple[str, str, float]]:
+        """Returns (sql, "exact" | "semantic", similarity) on a hit, otherwise None.
+
+        `literals` are the catalog's column values (SchemaCatalog.literal_values()).
+        """
+        normalized = normalize_query_text(query)
+        scope = (database_id, schema_hash)
+        with self._lock:
+            if scope != self._scope:
+                self._reset(scope)
+
+            sql = self._exact.get(normalized)
+            if sql is not None:
+                self._record_hit("exact")
+                return sql, "exact", 1.0
+
+            if self._texts:
+                idf = self._idf()
+                query_vec = self._vectorize(normalized) * idf
+                query_norm = np.linalg.norm(query_vec)
+                if query_norm > 0:
+                    weighted = self._matrix * idf
+                    norms = np.linalg.norm(weighted, axis=1) * query_norm
+                    scores = (weighted @ query_vec) / np.where(norms > 0, norms, 1.0)
+                    best = int(np.argmax(scores))
+                    score = float(scores[best])
+                    if (score >= self.similarity_threshold
+                            and self._constraints[best] == _constraints(normalized, literals)):
+                        self._record_hit("semantic")
+                        return self._sqls[best], "semantic", score
+
+        key = make_key("sql", database_id, schema_hash, normalized)
+        sql = self.shared.get_object(key) if self.shared is not None else None
+        with self._lock:
+            if sql is None:
+                self._misses += 1
+                return None
+            if scope == self._scope:
+                self._insert(normalized, sql, literals)
+            self._shared_hits += 1
+            self._record_hit("exact")
+            return sql, "exact", 1.0
+
+    def store(self, query: str, database_id: str, schema_hash: str, sql: str, literals: Iterable[str] = ()):
+        normalized = normalize_query_text(query)
+        scope = (database_id, schema_hash)
+        with self._lock:
+            if scope != self._scope:
+                self._reset(scope)
+            self._insert(normalized, sql, literals)
+        if self.shared is not None:
+            self.shared.set_object(make_key("sql", database_id, schema_hash, normalized), sql)
+
+    def _insert(self, normalized: str, sql: str, literals: Iterable[str]):
+        """Adds or replaces an entry; expects self._lock to be held."""
+        if normalized in self._exact:
+            # Re-stored after a repair: replace the SQL that was rejected.
+            self._exact[normalized] = sql
+            self._sqls[self._texts.index(normalized)] = sql
+            return
+
+        if len(self._texts) >= self.max_entries:
+            # Drop the oldest entry.
+            oldest = self._texts.pop(0)
+            self._exact.pop(oldest, None)
+            self._sqls.pop(0)
+            self._constraints.pop(0)
+            self._doc_freq -= (self._matrix[0] > 0)
+            self._matrix = self._matrix[1:]
+
+        vec = self._vectorize(normalized)
+        self._exact[normalized] = sql
+        self._texts.append(normalized)
+        self._sqls.append(sql)
+        self._constraints.append(_constraints(normalized, literals))
+        self._matrix = np.vstack([self._matrix, vec[None, :]])
+        self._doc_freq += (vec > 0)
+
+    def record_llm_latency(self, seconds: float):
+        """Feeds the observed text2sql LLM latency, used to estimate the time saved by hits."""
+        with self._lock:
+            if self._llm_latency_ema is None:
+                self._llm_latency_ema = seconds
+            else:
+                self._llm_latency_ema = 0.8 * self._llm_latency_ema + 0.2 * seconds
+
+    def _record_hit(self, kind: str):
+        if kind == "exact":
+            self._exact_hits += 1
+        else:
+            self._semantic_hits += 1
+        self._saved_seconds += self._llm_latency_ema or 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self._exact_hits + self._semantic_hits
+            lookups = hits + self._misses
+            return {
+                "entries": len(self._texts),
+                "exact_hits": self._exact_hits,
+                "semantic_hits": self._semantic_hits,
+                "shared_hits": self._shared_hits,
+                "misses": self._misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "avg_llm_latency_seconds": round(self._llm_latency_ema or 0.0, 4),
+                "saved_latency_seconds": round(self._saved_seconds, 4),
+            }
@@ -0,0 +1,127 @@
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from src.core.interfaces import IDatabase
+from src.models.schema import SchemaCatalog
+
+# Statements and keywords that write, change the schema or touch the connection.
+_FORBIDDEN = re.compile(
+    r"\b(INSERT|UPDATE|DELETE|UPSERT|MERGE|DROP|ALTER|CREATE|ATTACH|DETACH|PRAGMA|VACUUM|REINDEX|ANALYZE"
+    r"|BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE|GRANT|REVOKE|COPY|INSTALL|LOAD|EXPORT|IMPORT|CALL"
+    r"|REPLACE(?!\s*\())\b",
+    re.IGNORECASE,
+)
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|`[^`]*`|\[[^\]]*\]")
+_TABLE_REFS = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?|,\s*(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+_AGGREGATE = re.compile(r"\bGROUP\s+BY\b|\bDISTINCT\b|\b(?:COUNT|SUM|AVG|MIN|MAX|TOTAL|GROUP_CONCAT)\s*\(", re.IGNORECASE)
+_TRAILING_LIMIT = re.compile(r"\bLIMIT\s+\d+(?:\s*(?:,|OFFSET)\s*\d+)?\s*$", re.IGNORECASE)
+_SCAN = re.compile(r"^SCAN (\w+)")
+
+_RESERVED = {"where", "on", "join", "inner", "left", "right", "full", "cross", "natural", "group", "order",
+             "limit", "union", "except", "intersect", "having", "using", "window", "as", "select"}
+
+@dataclass
+class GuardVerdict:
+    sql: str
+    rejected: Optional[str] = None  # repair hint for text2sql when the SQL must not run
+    note: Optional[str] = None  # what was rewritten, if anything
+
+class SQLGuard:
+    """Validates generated SQL before it runs.
+
+    Rejects anything but a single read-only SELECT, then inspects the backend's query plan:
+    nested full scans of two large tables (a missing join predicate) are rejected, and an
+    unbounded sort over a full scan of a large table gets a LIMIT so the backend can do a
+    top-N sort. Rejections carry a hint meant to be fed back to the text2sql agent.
+    """
+
+    def __init__(self, db: IDatabase, large_table_rows: Optional[int] = 10_000,
+                 max_sort_rows: Optional[int] = 100_000, rewrite_limit: Optional[int] = 10_000):
+        self.db = db
+        self.large_table_rows = large_table_rows or 10_000
+        self.max_sort_rows = max_sort_rows or 100_000
+        # One row past the inline cap so the workflow still sees that the result was truncated.
+        self.rewrite_limit = (rewrite_limit or 10_000) + 1
+        self._lock = threading.Lock()
+        self._counts = {"passed": 0, "rewritten": 0, "rejected": 0}
+
+    def check(self, sql: str) -> GuardVerdict:
+        verdict = self._check(sql.strip().rstrip(";").strip())
+        with self._lock:
+            if verdict.rejected:
+                self._counts["rejected"] += 1
+            elif verdict.note:
+                self._counts["rewritten"] += 1
+            else:
+                self._counts["passed"] += 1
+        return verdict
+
+    def _check(self, sql: str) -> GuardVerdict:
+        stripped = _LITERALS.sub("''", _COMMENTS.sub(" ", sql)).strip()
+        if ";" in stripped:
+            return GuardVerdict(sql, rejected="Return exactly one SQL statement.")
+        if not re.match(r"(SELECT|WITH)\b", stripped, re.IGNORECASE):
+            return GuardVerdict(sql, rejected="Only a read-only SELECT (or WITH ... SELECT) statement is allowed.")
+        forbidden = _FORBIDDEN.search(stripped)
+        if forbidden:
+            return GuardVerdict(sql, rejected=f"The query must be read-only; {forbidden.group(1).upper()} is not allowed.")
+
+        plan = self.db.explain_query(sql)
+        if plan and "error" in plan[0]:
+            return GuardVerdict(sql, rejected=f"The SQL does not compile: {plan[0]['error']}")
+        return self._check_plan(sql, stripped, plan, self.db.get_schema_catalog())
+
+    def _check_plan(self, sql: str, stripped: str, plan: List[Dict[str, Any]], catalog: SchemaCatalog) -> GuardVerdict:
+        aliases = self._aliases(stripped, catalog)
+        row_counts = {name: table.row_count or 0 for name, table in catalog.tables.items()}
+
+        scans: Dict[Any, List[str]] = {}
+        for step in plan:
+            detail = step["detail"]
+            if "CROSS_PRODUCT" in detail:
+                return GuardVerdict(sql, rejected="The query has a cartesian product; add a join condition.")
+            match = _SCAN.match(detail)
+            if match and "CONSTANT ROW" not in detail and match.group(1) in aliases:
+                scans.setdefault(step["parent"], []).append(aliases[match.group(1)])
+
+        for tables in scans.values():
+            large = [t for t in tables if row_counts.get(t, 0) >= self.large_table_rows]
+            if len(large) >= 2:
+                a, b = large[:2]
+                shared = sorted({c.name for c in catalog.tables[a].columns} & {c.name for c in catalog.tables[b].columns})
+                hint = f" They share {', '.join(shared)}." if shared else ""
+                return GuardVerdict(sql, rejected=(
+                    f"The query joins {a} ({row_counts[a]} rows) and {b} ({row_counts[b]} rows) without a join "
+                    f"condition, a cartesian product. Add an ON condition relating them.{hint}"
+                ))
+
+        scanned = [t for tables in scans.values() for t in tables]
+        big_scan = max(scanned, key=lambda t: row_counts.get(t, 0), default=None)
+        sorts = any("TEMP B-TREE FOR ORDER BY" in step["detail"] for step in plan)
+        if (big_scan and row_counts.get(big_scan, 0) >= self.max_sort_rows and sorts
+                and not _AGGREGATE.search(stripped) and not _TRAILING_LIMIT.search(stripped)):
+            return GuardVerdict(
+                f"{sql}\nLIMIT {self.rewrite_limit}",
+                note=f"Added LIMIT {self.rewrite_limit}: sorting a full scan of {big_scan} ({row_counts[big_scan]} rows).",
+            )
+        return GuardVerdict(sql)
+
+    @staticmethod
+    def _aliases(stripped: str, catalog: SchemaCatalog) -> Dict[str, str]:
+        """Maps the names a plan may use for a table (alias or table name) to the table."""
+        aliases = {}
+        for match in _TABLE_REFS.finditer(stripped):
+            table = match.group(1) or match.group(3)
+            alias = match.group(2) or match.group(4)
+            if table in catalog.tables:
+                aliases[table] = table
+                if alias and alias.lower() not in _RESERVED:
+                    aliases[alias] = table
+        return aliases
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._counts)
@@ -1,80 +1,319 @@
-from typing import Dict, Any, List, TypedDict, Optional
-from langchain_openai import ChatOpenAI
+from typing import Dict, Any, List, TypedDict, Optional, Callable, AsyncIterator, Tuple, Annotated
+from concurrent.futures import ThreadPoolExecutor
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
+import asyncio
+import contextvars
+import functools
 import json
+import time
+import pyarrow as pa
 
-from src.core.interfaces import IAgentWorkflow, IDatabase
+from src.core.interfaces import IAgentWorkflow, IDatabase, arrow_error_message
+from src.core.coalescing import AsyncSingleFlight
+from src.core.metrics import MetricsRegistry, timed
+from src.agents.sql_cache import SemanticSQLCache
+from src.agents.sql_guard import SQLGuard, GuardVerdict
+from src.agents.dashboard_planner import HeuristicDashboardPlanner, DASHBOARD_MODES
+from src.agents.llm_gateway import LLMGateway
+from src.data.sql_text import aggregates_or_sorts, returns_single_row
+
+# Rows fetched by the LIMIT probe that feeds the dashboard agent.
+PROBE_ROWS = 5
+
+def keep_first_error(current: Optional[str], new: Optional[str]) -> Optional[str]:
+    """Reducer for `error`: parallel branches may both report one, the first wins."""
+    return current or new
 
 # Define our State
 class AgentState(TypedDict):
     query: str
     schema: str
+    database_id: str
+    schema_hash: str
+    schema_literals: List[str]
     sql_query: Optional[str]
+    sql_cache_hit: Optional[str]
+    sql_attempts: int
+    sql_feedback: Optional[str]
+    sql_guard_note: Optional[str]
+    sample: Optional[List[Dict[str, Any]]]
+    columns: Optional[List[Dict[str, Any]]]
+    columnar: bool
     data: Optional[List[Dict[str, Any]]]
+    table: Optional[pa.Table]
+    truncated: bool
+    row_count: Optional[int]
     dashboard_config: Optional[Dict[str, Any]]
-    error: Optional[str]
+    error: Annotated[Optional[str], keep_first_error]
 
 class LangGraphWorkflow(IAgentWorkflow):
-    def __init__(self, db: IDatabase, base_url: str = "http://localhost:11434/v1", model_name: str = "llama3.1"):
+    def __init__(self, db: IDatabase, base_url: str = "http://localhost:11434/v1", model_name: str = "llama3.1",
+                 sql_cache: Optional[SemanticSQLCache] = None, db_workers: Optional[int] = 8,
+                 dashboard_planner: Optional[HeuristicDashboardPlanner] = None, dashboard_mode: Optional[str] = "hybrid",
+                 max_rows: Optional[int] = 10_000, sql_guard: Optional[SQLGuard] = None,
+                 sql_repair_attempts: Optional[int] = 2, metrics: Optional[MetricsRegistry] = None,
+                 llm_max_concurrency: Optional[int] = 4, llm_gateway: Optional[LLMGateway] = None):
         self.db = db
-        # Set up LLM pointing to Ollama by default
-        self.llm = ChatOpenAI(
-            base_url=base_url,
-            api_key="ollama", # required but not used by local ollama
-            model=model_name,
-            temperature=0,
-        )
+        self._init_metrics(metrics or MetricsRegistry())
+        # Identical in-flight questions share one pipeline run.
+        self.query_flight = AsyncSingleFlight("query", self.metrics)
+        self.sql_guard = sql_guard
+        # How many times rejected SQL is sent back to text2sql with a repair hint
+        self.sql_repair_attempts = sql_repair_attempts if sql_repair_attempts is not None else 2
+        # Rows returned inline; larger results are truncated and paged by the API.
+        self.max_rows = max_rows or None
+        self.sql_cache = sql_cache
+        # "llm": always ask the LLM, "heuristic": never, "hybrid": only when the rules are ambiguous
+        self.dashboard_mode = dashboard_mode or "hybrid"
+        if self.dashboard_mode not in DASHBOARD_MODES:
+            raise ValueError(f"Unknown dashboard mode: {self.dashboard_mode}")
+        self.dashboard_planner = dashboard_planner or HeuristicDashboardPlanner()
+        # Blocking DB calls on the async path run here, off the event loop.
+        self.db_executor = ThreadPoolExecutor(max_workers=db_workers or 8, thread_name_prefix="db")
+        # LLM calls go through the gateway: pooled connections, per-backend caps, priority queue, retries.
+        # Ollama by default; base_url may list several comma-separated backends.
+        self.llm_gateway = llm_gateway or LLMGateway(base_url, model_name, max_in_flight=llm_max_concurrency,
+                                                     metrics=self.metrics)
 
         # Build graph
         workflow = StateGraph(AgentState)
 
-        # Add nodes
-        workflow.add_node("text2sql", self.node_text2sql)
-        workflow.add_node("execute_sql", self.node_execute_sql)
-        workflow.add_node("text2dashboard", self.node_text2dashboard)
+        # Add nodes (each with a sync and an async implementation for invoke/ainvoke)
+        workflow.add_node("sql_cache", self._traced("sql_cache", self.node_sql_cache))
+        workflow.add_node("text2sql", self._traced("text2sql", self.node_text2sql, self.anode_text2sql))
+        workflow.add_node("sql_guard", self._traced("sql_guard", self.node_sql_guard, self.anode_sql_guard))
+        workflow.add_node("probe_sql", self._traced("probe_sql", self.node_probe_sql, self.anode_probe_sql))
+        workflow.add_node("execute_sql", self._traced("execute_sql", self.node_execute_sql, self.anode_execute_sql))
+        workflow.add_node("text2dashboard", self._traced("text2dashboard", self.node_text2dashboard, self.anode_text2dashboard))
+        workflow.add_node("finalize", self._traced("finalize", self.node_finalize))
 
         # Set edges
-        workflow.set_entry_point("text2sql")
-        workflow.add_edge("text2sql", "execute_sql")
+        workflow.set_entry_point("sql_cache")
+
+        # Cache hit: skip the text2sql LLM call and validate the cached SQL directly.
+        def cache_router(state: AgentState):
+            if state.get("sql_query"):
+                return "sql_guard"
+            return "text2sql"
+
+        workflow.add_conditional_edges("sql_cache", cache_router)
+        workflow.add_edge("text2sql", "sql_guard")
+
+        # Rejected SQL goes back to text2sql with the guard's repair hint (bounded retries).
+        def guard_router(state: AgentState):
+            if state.get("error"):
+                return END
+            if state.get("sql_feedback"):
+                return "text2sql"
+            return "probe_sql"
+
+        workflow.add_conditional_edges("sql_guard", guard_router, ["text2sql", "probe_sql", END])
 
-        # Conditional edge: if error executing SQL, stop. Otherwise, go to dashboard.
+        # Conditional edge: if the probe failed, stop. Otherwise run the full query and the
+        # dashboard agent (which only needs the sample or the column types) in parallel, then join.
         def router(state: AgentState):
             if state.get("error"):
                 return END
-            return "text2dashboard"
+            return ["execute_sql", "text2dashboard"]
 
-        workflow.add_conditional_edges("execute_sql", router)
-        workflow.add_edge("text2dashboard", END)
+        workflow.add_conditional_edges("probe_sql", router, ["execute_sql", "text2dashboard", END])
+        workflow.add_edge(["execute_sql", "text2dashboard"], "finalize")
+        workflow.add_edge("finalize", END)
 
         self.app = workflow.compile()
 
-    def process_query(self, user_query: str) -> Dict[str, Any]:
-        """Runs the langgraph pipeline."""
-        schema = self.db.get_schema_info()
-        initial_state = {
+    def _init_metrics(self, metrics: MetricsRegistry):
+        self.metrics = metrics
+        self._node_duration = metrics.histogram("agent_node_duration_seconds", "Workflow node latency.", ["node"])
+        self._node_errors = metrics.counter("agent_node_errors_total", "Workflow nodes that reported an error.", ["node"])
+        self._llm_duration = metrics.histogram("llm_request_duration_seconds", "LLM call latency.", ["agent"])
+        self._llm_tokens = metrics.counter("llm_tokens_total", "LLM tokens used.", ["agent", "kind"])
+        self._llm_errors = metrics.counter("llm_errors_total", "LLM calls that raised.", ["agent"])
+        self._schema_duration = metrics.histogram("schema_catalog_duration_seconds", "Schema catalog lookup latency.")
+
+    def _traced(self, name: str, func: Callable, afunc: Optional[Callable] = None) -> RunnableLambda:
+        """Wraps a node's sync (and async) implementation with latency and error metrics."""
+        def record(update: Dict[str, Any]) -> Dict[str, Any]:
+            if update and update.get("error"):
+                self._node_errors.inc(node=name)
+            return update
+
+        def run(state: AgentState) -> Dict[str, Any]:
+            with timed(f"node.{name}", self._node_duration, node=name):
+                return record(func(state))
+
+        async def arun(state: AgentState) -> Dict[str, Any]:
+            with timed(f"node.{name}", self._node_duration, node=name):
+                return record(await afunc(state) if afunc else func(state))
+
+        return RunnableLambda(run, afunc=arun, name=name)
+
+    def _record_llm(self, agent: str, response: Any, seconds: float):
+        self._llm_duration.observe(seconds, agent=agent)
+        usage = getattr(response, "usage_metadata", None) or {}
+        self._llm_tokens.inc(usage.get("input_tokens", 0), agent=agent, kind="prompt")
+        self._llm_tokens.inc(usage.get("output_tokens", 0), agent=agent, kind="completion")
+
+    def _call_llm(self, agent: str, prompt: str) -> Any:
+        start = time.perf_counter()
+        try:
+            response = self.llm_gateway.invoke([SystemMessage(content=prompt)])
+        except Exception:
+            self._llm_errors.inc(agent=agent)
+            raise
+        self._record_llm(agent, response, time.perf_counter() - start)
+        return response
+
+    async def _acall_llm(self, agent: str, prompt: str) -> Any:
+        start = time.perf_counter()
+        try:
+            response = await self.llm_gateway.ainvoke([SystemMessage(content=prompt)])
+        except Exception:
+            self._llm_errors.inc(agent=agent)
+            raise
+        self._record_llm(agent, response, time.perf_counter() - start)
+        return response
+
+    def _initial_state(self, user_query: str, catalog, columnar: bool = False) -> Dict[str, Any]:
+        return {
             "query": user_query,
-            "schema": schema,
+            "schema": catalog.render(user_query),
+            "database_id": self.db.get_database_id(),
+            "schema_hash": catalog.fingerprint(),
+            "schema_literals": catalog.literal_values(),
             "sql_query": None,
+            "sql_cache_hit": None,
+            "sql_attempts": 0,
+            "sql_feedback": None,
+            "sql_guard_note": None,
+            "sample": None,
+            "columns": None,
+            "columnar": columnar,
             "data": None,
+            "table": None,
+            "truncated": False,
+            "row_count": None,
             "dashboard_config": None,
             "error": None
         }
 
-        final_state = self.app.invoke(initial_state)
-
-        return {
+    @staticmethod
+    def _result(final_state: Dict[str, Any]) -> Dict[str, Any]:
+        result = {
             "query": final_state["query"],
             "sql_query": final_state.get("sql_query"),
+            "sql_cache_hit": final_state.get("sql_cache_hit"),
+            "sql_guard_note": final_state.get("sql_guard_note"),
             "data": final_state.get("data"),
+            "truncated": final_state.get("truncated", False),
+            "row_count": final_state.get("row_count"),
             "dashboard_config": final_state.get("dashboard_config"),
             "error": final_state.get("error")
         }
+        if final_state.get("columnar"):
+            result["table"] = final_state.get("table")
+        return result
 
-    def node_text2sql(self, state: AgentState) -> Dict[str, Any]:
-        """Agent that translates natural language to SQL."""
-        prompt = f"""You are a specialized Text2SQL agent for a financial risk system.
+    def process_query(self, user_query: str, columnar: bool = False) -> Dict[str, Any]:
+        """Runs the langgraph pipeline."""
+        with timed("schema", self._schema_duration):
+            catalog = self.db.get_schema_catalog()
+        final_state = self.app.invoke(self._initial_state(user_query, catalog, columnar))
+        return self._result(final_state)
+
+    async def aprocess_query(self, user_query: str, columnar: bool = False) -> Dict[str, Any]:
+        """Runs the langgraph pipeline without blocking the event loop.
+
+        Concurrent calls with the same question (up to whitespace) share a single run; each
+        caller gets its own copy of the result dict.
+        """
+        key = (" ".join(user_query.split()), columnar)
+        result = await self.query_flight.do(key, lambda: self._aprocess_query(user_query, columnar))
+        return dict(result, query=user_query)
+
+    async def _aprocess_query(self, user_query: str, columnar: bool) -> Dict[str, Any]:
+        with timed("schema", self._schema_duration):
+            catalog = await self._run_db(self.db.get_schema_catalog)
+        final_state = await self.app.ainvoke(self._initial_state(user_query, catalog, columnar))
+        return self._result(final_state)
+
+    async def astream_query(self, user_query: str, columnar: bool = False,
+                            chunk_size: int = 500) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Runs the pipeline and yields (event, payload) pairs as each node completes.
+
+        Events: "sql" once the SQL is known, "data" per chunk of rows (an Arrow table slice
+        under "table" when `columnar`) from whichever node produced them, "dashboard" for the
+        dashboard config, "error" on failure and a final "done" carrying the final result,
+        rows included.
+        """
+        with timed("schema", self._schema_duration):
+            catalog = await self._run_db(self.db.get_schema_catalog)
+        final_state = self._initial_state(user_query, catalog, columnar)
+
+        async for update in self.app.astream(final_state, stream_mode="updates"):
+            for node, values in update.items():
+                if not values:
+                    continue
+                final_state.update(values)
+                if values.get("error"):
+                    yield "error", {"error": values["error"]}
+                elif node == "sql_guard" and values.get("sql_query"):
+                    yield "sql", {"sql_query": values["sql_query"], "sql_cache_hit": values.get("sql_cache_hit")}
+                elif values.get("row_count") is not None and columnar:
+                    table = values["table"]
+                    for offset in range(0, max(table.num_rows, 1), chunk_size):
+                        yield "data", {"table": table.slice(offset, chunk_size), "offset": offset, "total": table.num_rows}
+                elif values.get("row_count") is not None:
+                    data = values.get("data") or []
+                    for offset in range(0, max(len(data), 1), chunk_size):
+                        yield "data", {"rows": data[offset:offset + chunk_size], "offset": offset, "total": len(data)}
+                elif values.get("dashboard_config") is not None:
+                    yield "dashboard", {"dashboard_config": values["dashboard_config"]}
+
+        yield "done", self._result(final_state)
+
+    async def _run_db(self, fn: Callable, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        # Carry the caller's context (request timings) into the worker thread.
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self.db_executor, functools.partial(context.run, fn, *args))
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns NL-to-SQL cache, SQL guard, dashboard planner, query coalescing and LLM gateway metrics."""
+        stats = {"dashboard_planner": dict(self.dashboard_planner.stats(), mode=self.dashboard_mode),
+                 "query_coalescing": self.query_flight.stats(),
+                 "llm_gateway": self.llm_gateway.stats()}
+        if self.sql_cache is not None:
+            stats["sql_cache"] = self.sql_cache.stats()
+        if self.sql_guard is not None:
+            stats["sql_guard"] = self.sql_guard.stats()
+        return stats
+
+    def node_sql_cache(self, state: AgentState) -> Dict[str, Any]:
+        """Looks up previously generated SQL for the same (or a similar) question."""
+        if self.sql_cache is None:
+            return {}
+
+        hit = self.sql_cache.lookup(state["query"], state["database_id"], state["schema_hash"],
+                                    state.get("schema_literals") or ())
+        if hit is None:
+            return {}
+        sql_query, kind, _ = hit
+        return {"sql_query": sql_query, "sql_cache_hit": kind}
+
+    def _text2sql_prompt(self, state: AgentState) -> str:
+        repair = ""
+        if state.get("sql_feedback"):
+            repair = f"""
+Your previous SQL was rejected:
+{state['sql_query']}
+Reason: {state['sql_feedback']}
+Write a corrected query.
+"""
+        return f"""You are a specialized Text2SQL agent for a financial risk system.
 Your task is to convert the user's natural language query into a valid SQL query for SQLite.
 Here is the database schema:
 {state['schema']}
@@ -83,52 +322,178 @@ Rules:
 1. ONLY return the SQL query, nothing else. No markdown formatting, no explanations.
 2. The query must be a valid SELECT statement. Do not mutate the database.
 3. Only use tables and columns defined in the schema.
+4. Prefer a ROLLUP table (see its Description) over joining the raw tables whenever it has every column the query needs.
 
-User query: {state['query']}
+User query: {state['query']}{repair}
 SQL Query:"""
 
+    @staticmethod
+    def _parse_sql(content: str) -> str:
+        sql_query = content.strip()
+        # remove formatting if llm disobeys
+        if sql_query.startswith("```sql"):
+            sql_query = sql_query[6:]
+        if sql_query.endswith("```"):
+            sql_query = sql_query[:-3]
+        return sql_query.strip()
+
+    def node_text2sql(self, state: AgentState) -> Dict[str, Any]:
+        """Agent that translates natural language to SQL."""
+        prompt = self._text2sql_prompt(state)
         try:
-            response = self.llm.invoke([SystemMessage(content=prompt)])
-            sql_query = response.content.strip()
-            # remove formatting if llm disobeys
-            if sql_query.startswith("```sql"):
-                sql_query = sql_query[6:]
-            if sql_query.endswith("```"):
-                sql_query = sql_query[:-3]
-            sql_query = sql_query.strip()
-            return {"sql_query": sql_query}
+            start = time.perf_counter()
+            response = self._call_llm("text2sql", prompt)
+            if self.sql_cache is not None:
+                self.sql_cache.record_llm_latency(time.perf_counter() - start)
+            return {"sql_query": self._parse_sql(response.content)}
         except Exception as e:
             return {"error": f"Failed to generate SQL: {str(e)}"}
 
-    def node_execute_sql(self, state: AgentState) -> Dict[str, Any]:
-        """Executes the generated SQL query."""
+    async def anode_text2sql(self, state: AgentState) -> Dict[str, Any]:
+        """Async variant of node_text2sql."""
+        prompt = self._text2sql_prompt(state)
+        try:
+            start = time.perf_counter()
+            response = await self._acall_llm("text2sql", prompt)
+            if self.sql_cache is not None:
+                self.sql_cache.record_llm_latency(time.perf_counter() - start)
+            return {"sql_query": self._parse_sql(response.content)}
+        except Exception as e:
+            return {"error": f"Failed to generate SQL: {str(e)}"}
+
+    def _handle_guard_verdict(self, state: AgentState, verdict: GuardVerdict) -> Dict[str, Any]:
+        if verdict.rejected is None:
+            return {"sql_query": verdict.sql, "sql_feedback": None, "sql_guard_note": verdict.note}
+        if state.get("sql_attempts", 0) >= self.sql_repair_attempts:
+            return {"error": f"SQL rejected: {verdict.rejected}"}
+        # A rejected cache entry is not a hit any more; the repaired SQL gets cached instead.
+        return {"sql_feedback": verdict.rejected, "sql_attempts": state.get("sql_attempts", 0) + 1,
+                "sql_cache_hit": None}
+
+    def node_sql_guard(self, state: AgentState) -> Dict[str, Any]:
+        """Rejects non-read SQL and expensive plans, or bounds them with a LIMIT."""
+        if state.get("error"):
+            return {}
+        sql_query = state.get("sql_query")
+        if not sql_query:
+            return {"error": "No SQL query generated."}
+        if self.sql_guard is None:
+            return {"sql_query": sql_query}
+        return self._handle_guard_verdict(state, self.sql_guard.check(sql_query))
+
+    async def anode_sql_guard(self, state: AgentState) -> Dict[str, Any]:
+        """Async variant of node_sql_guard; EXPLAIN runs on the DB executor."""
+        if state.get("error"):
+            return {}
+        sql_query = state.get("sql_query")
+        if not sql_query:
+            return {"error": "No SQL query generated."}
+        if self.sql_guard is None:
+            return {"sql_query": sql_query}
+        return self._handle_guard_verdict(state, await self._run_db(self.sql_guard.check, sql_query))
+
+    def _handle_probe_result(self, state: AgentState, sql_query: str, sample: List[Dict[str, Any]],
+                             key: str = "sample") -> Dict[str, Any]:
+        # Check if error returned from db
+        if sample and isinstance(sample, list) and len(sample) > 0 and "error" in sample[0]:
+            return {"error": f"SQL Execution Error: {sample[0]['error']}"}
+
+        # Only remember SQL that actually ran.
+        if self.sql_cache is not None and not state.get("sql_cache_hit"):
+            self.sql_cache.store(state["query"], state["database_id"], state["schema_hash"], sql_query,
+                                 state.get("schema_literals") or ())
+
+        return {key: sample}
+
+    def node_probe_sql(self, state: AgentState) -> Dict[str, Any]:
+        """Validates the SQL and fetches a small sample (LIMIT probe) for the dashboard agent."""
+        if state.get("error"):
+            return {}
+
+        sql_query = state.get("sql_query")
+        if not sql_query:
+            return {"error": "No SQL query generated."}
+
+        if aggregates_or_sorts(sql_query):
+            # A LIMIT cannot cut an aggregation or sort short, so a sample would cost the whole
+            # query: describe the result columns instead and leave the rows to execute_sql.
+            return self._handle_probe_result(state, sql_query, self.db.describe_query(sql_query), key="columns")
+        sample = self.db.preview_query(sql_query, limit=PROBE_ROWS)
+        return self._handle_probe_result(state, sql_query, sample)
+
+    async def anode_probe_sql(self, state: AgentState) -> Dict[str, Any]:
+        """Async variant of node_probe_sql; the probe runs on the DB executor."""
         if state.get("error"):
-            return state
+            return {}
 
         sql_query = state.get("sql_query")
         if not sql_query:
             return {"error": "No SQL query generated."}
 
-        data = self.db.execute_query(sql_query)
+        if aggregates_or_sorts(sql_query):
+            columns = await self._run_db(self.db.describe_query, sql_query)
+            return self._handle_probe_result(state, sql_query, columns, key="columns")
+        sample = await self._run_db(self.db.preview_query, sql_query, PROBE_ROWS)
+        return self._handle_probe_result(state, sql_query, sample)
 
+    def _handle_sql_result(self, data: Any) -> Dict[str, Any]:
         # Check if error returned from db
+        if isinstance(data, pa.Table):
+            error = arrow_error_message(data)
+            if error is not None:
+                return {"error": f"SQL Execution Error: {error}"}
+            truncated = bool(self.max_rows) and data.num_rows > self.max_rows
+            table = data.slice(0, self.max_rows) if truncated else data
+            return {"table": table, "truncated": truncated, "row_count": table.num_rows}
         if data and isinstance(data, list) and len(data) > 0 and "error" in data[0]:
             return {"error": f"SQL Execution Error: {data[0]['error']}"}
+        truncated = bool(self.max_rows) and len(data) > self.max_rows
+        rows = data[:self.max_rows] if truncated else data
+        return {"data": rows, "truncated": truncated, "row_count": len(rows)}
 
-        return {"data": data}
+    def _execute(self, state: AgentState) -> Any:
+        """Runs the full query, row-wise or column-wise depending on the requested format."""
+        sample = state.get("sample")
+        if sample is not None and len(sample) < PROBE_ROWS:
+            # The LIMIT probe already returned the whole result.
+            return pa.Table.from_pylist(sample) if state.get("columnar") else sample
+        # One row past the cap tells a result that fills it apart from one that exceeds it.
+        limit = self.max_rows + 1 if self.max_rows else None
+        if state.get("columnar"):
+            return self.db.execute_arrow(state["sql_query"], max_rows=limit)
+        return self.db.execute_query(state["sql_query"], max_rows=limit)
 
-    def node_text2dashboard(self, state: AgentState) -> Dict[str, Any]:
-        """Agent that takes SQL data and generates a dashboard configuration."""
+    def node_execute_sql(self, state: AgentState) -> Dict[str, Any]:
+        """Executes the generated SQL query."""
+        if state.get("error"):
+            return {}
+        return self._handle_sql_result(self._execute(state))
+
+    async def anode_execute_sql(self, state: AgentState) -> Dict[str, Any]:
+        """Async variant of node_execute_sql; the query runs on the DB executor."""
         if state.get("error"):
-            return state
+            return {}
+        return self._handle_sql_result(await self._run_db(self._execute, state))
 
-        data_preview = str(state.get("data", [])[:5]) # show max 5 rows to not overflow context
+    def node_finalize(self, state: AgentState) -> Dict[str, Any]:
+        """Joins the execute_sql and text2dashboard branches."""
+        if state.get("error"):
+            # A dashboard without its data is of no use to the caller.
+            return {"dashboard_config": None}
+        return {}
+
+    def _text2dashboard_prompt(self, state: AgentState) -> str:
+        if state.get("sample") is None and state.get("columns"):
+            # Aggregations are described, not sampled: only the result columns are known.
+            data_preview = "Result Columns (name and type):\n" + ", ".join(
+                f"{column['name']} ({column.get('type') or 'unknown'})" for column in state["columns"])
+        else:
+            data_preview = "Data Sample (first few rows):\n" + str((state.get("sample") or [])[:PROBE_ROWS]) # show max 5 rows to not overflow context
 
-        prompt = f"""You are a Text2Dashboard agent. Your job is to decide the best way to visualize a dataset for a trader.
+        return f"""You are a Text2Dashboard agent. Your job is to decide the best way to visualize a dataset for a trader.
 You are given the user's original query and a sample of the data returned by the database.
 
 User Query: {state['query']}
-Data Sample (first few rows):
 {data_preview}
 
 Based on this data, create a JSON configuration for a dashboard view. The JSON must follow this exact format:
@@ -152,17 +517,57 @@ Rules:
 3. If it's a simple aggregation, a "bar" chart is usually good. Time series should be "line".
 """
 
+    @staticmethod
+    def _parse_dashboard(content: str) -> Dict[str, Any]:
+        content = content.strip()
+        # remove markdown formatting if any
+        if content.startswith("```json"):
+            content = content[7:]
+        if content.endswith("```"):
+            content = content[:-3]
+        return json.loads(content.strip())
+
+    def _plan_dashboard(self, state: AgentState) -> Optional[Dict[str, Any]]:
+        """Rule-based dashboard config, or None when the LLM has to decide."""
+        if self.dashboard_mode == "llm":
+            return None
+        if state.get("sample") is None and state.get("columns"):
+            config = self.dashboard_planner.plan_columns(state["query"], state["columns"],
+                                                         single_row=returns_single_row(state["sql_query"]))
+        else:
+            config = self.dashboard_planner.plan(state["query"], state.get("sample") or [])
+        if config is None and self.dashboard_mode == "heuristic":
+            config = {"title": state["query"], "panels": [{"type": "table", "title": "Result"}]}
+        return config
+
+    def node_text2dashboard(self, state: AgentState) -> Dict[str, Any]:
+        """Agent that takes SQL data and generates a dashboard configuration."""
+        if state.get("error"):
+            return {}
+        config = self._plan_dashboard(state)
+        if config is not None:
+            return {"dashboard_config": config}
+
+        response = None
         try:
-            response = self.llm.invoke([SystemMessage(content=prompt)])
-            content = response.content.strip()
-            # remove markdown formatting if any
-            if content.startswith("```json"):
-                content = content[7:]
-            if content.endswith("```"):
-                content = content[:-3]
-            content = content.strip()
-
-            config = json.loads(content)
+            response = self._call_llm("text2dashboard", self._text2dashboard_prompt(state))
+            return {"dashboard_config": self._parse_dashboard(response.content)}
+        except Exception as e:
+            raw = response.content if response is not None else None
+            return {"error": f"Failed to generate dashboard config: {str(e)}\nRaw Response: {raw}"}
+
+    async def anode_text2dashboard(self, state: AgentState) -> Dict[str, Any]:
+        """Async variant of node_text2dashboard."""
+        if state.get("error"):
+            return {}
+        config = self._plan_dashboard(state)
+        if config is not None:
             return {"dashboard_config": config}
+
+        response = None
+        try:
+            response = await self._acall_llm("text2dashboard", self._text2dashboard_prompt(state))
+            return {"dashboard_config": self._parse_dashboard(response.content)}
         except Exception as e:
-            return {"error": f"Failed to generate dashboard config: {str(e)}\nRaw Response: {response.content}"}
+            raw = response.content if response is not None else None
+            return {"error": f"Failed to generate dashboard config: {str(e)}\nRaw Response: {raw}"}
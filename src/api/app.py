@@ -1,20 +1,106 @@
-from fastapi import FastAPI, Depends, HTTPException
+import time
+# Start of the module import, for the import time reported on /ready.
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, Depends, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Literal
 from src.core.di_container import Container
-from src.core.interfaces import IAgentWorkflow
+from src.core.interfaces import IAgentWorkflow, IDatabase
+from src.core.metrics import MetricsRegistry, PROMETHEUS_CONTENT_TYPE, collect_timings, timed
+from src.data.result_pager import ResultPager, ResultExpiredError
+from src.data.panel_data import PanelDataBuilder
+from src.data.ingestion import IngestionWorker, IngestBacklogFull, JsonlTailSource
+from src.agents.llm_priority import llm_priority
+from src.api.warmup import Warmup
+from src.api.arrow_transport import (
+    ARROW_STREAM_MEDIA_TYPE, PARQUET_MEDIA_TYPE, negotiate_format, to_arrow_ipc, to_parquet, to_arrow_base64
+)
 import uvicorn
+import asyncio
+import contextvars
+import functools
+import json
 import os
 
 class QueryRequest(BaseModel):
     query: str
+    # Encoding of data chunks and panel data on /query/stream; /query negotiates via the Accept header instead.
+    data_format: Literal["json", "arrow"] = "json"
+    # Adds a per-stage latency breakdown (milliseconds) to the response.
+    include_timings: bool = False
+    # Also return the result rows inline; by default only the per-panel reduced data is sent
+    # and the full table is paged from /query/{query_id}/page.
+    include_data: bool = False
 
 class QueryResponse(BaseModel):
     query: str
     sql_query: Optional[str]
+    sql_cache_hit: Optional[str] = None
+    sql_guard_note: Optional[str] = None
     data: Optional[List[Dict[str, Any]]]
     dashboard_config: Optional[Dict[str, Any]]
     error: Optional[str]
+    # Set when the result exceeded RESULT_MAX_ROWS: fetch the rest from /query/{query_id}/page.
+    truncated: bool = False
+    row_count: Optional[int] = None
+    query_id: Optional[str] = None
+    next_cursor: Optional[str] = None
+    timings: Optional[Dict[str, float]] = None
+    # Dashboard panels with their server-side aggregated / downsampled / sampled data.
+    panels: Optional[List[Dict[str, Any]]] = None
+
+class BatchQueryRequest(BaseModel):
+    queries: List[str]
+    include_timings: bool = False
+    include_data: bool = False
+
+class BatchQueryResponse(BaseModel):
+    results: List[QueryResponse]
+
+class PageResponse(BaseModel):
+    query_id: str
+    cursor: Optional[str]
+    next_cursor: Optional[str]
+    data: List[Dict[str, Any]]
+
+class PanelsResponse(BaseModel):
+    query_id: str
+    dashboard_config: Optional[Dict[str, Any]]
+    panels: Optional[List[Dict[str, Any]]]
+
+class TradeRecord(BaseModel):
+    trade_id: str
+    desk: str
+    trader_name: str
+    asset_class: str
+    instrument: str
+    quantity: float
+    price: float
+    # Defaults to quantity * price.
+    notional: Optional[float] = None
+    trade_date: str
+
+class RiskRecord(BaseModel):
+    trade_id: str
+    calc_date: str
+    pnl: float
+    dv01: float = 0.0
+    delta: float = 0.0
+    gamma: float = 0.0
+    vega: float = 0.0
+
+class IngestRequest(BaseModel):
+    trades: List[TradeRecord] = []
+    risk_metrics: List[RiskRecord] = []
+
+class IngestResponse(BaseModel):
+    accepted_trades: int
+    accepted_risk_metrics: int
+    # Rows buffered for the next micro-batch (including this request's).
+    pending: int
 
 app = FastAPI(title="Agentic Risk Dashboard API")
 
@@ -22,8 +108,49 @@ app = FastAPI(title="Agentic Risk Dashboard API")
 container = Container()
 # Set default config for local ollama
 container.config.db_path.from_value(os.environ.get("DB_PATH", "risk.db"))
+container.config.db_backend.from_value(os.environ.get("DB_BACKEND", "sqlite"))
+container.config.duckdb_path.from_value(os.environ.get("DUCKDB_PATH", ":memory:"))
+container.config.duckdb_mode.from_value(os.environ.get("DUCKDB_MODE", "import"))
+container.config.db_pool_size.from_value(int(os.environ.get("DB_POOL_SIZE", "8")))
+container.config.db_executor_workers.from_value(int(os.environ.get("DB_EXECUTOR_WORKERS", "8")))
+container.config.result_cache_max_bytes.from_value(int(os.environ.get("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024))))
+container.config.result_cache_ttl.from_value(float(os.environ.get("RESULT_CACHE_TTL", "0")))
+container.config.query_timeout.from_value(float(os.environ.get("QUERY_TIMEOUT", "30")))
+container.config.catalog_refresh.from_value(float(os.environ.get("CATALOG_REFRESH", "60")))
+container.config.result_max_rows.from_value(int(os.environ.get("RESULT_MAX_ROWS", "10000")))
+container.config.result_page_ttl.from_value(float(os.environ.get("RESULT_PAGE_TTL", "300")))
+container.config.result_cursor_idle.from_value(float(os.environ.get("RESULT_CURSOR_IDLE", "5")))
+container.config.sql_guard_large_table_rows.from_value(int(os.environ.get("SQL_GUARD_LARGE_TABLE_ROWS", "10000")))
+container.config.sql_guard_max_sort_rows.from_value(int(os.environ.get("SQL_GUARD_MAX_SORT_ROWS", "100000")))
+container.config.sql_repair_attempts.from_value(int(os.environ.get("SQL_REPAIR_ATTEMPTS", "2")))
+container.config.sql_cache_threshold.from_value(float(os.environ.get("SQL_CACHE_THRESHOLD", "0.8")))
+container.config.sql_cache_max_entries.from_value(int(os.environ.get("SQL_CACHE_MAX_ENTRIES", "1000")))
+container.config.dashboard_mode.from_value(os.environ.get("DASHBOARD_MODE", "hybrid"))
 container.config.llm_base_url.from_value(os.environ.get("LLM_BASE_URL", "http://localhost:11434/v1"))
 container.config.llm_model_name.from_value(os.environ.get("LLM_MODEL_NAME", "llama3.1"))
+container.config.llm_max_concurrency.from_value(int(os.environ.get("LLM_MAX_CONCURRENCY", "4")))
+container.config.llm_call_timeout.from_value(float(os.environ.get("LLM_CALL_TIMEOUT", "120")))
+container.config.llm_queue_timeout.from_value(float(os.environ.get("LLM_QUEUE_TIMEOUT", "60")))
+container.config.llm_max_retries.from_value(int(os.environ.get("LLM_MAX_RETRIES", "2")))
+container.config.batch_max_queries.from_value(int(os.environ.get("BATCH_MAX_QUERIES", "100")))
+container.config.panel_max_points.from_value(int(os.environ.get("PANEL_MAX_POINTS", "1000")))
+container.config.panel_scatter_points.from_value(int(os.environ.get("PANEL_SCATTER_POINTS", "2000")))
+container.config.panel_table_rows.from_value(int(os.environ.get("PANEL_TABLE_ROWS", "1000")))
+container.config.panel_line_method.from_value(os.environ.get("PANEL_LINE_METHOD", "lttb"))
+container.config.panel_source_max_rows.from_value(int(os.environ.get("PANEL_SOURCE_MAX_ROWS", "1000000")))
+container.config.ingest_enabled.from_value(os.environ.get("INGEST_ENABLED", "false").lower() in ("1", "true", "yes"))
+container.config.ingest_batch_size.from_value(int(os.environ.get("INGEST_BATCH_SIZE", "1000")))
+container.config.ingest_max_delay.from_value(float(os.environ.get("INGEST_MAX_DELAY", "0.5")))
+container.config.ingest_max_pending.from_value(int(os.environ.get("INGEST_MAX_PENDING", "100000")))
+container.config.ingest_orphan_ttl.from_value(float(os.environ.get("INGEST_ORPHAN_TTL", "30")))
+container.config.ingest_tail_path.from_value(os.environ.get("INGEST_TAIL_PATH", ""))
+container.config.ingest_dead_letter_path.from_value(os.environ.get("INGEST_DEAD_LETTER_PATH", ""))
+container.config.shared_cache_url.from_value(os.environ.get("SHARED_CACHE_URL", ""))
+container.config.shared_cache_max_bytes.from_value(int(os.environ.get("SHARED_CACHE_MAX_BYTES", str(256 * 1024 * 1024))))
+container.config.shared_cache_ttl.from_value(float(os.environ.get("SHARED_CACHE_TTL", "3600")))
+container.config.warmup_mode.from_value(os.environ.get("WARMUP_MODE", "background"))
+container.config.warmup_tables.from_value(os.environ.get("WARMUP_TABLES", "daily_risk_rollup,trades,risk_metrics"))
+container.config.warmup_llm.from_value(os.environ.get("WARMUP_LLM", "true").lower() in ("1", "true", "yes"))
 
 app.container = container
 
@@ -33,26 +160,354 @@ def read_root():
 
 from dependency_injector.wiring import Provide, inject
 
-app.container.wire(modules=[__name__])
+def register_pages(result: Dict[str, Any], pager: ResultPager, inline_rows: Optional[int] = None) -> Dict[str, Any]:
+    """Adds a query id and the cursor after the `inline_rows` rows returned in the body.
+
+    That is needed when the result was truncated, or when its rows were left out of the body
+    (inline_rows=0) because the panels carry the reduced data.
+    """
+    row_count = result.get("row_count") or 0
+    inline_rows = row_count if inline_rows is None else inline_rows
+    if result.get("sql_query") and (result.get("truncated") or inline_rows < row_count):
+        result["query_id"] = pager.register(result["sql_query"], result.get("dashboard_config"))
+        result["next_cursor"] = str(inline_rows)
+    return result
+
+async def run_blocking(fn, *args) -> Any:
+    """Runs CPU- or DB-bound work off the event loop, keeping the request's timings context."""
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(None, functools.partial(context.run, fn, *args))
+
+def encode_panels(panels: Optional[List[Dict[str, Any]]]) -> Optional[List[Dict[str, Any]]]:
+    """Replaces each columnar panel's Arrow table by base64 IPC under "arrow"."""
+    if panels is None:
+        return None
+    return [dict({k: v for k, v in panel.items() if k != "table"}, arrow=to_arrow_base64(panel["table"]))
+            for panel in panels]
+
+async def prepare_panels(result: Dict[str, Any], panel_builder: PanelDataBuilder, pager: ResultPager,
+                         include_data: bool, keep_table: bool = False, panel_format: str = "json") -> Dict[str, Any]:
+    """Adds the per-panel reduced data and, unless `include_data`, drops the inline rows.
+
+    The panels are built from the result's Arrow table; with panel_format "arrow" their data is
+    sent as base64 Arrow IPC. Unless `keep_table`, the table is replaced by its rows, which are
+    only materialized when they are returned.
+    """
+    with timed("panels"):
+        columnar = panel_format == "arrow"
+        panels = await run_blocking(panel_builder.build, result.get("dashboard_config"), result, columnar)
+        result["panels"] = encode_panels(panels) if columnar else panels
+    table = result.get("table") if keep_table else result.pop("table", None)
+    if result["panels"] is not None and not include_data:
+        result["data"] = None
+        return register_pages(result, pager, inline_rows=0)
+    if table is not None and not keep_table:
+        result["data"] = table.to_pylist()
+    return register_pages(result, pager)
+
+def server_timing(timings: Dict[str, float]) -> str:
+    """Formats a stage -> milliseconds breakdown as a Server-Timing header."""
+    return ", ".join(f"{stage};dur={ms}" for stage, ms in timings.items())
 
 @app.post("/query", response_model=QueryResponse)
 @inject
-def handle_query(request: QueryRequest, workflow: IAgentWorkflow = Depends(Provide[Container.workflow])):
-    """Processes a natural language query through the agent workflow."""
+async def handle_query(
+    request: QueryRequest,
+    http_request: Request,
+    workflow: IAgentWorkflow = Depends(Provide[Container.workflow]),
+    pager: ResultPager = Depends(Provide[Container.result_pager]),
+    metrics: MetricsRegistry = Depends(Provide[Container.metrics]),
+    panel_builder: PanelDataBuilder = Depends(Provide[Container.panel_data]),
+):
+    """Processes a natural language query through the agent workflow.
+
+    Responds with JSON by default, or with the result table as Arrow IPC / Parquet when the
+    Accept header asks for it (SQL, dashboard config, panels and error travel in the schema
+    metadata). JSON responses carry the per-panel reduced data instead of the rows unless
+    `include_data` is set. Every response carries a Server-Timing header; `include_timings`
+    also puts the breakdown in the body.
+    """
+    if not request.query:
+        raise HTTPException(status_code=400, detail="Query cannot be empty.")
+
+    response_format = negotiate_format(http_request.headers.get("accept"))
+    start = time.perf_counter()
+    with collect_timings() as timings:
+        result = await workflow.aprocess_query(request.query, columnar=True)
+        # Arrow / Parquet clients asked for the table itself, so it is always included.
+        result = await prepare_panels(result, panel_builder, pager, request.include_data or response_format != "json",
+                                      keep_table=response_format != "json")
+    timings["total"] = round((time.perf_counter() - start) * 1000, 3)
+    if request.include_timings:
+        result["timings"] = dict(timings)
+
+    # A bad query is not an HTTP 500: the error is returned gracefully in the body.
+    serialize_start = time.perf_counter()
+    if response_format != "json":
+        table = result.pop("table", None)
+        result.pop("data", None)
+        if response_format == "arrow":
+            body, media_type = to_arrow_ipc(table, result), ARROW_STREAM_MEDIA_TYPE
+        else:
+            body, media_type = to_parquet(table, result), PARQUET_MEDIA_TYPE
+    else:
+        body, media_type = QueryResponse(**result).model_dump_json(), "application/json"
+    serialize = time.perf_counter() - serialize_start
+    timings["serialize"] = round(serialize * 1000, 3)
+
+    metrics.histogram("response_serialization_seconds", "Response encoding latency.", ["format"]).observe(
+        serialize, format=response_format)
+    metrics.histogram("http_request_duration_seconds", "Request latency excluding network I/O.",
+                      ["endpoint", "format"]).observe(time.perf_counter() - start, endpoint="/query", format=response_format)
+    return Response(body, media_type=media_type, headers={"Server-Timing": server_timing(timings)})
+
+@app.post("/query/batch", response_model=BatchQueryResponse)
+@inject
+async def handle_query_batch(
+    request: BatchQueryRequest,
+    workflow: IAgentWorkflow = Depends(Provide[Container.workflow]),
+    pager: ResultPager = Depends(Provide[Container.result_pager]),
+    metrics: MetricsRegistry = Depends(Provide[Container.metrics]),
+    max_queries: int = Depends(Provide[Container.config.batch_max_queries]),
+    panel_builder: PanelDataBuilder = Depends(Provide[Container.panel_data]),
+):
+    """Runs many natural language queries concurrently; results come back in request order.
+
+    LLM calls across the batch are bounded by LLM_MAX_CONCURRENCY per backend and queue behind
+    interactive /query calls. Identical questions (in this batch or in other in-flight requests)
+    are answered by a single workflow run.
+    """
+    if not request.queries:
+        raise HTTPException(status_code=400, detail="Queries cannot be empty.")
+    if len(request.queries) > max_queries:
+        raise HTTPException(status_code=400, detail=f"A batch can hold at most {max_queries} queries.")
+    if not all(request.queries):
+        raise HTTPException(status_code=400, detail="Query cannot be empty.")
+
+    async def run_one(query: str) -> QueryResponse:
+        # Each gather task runs in its own copy of the context, so timings stay per query.
+        query_start = time.perf_counter()
+        with collect_timings() as timings, llm_priority("batch"):
+            result = await workflow.aprocess_query(query, columnar=True)
+            result = await prepare_panels(result, panel_builder, pager, request.include_data)
+        if request.include_timings:
+            result["timings"] = dict(timings, total=round((time.perf_counter() - query_start) * 1000, 3))
+        return QueryResponse(**result)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(run_one(query) for query in request.queries))
+    metrics.histogram("http_request_duration_seconds", "Request latency excluding network I/O.",
+                      ["endpoint", "format"]).observe(time.perf_counter() - start, endpoint="/query/batch", format="json")
+    return BatchQueryResponse(results=results)
+
+def format_sse(event: str, payload: Dict[str, Any]) -> str:
+    """Formats one Server-Sent Events message; Arrow chunks are embedded as base64 IPC."""
+    if "table" in payload:
+        payload = dict(payload)
+        payload["arrow"] = to_arrow_base64(payload.pop("table"))
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(payload))}\n\n"
+
+@app.post("/query/stream")
+@inject
+async def handle_query_stream(
+    request: QueryRequest,
+    workflow: IAgentWorkflow = Depends(Provide[Container.workflow]),
+    pager: ResultPager = Depends(Provide[Container.result_pager]),
+    panel_builder: PanelDataBuilder = Depends(Provide[Container.panel_data]),
+):
+    """Streams workflow progress as Server-Sent Events: sql, dashboard, panels, done.
+
+    Data chunks are only sent when `include_data` is set; otherwise the rows stay on the server
+    and the "panels" event carries each panel's reduced data. With data_format "arrow", data
+    chunks and panel data are base64 Arrow IPC under "arrow".
+    """
     if not request.query:
         raise HTTPException(status_code=400, detail="Query cannot be empty.")
 
-    result = workflow.process_query(request.query)
+    async def events():
+        start = time.perf_counter()
+        with collect_timings() as timings:
+            async for event, payload in workflow.astream_query(request.query, columnar=True):
+                if event == "data" and not request.include_data:
+                    continue
+                if event == "data" and request.data_format == "json":
+                    payload = dict(payload)
+                    payload["rows"] = payload.pop("table").to_pylist()
+                if event == "done":
+                    # The final state has the whole result, whichever node produced the rows.
+                    result = await prepare_panels(dict(payload), panel_builder, pager, request.include_data,
+                                                  panel_format=request.data_format)
+                    if result["panels"] is not None:
+                        yield format_sse("panels", {"panels": result["panels"]})
+                    payload = {k: v for k, v in result.items() if k not in ("data", "table", "panels")}
+                    if request.include_timings:
+                        payload["timings"] = dict(timings, total=round((time.perf_counter() - start) * 1000, 3))
+                yield format_sse(event, payload)
 
-    if result.get("error"):
-        # We don't want to throw an HTTP 500 for a bad query, just return the error gracefully in JSON.
-        pass
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.get("/query/{query_id}/page", response_model=PageResponse)
+@inject
+def handle_query_page(
+    query_id: str,
+    cursor: Optional[str] = None,
+    page_size: int = Query(1000, ge=1, le=10000),
+    pager: ResultPager = Depends(Provide[Container.result_pager]),
+):
+    """Returns the next page of a truncated result; pass the previous page's next_cursor."""
+    try:
+        rows, next_cursor = pager.page(query_id, cursor, page_size)
+    except ResultExpiredError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return PageResponse(query_id=query_id, cursor=cursor, next_cursor=next_cursor, data=rows)
+
+@app.get("/query/{query_id}/panels", response_model=PanelsResponse)
+@inject
+async def handle_query_panels(
+    query_id: str,
+    data_format: Literal["json", "arrow"] = "json",
+    pager: ResultPager = Depends(Provide[Container.result_pager]),
+    panel_builder: PanelDataBuilder = Depends(Provide[Container.panel_data]),
+):
+    """Rebuilds the panel data of an earlier result, so clients can keep results by reference.
 
-    return QueryResponse(**result)
+    With data_format "arrow", each panel's data is base64 Arrow IPC under "arrow".
+    """
+    try:
+        sql_query, dashboard_config = pager.describe(query_id)
+    except ResultExpiredError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    panels = await run_blocking(panel_builder.rebuild, dashboard_config, sql_query, data_format == "arrow")
+    if data_format == "arrow":
+        panels = encode_panels(panels)
+    return PanelsResponse(query_id=query_id, dashboard_config=dashboard_config, panels=panels)
+
+@app.post("/ingest", response_model=IngestResponse, status_code=202)
+@inject
+def handle_ingest(
+    request: IngestRequest,
+    enabled: bool = Depends(Provide[Container.config.ingest_enabled]),
+    worker: IngestionWorker = Depends(Provide[Container.ingest_worker]),
+):
+    """Queues trades and risk snapshots for the next micro-batch write.
+
+    Rows become visible to queries once their batch commits (within INGEST_MAX_DELAY); the
+    rollup is updated in the same transaction. Answers 503 while the backlog is full.
+    """
+    if not enabled:
+        raise HTTPException(status_code=403, detail="Ingestion is disabled; set INGEST_ENABLED=true.")
+    trades = [trade.model_dump() for trade in request.trades]
+    risk_metrics = [risk.model_dump() for risk in request.risk_metrics]
+    try:
+        pending = worker.submit(trades, risk_metrics)
+    except IngestBacklogFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    return IngestResponse(accepted_trades=len(trades), accepted_risk_metrics=len(risk_metrics), pending=pending)
+
+@app.get("/ready")
+@inject
+def handle_ready(warmup: Warmup = Depends(Provide[Container.warmup])):
+    """Readiness probe: 200 once the warm-up has finished, 503 (with its progress) until then."""
+    status = dict(warmup.status(), import_seconds=IMPORT_SECONDS)
+    return JSONResponse(status, status_code=200 if warmup.ready else 503)
+
+@app.get("/metrics")
+@inject
+def handle_metrics(metrics: MetricsRegistry = Depends(Provide[Container.metrics])):
+    """Exposes latency histograms, token, row and error counters in Prometheus text format."""
+    return Response(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.get("/stats")
+@inject
+def handle_stats(
+    workflow: IAgentWorkflow = Depends(Provide[Container.workflow]),
+    db: IDatabase = Depends(Provide[Container.db]),
+    pager: ResultPager = Depends(Provide[Container.result_pager]),
+):
+    """Returns cache, coalescing and connection pool statistics of the worker process that answers."""
+    stats = {"pid": os.getpid(), "result_pager": pager.stats()}
+    stats.update(workflow.stats())
+    # Each database decorator adds its section to the statistics of the backend it wraps.
+    stats.update(db.stats())
+    if container.config.ingest_enabled():
+        stats["ingestion"] = container.ingest_worker().stats()
+    return stats
+
+# Optional stand-in feed: a JSON-lines file followed by the ingestion worker.
+_feed_tail: Optional[JsonlTailSource] = None
+
+@app.on_event("startup")
+def start_ingestion():
+    global _feed_tail
+    tail_path = container.config.ingest_tail_path()
+    if container.config.ingest_enabled() and tail_path:
+        tail = JsonlTailSource(tail_path, container.ingest_worker())
+        # With several API workers, only the first to lock the feed follows it.
+        if tail.start():
+            _feed_tail = tail
+
+@app.on_event("shutdown")
+def stop_ingestion():
+    if _feed_tail is not None:
+        _feed_tail.stop()
+    if container.config.ingest_enabled():
+        # Writes whatever is still buffered before the process exits.
+        container.ingest_worker().stop()
+        container.ingestor().close()
+
+def prime_database(hot_tables: List[str]) -> Any:
+    """Builds the database chain (a DuckDB import happens here), opens its pool and reads the hot tables."""
+    return container.db().prewarm(hot_tables)
+
+def prime_schema() -> Dict[str, Any]:
+    catalog = container.db().get_schema_catalog()
+    if catalog.error:
+        raise RuntimeError(catalog.error)
+    return {"tables": len(catalog.tables), "fingerprint": catalog.fingerprint()}
+
+def build_workflow():
+    """Imports langchain/langgraph, compiles the graph and creates the LLM clients."""
+    container.workflow()
+    container.panel_data()
+
+def ping_llm() -> Dict[str, Any]:
+    latencies = container.llm_gateway().warm_up()
+    if all(isinstance(latency, str) for latency in latencies.values()):
+        raise RuntimeError(f"No LLM backend answered: {latencies}")
+    return latencies
+
+@app.on_event("startup")
+def start_warmup():
+    warmup = container.warmup()
+    hot_tables = [table.strip() for table in container.config.warmup_tables().split(",") if table.strip()]
+    warmup.add_step("database", lambda: prime_database(hot_tables))
+    warmup.add_step("schema", prime_schema)
+    warmup.add_step("workflow", build_workflow)
+    if container.config.warmup_llm():
+        # Loads the model on Ollama; the API still serves (slowly) if no backend is up yet.
+        warmup.add_step("llm", ping_llm, required=False)
+    warmup.start()
+
+# Wire after the endpoints are defined so their Provide markers get injected.
+app.container.wire(modules=[__name__])
+
+IMPORT_SECONDS = round(time.perf_counter() - _import_started, 3)
 
 def start():
-    """Starts the FastAPI server."""
-    uvicorn.run("src.api.app:app", host="0.0.0.0", port=8000, reload=True)
+    """Starts the FastAPI server.
+
+    API_WORKERS > 1 is the production mode: that many worker processes without auto-reload,
+    sharing a cache file next to the database unless SHARED_CACHE_URL says otherwise. One
+    worker (the default) runs with auto-reload for development.
+    """
+    workers = int(os.environ.get("API_WORKERS", "1"))
+    if workers > 1:
+        # Set before the workers are spawned, so each of them inherits the same store.
+        os.environ.setdefault("SHARED_CACHE_URL", f"sqlite:///{os.environ.get('DB_PATH', 'risk.db')}.cache")
+    uvicorn.run("src.api.app:app", host=os.environ.get("API_HOST", "0.0.0.0"), port=int(os.environ.get("API_PORT", "8000")),
+                workers=workers, reload=workers == 1)
 
 if __name__ == "__main__":
     start()
@@ -0,0 +1,47 @@
+import base64
+import io
+import json
+from typing import Any, Dict, Optional
+
+import pyarrow as pa
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+# Schema metadata key carrying the non-tabular part of the response (SQL, dashboard config, error).
+METADATA_KEY = b"agentic_risk"
+
+def negotiate_format(accept: Optional[str]) -> str:
+    """Picks "arrow", "parquet" or "json" (default) from an Accept header."""
+    accept = (accept or "").lower()
+    if ARROW_STREAM_MEDIA_TYPE in accept or "application/vnd.apache.arrow.file" in accept:
+        return "arrow"
+    if PARQUET_MEDIA_TYPE in accept or "application/x-parquet" in accept:
+        return "parquet"
+    return "json"
+
+def _with_metadata(table: Optional[pa.Table], metadata: Dict[str, Any]) -> pa.Table:
+    table = table if table is not None else pa.table({})
+    encoded = json.dumps(metadata, default=str).encode("utf-8")
+    return table.replace_schema_metadata({**(table.schema.metadata or {}), METADATA_KEY: encoded})
+
+def to_arrow_ipc(table: Optional[pa.Table], metadata: Optional[Dict[str, Any]] = None) -> bytes:
+    """Serializes a table (plus response metadata) to the Arrow IPC streaming format."""
+    table = _with_metadata(table, metadata or {})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def to_parquet(table: Optional[pa.Table], metadata: Optional[Dict[str, Any]] = None) -> bytes:
+    """Serializes a table (plus response metadata) to Parquet."""
+    # Imported on first use: few clients ask for Parquet and the module is slow to load.
+    import pyarrow.parquet as pq
+
+    table = _with_metadata(table, metadata or {})
+    sink = io.BytesIO()
+    pq.write_table(table, sink)
+    return sink.getvalue()
+
+def to_arrow_base64(table: pa.Table) -> str:
+    """Arrow IPC bytes as base64 text, for embedding record batches in SSE/JSON payloads."""
+    return base64.b64encode(to_arrow_ipc(table)).decode("ascii")
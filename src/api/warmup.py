@@ -0,0 +1,105 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from src.core.metrics import MetricsRegistry
+
+WARMUP_MODES = ("background", "blocking", "off")
+
+class _Step:
+    def __init__(self, name: str, fn: Callable[[], Any], required: bool):
+        self.name = name
+        self.fn = fn
+        self.required = required
+        self.state = "pending"
+        self.seconds: Optional[float] = None
+        self.detail: Any = None
+        self.error: Optional[str] = None
+
+    def status(self) -> Dict[str, Any]:
+        status = {"state": self.state, "required": self.required, "seconds": self.seconds}
+        if self.detail is not None:
+            status["detail"] = self.detail
+        if self.error is not None:
+            status["error"] = self.error
+        return status
+
+class Warmup:
+    """Runs the startup warm-up steps once, in order, and tracks readiness for /ready.
+
+    The process is ready once every required step has succeeded; a failed optional step
+    (e.g. the LLM ping) is reported but does not hold readiness back. With mode "off" the
+    steps are skipped and the process is ready right away, paying the costs on first use.
+    """
+
+    def __init__(self, metrics: Optional[MetricsRegistry] = None, mode: Optional[str] = "background"):
+        self.mode = mode or "background"
+        if self.mode not in WARMUP_MODES:
+            raise ValueError(f"Unknown warm-up mode: {self.mode}")
+        self._steps: List[_Step] = []
+        self._lock = threading.Lock()
+        self._state = "pending"
+        self._seconds: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+
+        metrics = metrics or MetricsRegistry()
+        self._step_duration = metrics.histogram("warmup_step_duration_seconds", "Duration of each warm-up step.", ["step"])
+        self._ready = metrics.gauge("api_ready", "1 once the warm-up finished and the process serves traffic.")
+        self._ready.set(0)
+
+    def add_step(self, name: str, fn: Callable[[], Any], required: bool = True):
+        """Registers a step; whatever `fn` returns is shown as the step's detail."""
+        self._steps.append(_Step(name, fn, required))
+
+    def run(self):
+        with self._lock:
+            if self._state != "pending":
+                return
+            self._state = "running"
+        start = time.perf_counter()
+        failed = False
+        if self.mode != "off":
+            for step in self._steps:
+                failed = self._run_step(step) or failed
+        with self._lock:
+            self._seconds = round(time.perf_counter() - start, 3)
+            self._state = "failed" if failed else "ready"
+        if not failed:
+            self._ready.set(1)
+
+    def _run_step(self, step: _Step) -> bool:
+        """Runs one step; returns True if a required step failed."""
+        step.state = "running"
+        start = time.perf_counter()
+        try:
+            step.detail = step.fn()
+            step.state = "done"
+        except Exception as e:
+            step.error = f"{type(e).__name__}: {e}"
+            step.state = "failed"
+        elapsed = time.perf_counter() - start
+        step.seconds = round(elapsed, 3)
+        self._step_duration.observe(elapsed, step=step.name)
+        return step.state == "failed" and step.required
+
+    def start(self):
+        """Runs the steps per the mode: on a background thread, or right here for "blocking" and "off"."""
+        if self.mode != "background":
+            self.run()
+        elif self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="warmup", daemon=True)
+            self._thread.start()
+
+    @property
+    def ready(self) -> bool:
+        return self._state == "ready"
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "ready": self._state == "ready",
+                "state": self._state,
+                "mode": self.mode,
+                "seconds": self._seconds,
+                "steps": {step.name: step.status() for step in self._steps},
+            }
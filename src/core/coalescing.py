@@ -0,0 +1,95 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from src.core.metrics import MetricsRegistry
+
+class _FlightStats:
+    def __init__(self, layer: str, metrics: Optional[MetricsRegistry]):
+        self.layer = layer
+        self.executions = 0
+        self.coalesced = 0
+        self._counter = metrics.counter(
+            "coalesced_requests_total", "Calls served by an identical in-flight execution.", ["layer"]
+        ) if metrics is not None else None
+
+    def _record(self, leader: bool):
+        if leader:
+            self.executions += 1
+        else:
+            self.coalesced += 1
+            if self._counter is not None:
+                self._counter.inc(layer=self.layer)
+
+    def _stats(self, in_flight: int) -> Dict[str, Any]:
+        calls = self.executions + self.coalesced
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "coalesced_rate": round(self.coalesced / calls, 4) if calls else 0.0,
+            "in_flight": in_flight,
+        }
+
+class SingleFlight(_FlightStats):
+    """Thread-safe request coalescing: concurrent calls with the same key share one execution.
+
+    The first caller runs the function; callers arriving while it runs block on its result
+    (or exception). Nothing is kept once the execution finishes, so this is not a cache.
+    """
+
+    def __init__(self, layer: str, metrics: Optional[MetricsRegistry] = None):
+        super().__init__(layer, metrics)
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            self._record(leader)
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return self._stats(len(self._inflight))
+
+class AsyncSingleFlight(_FlightStats):
+    """Request coalescing for coroutines on one event loop.
+
+    The first caller's coroutine runs as a task that every caller with the same key awaits.
+    The task is shielded, so a waiter that is cancelled (e.g. a disconnected client) does not
+    cancel the execution the others are waiting on.
+    """
+
+    def __init__(self, layer: str, metrics: Optional[MetricsRegistry] = None):
+        super().__init__(layer, metrics)
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        leader = task is None
+        if leader:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        self._record(leader)
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        return self._stats(len(self._inflight))
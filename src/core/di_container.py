@@ -1,23 +1,185 @@
 from dependency_injector import containers, providers
 from src.core.interfaces import IDatabase, IAgentWorkflow
+from src.core.metrics import MetricsRegistry
+from src.core.shared_cache import create_shared_cache
 from src.data.sqlite_db import SQLiteDatabase
-from src.agents.workflow import LangGraphWorkflow
+from src.data.result_cache import CachedDatabase
+from src.data.instrumented_db import InstrumentedDatabase
+from src.data.coalescing_db import CoalescingDatabase
+from src.data.result_pager import ResultPager
+from src.data.panel_data import PanelDataBuilder
+from src.data.ingestion import RiskIngestor, IngestionWorker
+from src.api.warmup import Warmup
+from src.agents.sql_cache import SemanticSQLCache
+from src.agents.sql_guard import SQLGuard
+from src.agents.dashboard_planner import HeuristicDashboardPlanner
+
+# The heavy stacks (duckdb + pandas, langchain + langgraph + the OpenAI client) are imported
+# when their provider is first called, not when the container module is, so the API process
+# starts fast and the warm-up decides when to pay for them. Providers are thread-safe
+# singletons because the warm-up builds them on its own thread while requests may arrive.
+
+def _duckdb_database(**kwargs) -> IDatabase:
+    from src.data.duckdb_db import DuckDBDatabase
+    return DuckDBDatabase(**kwargs)
+
+def _llm_gateway(**kwargs):
+    from src.agents.llm_gateway import LLMGateway
+    return LLMGateway(**kwargs)
+
+def _workflow(**kwargs) -> IAgentWorkflow:
+    from src.agents.workflow import LangGraphWorkflow
+    return LangGraphWorkflow(**kwargs)
 
 class Container(containers.DeclarativeContainer):
     """Dependency injection container."""
 
     config = providers.Configuration()
 
-    # DB configuration
-    db = providers.Singleton(
-        SQLiteDatabase,
-        db_path=config.db_path
+    # Prometheus metrics shared by the API, workflow and database layers
+    metrics = providers.ThreadSafeSingleton(MetricsRegistry)
+
+    # Cache tier shared by all worker processes (SHARED_CACHE_URL; None = in-process caches only)
+    shared_cache = providers.ThreadSafeSingleton(
+        create_shared_cache,
+        url=config.shared_cache_url,
+        max_bytes=config.shared_cache_max_bytes,
+        ttl=config.shared_cache_ttl
+    )
+
+    # DB configuration (DB_BACKEND selects the implementation)
+    raw_db = providers.Selector(
+        config.db_backend,
+        sqlite=providers.ThreadSafeSingleton(
+            SQLiteDatabase,
+            db_path=config.db_path,
+            pool_size=config.db_pool_size,
+            query_timeout=config.query_timeout,
+            catalog_refresh=config.catalog_refresh
+        ),
+        duckdb=providers.ThreadSafeSingleton(
+            _duckdb_database,
+            db_path=config.db_path,
+            duckdb_path=config.duckdb_path,
+            mode=config.duckdb_mode,
+            query_timeout=config.query_timeout
+        ),
+    )
+
+    # Latency/rows/errors tracing directly on the backend
+    traced_db = providers.ThreadSafeSingleton(
+        InstrumentedDatabase,
+        db=raw_db,
+        metrics=metrics,
+        backend=config.db_backend
+    )
+
+    # Identical concurrent cache misses share one backend execution
+    coalescing_db = providers.ThreadSafeSingleton(
+        CoalescingDatabase,
+        db=traced_db,
+        metrics=metrics
+    )
+
+    # Result cache in front of the selected backend
+    db = providers.ThreadSafeSingleton(
+        CachedDatabase,
+        db=coalescing_db,
+        max_bytes=config.result_cache_max_bytes,
+        ttl=config.result_cache_ttl,
+        shared=shared_cache
+    )
+
+    # Cursor pagination over results larger than the inline row cap
+    result_pager = providers.ThreadSafeSingleton(
+        ResultPager,
+        db=db,
+        ttl=config.result_page_ttl,
+        idle_timeout=config.result_cursor_idle,
+        shared=shared_cache
+    )
+
+    # Server-side aggregation / downsampling of the data behind each dashboard panel
+    panel_data = providers.ThreadSafeSingleton(
+        PanelDataBuilder,
+        db=db,
+        max_points=config.panel_max_points,
+        scatter_points=config.panel_scatter_points,
+        table_rows=config.panel_table_rows,
+        line_method=config.panel_line_method,
+        max_source_rows=config.panel_source_max_rows
+    )
+
+    # Micro-batch writer for live trades and risk snapshots (the only writable connection)
+    ingestor = providers.ThreadSafeSingleton(
+        RiskIngestor,
+        db_path=config.db_path,
+        metrics=metrics
+    )
+
+    ingest_worker = providers.ThreadSafeSingleton(
+        IngestionWorker,
+        ingestor=ingestor,
+        batch_size=config.ingest_batch_size,
+        max_delay=config.ingest_max_delay,
+        max_pending=config.ingest_max_pending,
+        orphan_ttl=config.ingest_orphan_ttl,
+        dead_letter_path=config.ingest_dead_letter_path,
+        metrics=metrics
+    )
+
+    # NL-to-SQL cache checked before the text2sql LLM call
+    sql_cache = providers.ThreadSafeSingleton(
+        SemanticSQLCache,
+        similarity_threshold=config.sql_cache_threshold,
+        max_entries=config.sql_cache_max_entries,
+        shared=shared_cache
+    )
+
+    # Read-only and query-plan checks on generated SQL
+    sql_guard = providers.ThreadSafeSingleton(
+        SQLGuard,
+        db=db,
+        large_table_rows=config.sql_guard_large_table_rows,
+        max_sort_rows=config.sql_guard_max_sort_rows,
+        rewrite_limit=config.result_max_rows
+    )
+
+    # Rule-based dashboard planner used before (or instead of) the text2dashboard LLM call
+    dashboard_planner = providers.ThreadSafeSingleton(HeuristicDashboardPlanner)
+
+    # Pooled, capped and prioritized access to the LLM backend(s) (LLM_BASE_URL may list several)
+    llm_gateway = providers.ThreadSafeSingleton(
+        _llm_gateway,
+        base_urls=config.llm_base_url,
+        model_name=config.llm_model_name,
+        max_in_flight=config.llm_max_concurrency,
+        call_timeout=config.llm_call_timeout,
+        queue_timeout=config.llm_queue_timeout,
+        max_retries=config.llm_max_retries,
+        metrics=metrics
+    )
+
+    # Startup warm-up steps and the readiness they report on /ready
+    warmup = providers.ThreadSafeSingleton(
+        Warmup,
+        metrics=metrics,
+        mode=config.warmup_mode
     )
 
     # Workflow configuration
-    workflow = providers.Singleton(
-        LangGraphWorkflow,
+    workflow = providers.ThreadSafeSingleton(
+        _workflow,
         db=db,
         base_url=config.llm_base_url,
-        model_name=config.llm_model_name
+        model_name=config.llm_model_name,
+        sql_cache=sql_cache,
+        db_workers=config.db_executor_workers,
+        dashboard_planner=dashboard_planner,
+        dashboard_mode=config.dashboard_mode,
+        max_rows=config.result_max_rows,
+        sql_guard=sql_guard,
+        sql_repair_attempts=config.sql_repair_attempts,
+        metrics=metrics,
+        llm_gateway=llm_gateway
     )
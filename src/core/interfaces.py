@@ -1,19 +1,188 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+import pickle
+import pyarrow as pa
+
+from src.models.schema import SchemaCatalog
+
+# Arrow schema metadata key flagging a failed execute_arrow; its value is the error message.
+ARROW_ERROR_KEY = b"error"
+
+def arrow_error(message: str) -> pa.Table:
+    """An Arrow result that reports a backend error in its schema metadata, not in its columns."""
+    return pa.table({}).replace_schema_metadata({ARROW_ERROR_KEY: message.encode("utf-8")})
+
+def arrow_error_message(table: pa.Table) -> Optional[str]:
+    """The error an Arrow result reports, or None for a real result (whatever its columns are called)."""
+    message = (table.schema.metadata or {}).get(ARROW_ERROR_KEY)
+    return message.decode("utf-8") if message is not None else None
 
 class IDatabase(ABC):
     @abstractmethod
-    def execute_query(self, query: str) -> List[Dict[str, Any]]:
-        """Executes a SQL query and returns the results."""
+    def execute_query(self, query: str, max_rows: Optional[int] = None,
+                      timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Executes a SQL query and returns the results.
+
+        At most `max_rows` rows are fetched; a query running longer than `timeout` seconds is
+        interrupted and reported as an error. None falls back to the backend's defaults.
+        """
+        pass
+
+    def execute_arrow(self, query: str, max_rows: Optional[int] = None,
+                      timeout: Optional[float] = None) -> pa.Table:
+        """Executes a SQL query and returns the result as a columnar Arrow table.
+
+        Errors are reported out-of-band, by an empty table built with arrow_error: a query may
+        well return a single column named "error". Backends that can fetch column-wise should
+        override this.
+        """
+        rows = self.execute_query(query, max_rows=max_rows, timeout=timeout)
+        if rows and "error" in rows[0]:
+            return arrow_error(rows[0]["error"])
+        return pa.Table.from_pylist(rows)
+
+    def iter_query(self, query: str, batch_size: int = 1000, offset: int = 0,
+                   timeout: Optional[float] = None) -> Iterator[List[Dict[str, Any]]]:
+        """Yields the result in batches of `batch_size` rows, starting `offset` rows in.
+
+        Backends with a real cursor should override this to stream at constant memory, with
+        each batch (and the skip to `offset`) under its own time budget.
+        """
+        rows = self.execute_query(query, timeout=timeout)
+        if rows and "error" in rows[0]:
+            raise RuntimeError(rows[0]["error"])
+        for start in range(offset, len(rows), batch_size):
+            yield rows[start:start + batch_size]
+
+    def pin_query(self, query: str) -> Tuple[str, Optional[str]]:
+        """Returns (data version, pinned SQL) for reading `query`'s result again later.
+
+        The pinned SQL returns the result as of that data version even after later appends.
+        It is None when the backend cannot pin one; the result then expires with the version.
+        """
+        return self.get_data_version(), None
+
+    def preview_query(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Returns the first `limit` rows of a query, cheaply when the plan allows it."""
+        query = query.strip().rstrip(";")
+        # Newline before ")" so a trailing "--" comment cannot swallow it.
+        return self.execute_query(f"SELECT * FROM (\n{query}\n) AS preview LIMIT {int(limit)}")
+
+    def describe_query(self, query: str) -> List[Dict[str, Any]]:
+        """Returns the result's columns as rows with "name" and "type" (None when unknown), without computing it.
+
+        Errors come back as [{"error": ...}]. The default reads the schema of an empty Arrow result.
+        """
+        query = query.strip().rstrip(";")
+        table = self.execute_arrow(f"SELECT * FROM (\n{query}\n) AS described LIMIT 0")
+        error = arrow_error_message(table)
+        if error is not None:
+            return [{"error": error}]
+        return [{"name": field.name, "type": None if pa.types.is_null(field.type) else str(field.type)}
+                for field in table.schema]
+
+    def explain_query(self, query: str) -> List[Dict[str, Any]]:
+        """Returns the query plan as rows with "id", "parent" and "detail" (SQLite's EXPLAIN QUERY PLAN shape).
+
+        An empty list means the backend cannot explain; errors come back as [{"error": ...}].
+        """
+        return []
+
+    @abstractmethod
+    def get_schema_info(self, query: Optional[str] = None) -> str:
+        """Returns the database schema information, pruned to what is relevant to `query` if given."""
+        pass
+
+    @abstractmethod
+    def get_schema_catalog(self) -> SchemaCatalog:
+        """Returns the structured schema with row counts and column statistics."""
+        pass
+
+    @abstractmethod
+    def get_data_version(self) -> str:
+        """Returns a token that changes whenever the underlying data changes."""
+        pass
+
+    @abstractmethod
+    def get_database_id(self) -> str:
+        """Returns the backend name and the identity of the database it serves.
+
+        Data versions only count within one database, so anything keyed by a version in a
+        store other databases can reach (the shared cache) is keyed by this id as well.
+        """
+        pass
+
+    def get_schema_version(self) -> str:
+        """Returns a token that changes whenever the schema changes (the data version by default)."""
+        return self.get_data_version()
+
+    def prewarm(self, tables: Sequence[str] = ()) -> Any:
+        """Opens connections and reads `tables` once before real traffic; returns what it did (None = nothing)."""
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns operational statistics by component ("db_pool", "result_cache", ...).
+
+        Decorators add their own section to the statistics of the database they wrap.
+        """
+        return {}
+
+class ISharedCache(ABC):
+    """Key/value store shared by every API worker process (the subset of Redis commands we need).
+
+    Implementations must not raise on backend failures: a failed get is a miss, a failed set is dropped.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """Returns the value stored under `key`, or None if it is missing or expired."""
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        """Stores `value` under `key` for `ttl` seconds (None = the store's default)."""
         pass
 
     @abstractmethod
-    def get_schema_info(self) -> str:
-        """Returns the database schema information."""
+    def delete(self, key: str):
         pass
 
+    def get_object(self, key: str) -> Any:
+        """get() for values stored with set_object(). The store is trusted like the database itself."""
+        value = self.get(key)
+        if value is None:
+            return None
+        try:
+            return pickle.loads(value)
+        except Exception:
+            # Written by an incompatible version of the code; recomputing is always safe.
+            return None
+
+    def set_object(self, key: str, value: Any, ttl: Optional[float] = None):
+        self.set(key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
 class IAgentWorkflow(ABC):
     @abstractmethod
-    def process_query(self, user_query: str) -> Dict[str, Any]:
-        """Processes a natural language query and returns the dashboard configuration and data."""
+    def process_query(self, user_query: str, columnar: bool = False) -> Dict[str, Any]:
+        """Processes a natural language query and returns the dashboard configuration and data.
+
+        With `columnar=True` the result is returned as an Arrow table under "table" instead of "data".
+        """
         pass
+
+    @abstractmethod
+    async def aprocess_query(self, user_query: str, columnar: bool = False) -> Dict[str, Any]:
+        """Async variant of process_query for use on an event loop."""
+        pass
+
+    @abstractmethod
+    def astream_query(self, user_query: str, columnar: bool = False) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Yields (event, payload) pairs as each stage of the workflow completes."""
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns operational statistics by component (caches, queues, ...)."""
+        return {}
@@ -0,0 +1,233 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+from src.core.interfaces import ISharedCache
+
+try:
+    import redis
+except ImportError:  # only needed for redis:// URLs
+    redis = None
+
+# Prefix of every key this application writes, so the store can be shared with other users.
+KEY_PREFIX = "ard:"
+
+def make_key(namespace: str, database_id: str, *parts: Any) -> str:
+    """Fixed-length key for `parts` (SQL text, versions, ...) under a namespace like "result".
+
+    `database_id` (IDatabase.get_database_id()) keeps databases and backends sharing one
+    store apart; their data versions and SQL overlap.
+    """
+    digest = hashlib.sha256(repr((database_id,) + parts).encode("utf-8")).hexdigest()[:32]
+    return f"{KEY_PREFIX}{namespace}:{digest}"
+
+class _CacheCounters:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.errors = 0
+
+    def count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "sets": self.sets, "errors": self.errors,
+                    "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0}
+
+class SQLiteSharedCache(ISharedCache):
+    """Shared cache in a local SQLite file, for worker processes on one host.
+
+    WAL mode lets every process read while one writes. Entries expire after their TTL and
+    the file is kept under `max_bytes` by evicting the least recently read entries; reads
+    refresh an entry's recency at most once a minute, so hot lookups stay read-only.
+    """
+
+    # Seconds between recency updates of one entry, and sets between size checks.
+    TOUCH_INTERVAL = 60.0
+    PRUNE_EVERY = 64
+
+    def __init__(self, path: str, max_bytes: Optional[int] = 256 * 1024 * 1024, default_ttl: Optional[float] = 3600.0,
+                 max_entry_bytes: Optional[int] = 16 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes or 256 * 1024 * 1024
+        self.default_ttl = default_ttl or None
+        self.max_entry_bytes = max_entry_bytes or 16 * 1024 * 1024
+        self._local = threading.local()
+        self._sets_since_prune = 0
+        self._counters = _CacheCounters()
+        conn = self._connection()
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS cache (
+            key TEXT PRIMARY KEY,
+            value BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            expires_at REAL,
+            accessed_at REAL NOT NULL
+        )
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache(accessed_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread: reads from concurrent requests do not serialize on a lock.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("PRAGMA synchronous=OFF;")  # a lost write is only a cache miss
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            conn = self._connection()
+            row = conn.execute("SELECT value, expires_at, accessed_at FROM cache WHERE key = ?", (key,)).fetchone()
+            now = time.time()
+            if row is None or (row[1] is not None and row[1] <= now):
+                self._counters.count("misses")
+                return None
+            if now - row[2] > self.TOUCH_INTERVAL:
+                conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        except sqlite3.Error:
+            self._counters.count("errors")
+            return None
+        self._counters.count("hits")
+        return row[0]
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        if len(value) > self.max_entry_bytes:
+            return
+        ttl = ttl or self.default_ttl
+        now = time.time()
+        try:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now + ttl if ttl else None, now))
+        except sqlite3.Error:
+            self._counters.count("errors")
+            return
+        self._counters.count("sets")
+        self._sets_since_prune += 1
+        if self._sets_since_prune >= self.PRUNE_EVERY:
+            self._sets_since_prune = 0
+            self.prune()
+
+    def delete(self, key: str):
+        try:
+            self._connection().execute("DELETE FROM cache WHERE key = ?", (key,))
+        except sqlite3.Error:
+            self._counters.count("errors")
+
+    def prune(self):
+        """Drops expired entries, then the least recently read ones until the file fits in max_bytes."""
+        try:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+                if total > self.max_bytes:
+                    # Evict down to 90% so the next few sets do not prune again.
+                    excess = total - int(self.max_bytes * 0.9)
+                    conn.execute('''
+                        DELETE FROM cache WHERE key IN (
+                            SELECT key FROM (
+                                SELECT key, size, SUM(size) OVER (ORDER BY accessed_at, key) AS freed FROM cache
+                            ) WHERE freed - size < ?
+                        )
+                    ''', (excess,))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error:
+            self._counters.count("errors")
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {"backend": "sqlite", "path": self.path, "max_bytes": self.max_bytes}
+        try:
+            entries, size = self._connection().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+            stats.update(entries=entries, bytes=size)
+        except sqlite3.Error:
+            pass
+        stats.update(self._counters.stats())
+        return stats
+
+class RedisSharedCache(ISharedCache):
+    """Shared cache on any Redis-compatible server (Redis, Valkey, KeyDB, ...), for workers on several hosts.
+
+    Eviction is left to the server's maxmemory policy (allkeys-lru recommended); every entry
+    also gets the default TTL so stale data versions age out.
+    """
+
+    def __init__(self, url: str, default_ttl: Optional[float] = 3600.0,
+                 max_entry_bytes: Optional[int] = 16 * 1024 * 1024, socket_timeout: float = 0.5):
+        if redis is None:
+            raise ImportError("redis:// shared caches need the redis package (pip install redis).")
+        self.url = url
+        self.default_ttl = default_ttl or None
+        self.max_entry_bytes = max_entry_bytes or 16 * 1024 * 1024
+        # A short timeout: a slow cache must not be slower than recomputing.
+        self.client = redis.Redis.from_url(url, socket_timeout=socket_timeout, socket_connect_timeout=socket_timeout)
+        self._counters = _CacheCounters()
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            value = self.client.get(key)
+        except redis.RedisError:
+            self._counters.count("errors")
+            return None
+        self._counters.count("hits" if value is not None else "misses")
+        return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        if len(value) > self.max_entry_bytes:
+            return
+        ttl = ttl or self.default_ttl
+        try:
+            self.client.set(key, value, px=int(ttl * 1000) if ttl else None)
+        except redis.RedisError:
+            self._counters.count("errors")
+            return
+        self._counters.count("sets")
+
+    def delete(self, key: str):
+        try:
+            self.client.delete(key)
+        except redis.RedisError:
+            self._counters.count("errors")
+
+    def stats(self) -> Dict[str, Any]:
+        # Host only: the URL may carry a password.
+        stats = {"backend": "redis", "host": urlparse(self.url).hostname}
+        stats.update(self._counters.stats())
+        return stats
+
+def create_shared_cache(url: Optional[str], max_bytes: Optional[int] = None, ttl: Optional[float] = None,
+                        max_entry_bytes: Optional[int] = None) -> Optional[ISharedCache]:
+    """Builds the shared cache for SHARED_CACHE_URL; an empty URL means in-process caches only.
+
+    - sqlite:///relative/path.db or sqlite:////absolute/path.db
+    - redis://[:password@]host:port/db (or rediss:// for TLS)
+    """
+    if not url:
+        return None
+    scheme = urlparse(url).scheme
+    if scheme == "sqlite":
+        path = url[len("sqlite:///"):]
+        if not path:
+            raise ValueError(f"Shared cache URL has no file path: {url}")
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        return SQLiteSharedCache(path, max_bytes=max_bytes, default_ttl=ttl, max_entry_bytes=max_entry_bytes)
+    if scheme in ("redis", "rediss"):
+        return RedisSharedCache(url, default_ttl=ttl, max_entry_bytes=max_entry_bytes)
+    raise ValueError(f"Unsupported shared cache URL: {url}")
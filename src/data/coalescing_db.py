@@ -0,0 +1,74 @@
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pyarrow as pa
+
+from src.core.coalescing import SingleFlight
+from src.core.interfaces import IDatabase
+from src.core.metrics import MetricsRegistry
+from src.data.result_cache import normalize_sql
+from src.models.schema import SchemaCatalog
+
+class CoalescingDatabase(IDatabase):
+    """IDatabase decorator that runs identical in-flight queries once and fans the result out.
+
+    Sits below the result cache: concurrent cache misses for the same normalized SQL (and
+    data version) share a single backend execution instead of each scanning the tables.
+    """
+
+    def __init__(self, db: IDatabase, metrics: Optional[MetricsRegistry] = None):
+        self.db = db
+        self.flight = SingleFlight("sql", metrics)
+
+    def _key(self, operation: str, query: str, max_rows: Optional[int], timeout: Optional[float]) -> tuple:
+        return operation, self.db.get_data_version(), normalize_sql(query), max_rows, timeout
+
+    def execute_query(self, query: str, max_rows: Optional[int] = None,
+                      timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        rows = self.flight.do(self._key("execute_query", query, max_rows, timeout),
+                              lambda: self.db.execute_query(query, max_rows=max_rows, timeout=timeout))
+        # Every waiter gets its own list; the row dicts are shared read-only, as in the result cache.
+        return list(rows)
+
+    def execute_arrow(self, query: str, max_rows: Optional[int] = None,
+                      timeout: Optional[float] = None) -> pa.Table:
+        return self.flight.do(self._key("execute_arrow", query, max_rows, timeout),
+                              lambda: self.db.execute_arrow(query, max_rows=max_rows, timeout=timeout))
+
+    def iter_query(self, query: str, batch_size: int = 1000, offset: int = 0,
+                   timeout: Optional[float] = None) -> Iterator[List[Dict[str, Any]]]:
+        # Each pager holds its own cursor position, so pages are never shared.
+        return self.db.iter_query(query, batch_size=batch_size, offset=offset, timeout=timeout)
+
+    def describe_query(self, query: str) -> List[Dict[str, Any]]:
+        return self.db.describe_query(query)
+
+    def explain_query(self, query: str) -> List[Dict[str, Any]]:
+        return self.db.explain_query(query)
+
+    def get_schema_info(self, query: Optional[str] = None) -> str:
+        return self.db.get_schema_info(query)
+
+    def get_schema_catalog(self) -> SchemaCatalog:
+        return self.db.get_schema_catalog()
+
+    def get_data_version(self) -> str:
+        return self.db.get_data_version()
+
+    def get_database_id(self) -> str:
+        return self.db.get_database_id()
+
+    def get_schema_version(self) -> str:
+        return self.db.get_schema_version()
+
+    def pin_query(self, query: str) -> Tuple[str, Optional[str]]:
+        return self.db.pin_query(query)
+
+    def coalescing_stats(self) -> Dict[str, Any]:
+        """Returns how many executions were shared between identical concurrent queries."""
+        return self.flight.stats()
+
+    def prewarm(self, tables: Sequence[str] = ()) -> Any:
+        return self.db.prewarm(tables)
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self.db.stats(), sql_coalescing=self.coalescing_stats())
@@ -0,0 +1,167 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional
+
+# Read-side tuning applied to every pooled connection.
+READ_PRAGMAS = {
+    "mmap_size": 268435456,  # 256 MiB memory-mapped I/O
+    "cache_size": -65536,    # 64 MiB page cache (negative value = KiB)
+    "temp_store": "MEMORY",
+    "query_only": "ON",
+}
+
+class SQLiteConnectionPool:
+    """Thread-safe pool of read-only SQLite connections.
+
+    Connections are opened as read-only URIs and handed out one per thread: a thread
+    that already holds a connection gets the same one back on nested acquires, so a
+    request that runs several statements keeps a warm page cache.
+    """
+
+    def __init__(self, db_path: str, size: int = 8, timeout: float = 30.0):
+        self.db_path = db_path
+        self.size = max(1, int(size))
+        self.timeout = timeout
+
+        self._idle: List[sqlite3.Connection] = []
+        self._created = 0
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._wal_checked = False
+
+        # Counters
+        self._hits = 0
+        self._misses = 0
+        self._waits = 0
+        self._wait_time = 0.0
+
+    def _uri(self) -> str:
+        return f"file:{self.db_path}?mode=ro"
+
+    def _ensure_wal(self):
+        """Switches the database to WAL so readers never block the writer (needs a writable handle)."""
+        if self._wal_checked or not os.path.exists(self.db_path):
+            return
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL;")
+            finally:
+                conn.close()
+            self._wal_checked = True
+        except sqlite3.Error:
+            # Read-only media or locked file: the pool still works in rollback-journal mode.
+            pass
+
+    def _open(self) -> sqlite3.Connection:
+        self._ensure_wal()
+        conn = sqlite3.connect(self._uri(), uri=True, check_same_thread=False)
+        for name, value in READ_PRAGMAS.items():
+            conn.execute(f"PRAGMA {name}={value};")
+        return conn
+
+    def _checkout(self) -> sqlite3.Connection:
+        with self._cond:
+            if self._idle:
+                self._hits += 1
+                return self._idle.pop()
+
+            if self._created < self.size:
+                self._created += 1
+                self._misses += 1
+                create = True
+            else:
+                create = False
+                self._waits += 1
+                start = time.perf_counter()
+                deadline = start + self.timeout
+                while not self._idle:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        self._wait_time += time.perf_counter() - start
+                        raise sqlite3.OperationalError("Timed out waiting for a pooled connection.")
+                    self._cond.wait(remaining)
+                self._wait_time += time.perf_counter() - start
+                self._hits += 1
+                return self._idle.pop()
+
+        if create:
+            try:
+                return self._open()
+            except sqlite3.Error:
+                with self._cond:
+                    self._created -= 1
+                    self._cond.notify()
+                raise
+
+    def _checkin(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            conn.rollback()
+        conn.row_factory = None
+        with self._cond:
+            self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Leases a connection for the current thread; nested leases reuse the same one."""
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            self._local.depth += 1
+            try:
+                yield held
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self._checkout()
+        self._local.conn = conn
+        self._local.depth = 1
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self._local.depth = 0
+            self._checkin(conn)
+
+    def prewarm(self, count: Optional[int] = None) -> int:
+        """Opens idle connections up to `count` (default: the pool size); returns how many were opened."""
+        count = min(self.size, count or self.size)
+        opened = 0
+        while True:
+            with self._cond:
+                if self._created >= count:
+                    return opened
+                self._created += 1
+            try:
+                conn = self._open()
+            except sqlite3.Error:
+                with self._cond:
+                    self._created -= 1
+                    self._cond.notify()
+                raise
+            self._checkin(conn)
+            opened += 1
+
+    def close(self):
+        """Closes all idle connections."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+        for conn in idle:
+            conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "size": self.size,
+                "open": self._created,
+                "idle": len(self._idle),
+                "hits": self._hits,
+                "misses": self._misses,
+                "waits": self._waits,
+                "wait_time_seconds": round(self._wait_time, 6),
+            }
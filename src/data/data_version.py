@@ -0,0 +1,79 @@
+import os
+import sqlite3
+import secrets
+from typing import Any, Optional
+
+# Internal bookkeeping table; names starting with "_" are hidden from the agent's schema.
+META_TABLE = "_meta"
+
+def ensure_meta_table(cursor: sqlite3.Cursor):
+    cursor.execute(f'''
+    CREATE TABLE IF NOT EXISTS {META_TABLE} (
+        key TEXT PRIMARY KEY,
+        value INTEGER
+    )
+    ''')
+
+def bump_data_version(cursor: sqlite3.Cursor) -> int:
+    """Increments the data generation counter. Call inside the transaction that changes the data."""
+    ensure_meta_table(cursor)
+    cursor.execute(f'''
+        INSERT INTO {META_TABLE} (key, value) VALUES ('data_version', 1)
+        ON CONFLICT(key) DO UPDATE SET value = value + 1
+    ''')
+    cursor.execute(f"SELECT value FROM {META_TABLE} WHERE key = 'data_version'")
+    return cursor.fetchone()[0]
+
+def read_meta(cursor: sqlite3.Cursor, key: str) -> Optional[Any]:
+    """Returns a bookkeeping value, or None if it (or the table) does not exist."""
+    try:
+        cursor.execute(f"SELECT value FROM {META_TABLE} WHERE key = ?", (key,))
+    except sqlite3.OperationalError:
+        return None
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+def write_meta(cursor: sqlite3.Cursor, key: str, value: Any):
+    """Stores a bookkeeping value. Call inside the transaction it has to commit with."""
+    ensure_meta_table(cursor)
+    cursor.execute(f'''
+        INSERT INTO {META_TABLE} (key, value) VALUES (?, ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+    ''', (key, value))
+
+def ensure_database_id(cursor: sqlite3.Cursor, renew: bool = False) -> str:
+    """Returns the database's identity (a random 63-bit integer in _meta), creating it if missing.
+
+    `renew` issues a new one: a full reload is a different data set, even in the same file.
+    The id is an integer because _meta.value is declared INTEGER, which DuckDB enforces when it
+    imports or attaches the file. Call inside a write transaction.
+    """
+    current = None if renew else read_meta(cursor, "database_id")
+    if not isinstance(current, int):
+        # Also replaces the text ids written before they were integers.
+        current = secrets.randbits(63)
+        write_meta(cursor, "database_id", current)
+    return str(current)
+
+def read_data_version(cursor: sqlite3.Cursor) -> Optional[int]:
+    """Returns the data generation counter, or None if the database has never been versioned."""
+    return read_meta(cursor, "data_version")
+
+def file_identity(db_path: str) -> str:
+    """Fallback identity for databases without a stored id: the file's path and inode."""
+    try:
+        inode = os.stat(db_path).st_ino
+    except OSError:
+        inode = "-"
+    return f"file:{os.path.realpath(db_path)}:{inode}"
+
+def file_version_token(db_path: str) -> str:
+    """Fallback version token for unversioned databases, built from the db and WAL file stamps."""
+    stamps = []
+    for path in (db_path, f"{db_path}-wal"):
+        try:
+            stat = os.stat(path)
+            stamps.append(f"{stat.st_mtime_ns}:{stat.st_size}")
+        except OSError:
+            stamps.append("-")
+    return "file:" + "/".join(stamps)
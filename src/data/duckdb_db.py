@@ -0,0 +1,276 @@
+from src.core.interfaces import IDatabase, arrow_error
+from src.data.data_version import read_data_version, read_meta, file_identity, file_version_token
+from src.data.schema_catalog import build_schema_catalog
+from src.data.schema_manager import TABLE_DESCRIPTIONS
+from src.data.sql_text import has_order_by
+from src.models.schema import SchemaCatalog
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterator, Optional, Sequence, Tuple
+import sqlite3
+import threading
+import duckdb
+import pandas as pd
+import pyarrow as pa
+
+# Declared SQLite column types -> DuckDB types used when importing tables.
+SQLITE_TYPE_MAP = {
+    "TEXT": "VARCHAR",
+    "REAL": "DOUBLE",
+    "INTEGER": "BIGINT",
+    "DATE": "DATE",
+}
+
+class DuckDBDatabase(IDatabase):
+    """Columnar DuckDB backend over the SQLite risk store.
+
+    Two modes are supported:
+      - "import": copies the SQLite tables into DuckDB's native columnar storage (fast aggregations),
+        and copies them again once the SQLite data version moves past the imported one.
+      - "attach": queries the SQLite file in place through DuckDB's sqlite extension (always fresh).
+    """
+
+    def __init__(self, db_path: str, duckdb_path: Optional[str] = ":memory:", mode: Optional[str] = "import",
+                 import_batch_size: int = 100_000, query_timeout: Optional[float] = None):
+        self.db_path = db_path
+        # Default wall-clock budget per statement (None = unbounded)
+        self.query_timeout = query_timeout or None
+        self.duckdb_path = duckdb_path or ":memory:"
+        self.mode = mode or "import"
+        self.import_batch_size = import_batch_size
+        if self.mode not in ("import", "attach"):
+            raise ValueError(f"Unknown DuckDB mode: {self.mode}")
+
+        self.conn = duckdb.connect(self.duckdb_path)
+        self._local = threading.local()
+        # Per-thread read-only SQLite connections that watch the source's data version.
+        self._source = threading.local()
+        self._lock = threading.Lock()
+        self._imported_version: Optional[str] = None
+        self._imported_id: Optional[str] = None
+        self._catalog: Optional[SchemaCatalog] = None
+        self._catalog_version: Optional[str] = None
+        self._imports = 0
+
+        if self.mode == "attach":
+            self._attach()
+        else:
+            self.refresh()
+
+    def _attach(self):
+        self.conn.execute("INSTALL sqlite; LOAD sqlite;")
+        self.conn.execute(f"ATTACH '{self.db_path}' AS risk (TYPE SQLITE, READ_ONLY);")
+        self.conn.execute("USE risk;")
+
+    def _sqlite_tables(self, conn: sqlite3.Connection) -> List[str]:
+        rows = conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite\\_%' ESCAPE '\\';").fetchall()
+        return [row[0] for row in rows]
+
+    def refresh(self, stale_only: bool = False):
+        """(Re)imports every SQLite table into DuckDB. Only meaningful in "import" mode.
+
+        With `stale_only`, skips the import when the source is still at the imported data version.
+        """
+        if self.mode != "import":
+            return
+        with self._lock:
+            with sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True) as src:
+                version = read_data_version(src.cursor())
+                if stale_only and version is not None and str(version) == self._imported_version:
+                    # Another thread imported this version while we waited for the lock.
+                    return
+                database_id = read_meta(src.cursor(), "database_id")
+                for table in self._sqlite_tables(src):
+                    columns = src.execute(f"PRAGMA table_info({table});").fetchall()
+                    column_defs = ", ".join(
+                        f'"{col[1]}" {SQLITE_TYPE_MAP.get((col[2] or "").upper(), "VARCHAR")}' for col in columns
+                    )
+                    self.conn.execute(f'CREATE OR REPLACE TABLE "{table}" ({column_defs});')
+
+                    for chunk in pd.read_sql_query(f'SELECT * FROM "{table}"', src, chunksize=self.import_batch_size):
+                        self.conn.register("_import_chunk", chunk)
+                        self.conn.execute(f'INSERT INTO "{table}" SELECT * FROM _import_chunk;')
+                        self.conn.unregister("_import_chunk")
+            # Drop cached per-thread cursors so they see the new catalog.
+            self._local = threading.local()
+            self._imports += 1
+            self._imported_version = str(version) if version is not None else f"import:{self._imports}"
+            self._imported_id = database_id or file_identity(self.db_path)
+
+    def _source_version(self) -> Optional[int]:
+        conn = getattr(self._source, "conn", None)
+        if conn is None:
+            conn = self._source.conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        return read_data_version(conn.cursor())
+
+    def _sync(self):
+        """Re-imports once an ingestion commit has moved the SQLite data version (import mode)."""
+        if self.mode != "import":
+            return
+        version = self._source_version()
+        if version is not None and str(version) != self._imported_version:
+            self.refresh(stale_only=True)
+
+    def _cursor(self) -> duckdb.DuckDBPyConnection:
+        self._sync()
+        # DuckDB connections are not safe to share across threads; each thread gets its own cursor.
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None:
+            cursor = self.conn.cursor()
+            if self.mode == "attach":
+                cursor.execute("USE risk;")
+            self._local.cursor = cursor
+        return cursor
+
+    @contextmanager
+    def _time_budget(self, cursor: duckdb.DuckDBPyConnection, timeout: Optional[float]):
+        """Interrupts the running statement once `timeout` seconds have elapsed."""
+        timeout = timeout or self.query_timeout
+        if not timeout:
+            yield
+            return
+        timer = threading.Timer(timeout, cursor.interrupt)
+        timer.daemon = True
+        timer.start()
+        try:
+            yield
+        except duckdb.InterruptException as e:
+            raise duckdb.Error(f"Query exceeded the time budget of {timeout:g}s.") from e
+        finally:
+            timer.cancel()
+
+    @staticmethod
+    def _bounded(query: str, max_rows: Optional[int]) -> str:
+        if not max_rows:
+            return query
+        query = query.strip().rstrip(";")
+        return f"SELECT * FROM (\n{query}\n) AS bounded LIMIT {int(max_rows)}"
+
+    def execute_query(self, query: str, max_rows: Optional[int] = None,
+                      timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        try:
+            cursor = self._cursor()
+            with self._time_budget(cursor, timeout):
+                cursor.execute(query)
+                if cursor.description is None:
+                    # The statement returns no result set.
+                    return []
+                columns = [desc[0] for desc in cursor.description]
+                rows = cursor.fetchmany(max_rows) if max_rows else cursor.fetchall()
+            return [dict(zip(columns, row)) for row in rows]
+        except duckdb.Error as e:
+            return [{"error": str(e)}]
+
+    def execute_arrow(self, query: str, max_rows: Optional[int] = None,
+                      timeout: Optional[float] = None) -> pa.Table:
+        """Returns DuckDB's native Arrow result (zero-copy from its columnar vectors)."""
+        try:
+            cursor = self._cursor()
+            with self._time_budget(cursor, timeout):
+                # LIMIT lets DuckDB stop early instead of materializing the full result.
+                cursor.execute(self._bounded(query, max_rows))
+                if hasattr(cursor, "to_arrow_table"):
+                    return cursor.to_arrow_table()
+                return cursor.fetch_arrow_table()
+        except duckdb.Error as e:
+            return arrow_error(str(e))
+
+    def iter_query(self, query: str, batch_size: int = 1000, offset: int = 0,
+                   timeout: Optional[float] = None) -> Iterator[List[Dict[str, Any]]]:
+        self._sync()
+        # A dedicated cursor: the generator may outlive the calling thread's other queries.
+        cursor = self.conn.cursor()
+        try:
+            if self.mode == "attach":
+                cursor.execute("USE risk;")
+            query = query.strip().rstrip(";")
+            # Restarting at an offset re-runs the query, and DuckDB's parallel scans return
+            # unordered results in any order: pages only line up under a total order.
+            order = "" if has_order_by(query) else " ORDER BY ALL"
+            skip = f" OFFSET {int(offset)}" if offset else ""
+            if order or skip:
+                query = f"SELECT * FROM (\n{query}\n) AS paged{order}{skip}"
+            with self._time_budget(cursor, timeout):
+                cursor.execute(query)
+            columns = [desc[0] for desc in cursor.description or []]
+            while True:
+                with self._time_budget(cursor, timeout):
+                    rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield [dict(zip(columns, row)) for row in rows]
+        finally:
+            cursor.close()
+
+    def explain_query(self, query: str) -> List[Dict[str, Any]]:
+        """DuckDB's physical plan, one rendered plan per row (operator names like CROSS_PRODUCT)."""
+        try:
+            rows = self._cursor().execute(f"EXPLAIN {query}").fetchall()
+            return [{"id": i, "parent": 0, "detail": row[1]} for i, row in enumerate(rows)]
+        except duckdb.Error as e:
+            return [{"error": str(e)}]
+
+    def prewarm(self, tables: Sequence[str] = ()) -> Dict[str, Any]:
+        """Reads `tables` once (in attach mode this pulls the SQLite pages in; imports are already in memory)."""
+        counts = {}
+        cursor = self._cursor()
+        for table in tables:
+            try:
+                counts[table] = cursor.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+            except duckdb.Error as e:
+                counts[table] = str(e)
+        return {"imported_version": self._imported_version, "tables": counts}
+
+    def stats(self) -> Dict[str, Any]:
+        return {"duckdb": {"mode": self.mode, "imported_version": self._imported_version, "imports": self._imports}}
+
+    def get_schema_info(self, query: Optional[str] = None) -> str:
+        return self.get_schema_catalog().render(query)
+
+    def get_schema_catalog(self) -> SchemaCatalog:
+        """Introspects the schema once per data version (DDL only happens through refresh/attach)."""
+        version = self.get_data_version()
+        if version == self._catalog_version:
+            return self._catalog
+        try:
+            cursor = self._cursor()
+            rows = cursor.execute("""
+                SELECT c.table_name, c.column_name, c.data_type
+                FROM information_schema.columns c
+                JOIN information_schema.tables t
+                  ON c.table_catalog = t.table_catalog AND c.table_schema = t.table_schema AND c.table_name = t.table_name
+                WHERE t.table_catalog = current_database() AND t.table_schema = current_schema()
+                  AND t.table_type = 'BASE TABLE'
+                  AND t.table_name NOT LIKE '\\_%' ESCAPE '\\'
+                ORDER BY c.table_name, c.ordinal_position;
+            """).fetchall()
+            tables: Dict[str, List[Tuple[str, str, bool]]] = {}
+            for table_name, column_name, data_type in rows:
+                tables.setdefault(table_name, []).append((column_name, data_type, False))
+            catalog = build_schema_catalog(tables, lambda sql: cursor.execute(sql).fetchall(), TABLE_DESCRIPTIONS)
+        except duckdb.Error as e:
+            return SchemaCatalog(error=str(e))
+        self._catalog, self._catalog_version = catalog, version
+        return catalog
+
+    def get_data_version(self) -> str:
+        if self.mode == "import":
+            self._sync()
+            return self._imported_version
+        try:
+            row = self._cursor().execute("SELECT value FROM _meta WHERE key = 'data_version';").fetchone()
+            if row:
+                return str(row[0])
+        except duckdb.Error:
+            pass
+        return file_version_token(self.db_path)
+
+    def get_database_id(self) -> str:
+        if self.mode == "import":
+            return f"duckdb:{self._imported_id}"
+        try:
+            row = self._cursor().execute("SELECT value FROM _meta WHERE key = 'database_id';").fetchone()
+            if row:
+                return f"duckdb:{row[0]}"
+        except duckdb.Error:
+            pass
+        return f"duckdb:{file_identity(self.db_path)}"
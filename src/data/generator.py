@@ -1,14 +1,142 @@
+import argparse
 import sqlite3
-import random
-from datetime import datetime, timedelta
-import uuid
-
-def generate_data(db_path: str = "risk.db", num_trades: int = 1000, num_days: int = 7):
-    """Generates mock trading and risk data for the dashboard."""
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.data.data_version import bump_data_version, ensure_database_id
+from src.data.schema_manager import apply_schema, drop_indexes
+
+DESKS = ['FX Spot', 'Rates', 'Options', 'Credit']
+TRADERS = ['Alice', 'Bob', 'Charlie', 'Diana', 'Eve']
+
+ASSET_CLASSES = {
+    'FX Spot': ['FX'],
+    'Rates': ['Bonds', 'Swaps'],
+    'Options': ['Equity Options', 'FX Options'],
+    'Credit': ['Corp Bonds', 'CDS']
+}
+
+INSTRUMENTS = {
+    'FX': ['EUR/USD', 'GBP/USD', 'USD/JPY', 'AUD/USD'],
+    'Bonds': ['US T-Bill 1Y', 'US T-Note 10Y'],
+    'Swaps': ['IRS 5Y', 'IRS 10Y'],
+    'Equity Options': ['AAPL Call', 'TSLA Put'],
+    'FX Options': ['EUR/USD Call', 'GBP/USD Put'],
+    'Corp Bonds': ['AAPL 2030', 'MSFT 2028'],
+    'CDS': ['CDX IG', 'CDX HY']
+}
+
+# Bulk-load settings: the load is one transaction that is either committed or discarded, so
+# fsyncs buy nothing. journal_mode stays WAL so readers keep seeing the previous data meanwhile.
+LOAD_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "OFF",
+    "cache_size": "-262144",  # 256 MiB
+    "temp_store": "MEMORY",
+}
+
+def _nested_choice(rng: np.random.Generator, parent_idx: np.ndarray,
+                   children: List[List[str]]) -> Tuple[np.ndarray, List[str]]:
+    """Picks a child uniformly per parent; returns indices into the flattened children list."""
+    counts = np.array([len(c) for c in children])
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    local = (rng.random(len(parent_idx)) * counts[parent_idx]).astype(np.int64)
+    return offsets[parent_idx] + local, [child for group in children for child in group]
+
+def _uuid4s(rng: np.random.Generator, n: int) -> List[str]:
+    """Random version-4 UUID strings, drawn from `rng` so they are reproducible with the seed."""
+    raw = rng.integers(0, 256, size=(n, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    h = raw.tobytes().hex()
+    return [f"{h[i:i + 8]}-{h[i + 8:i + 12]}-{h[i + 12:i + 16]}-{h[i + 16:i + 20]}-{h[i + 20:i + 32]}"
+            for i in range(0, 32 * n, 32)]
+
+def _sample_trades(rng: np.random.Generator, n: int, num_days: int) -> Dict[str, Any]:
+    """Vectorized sampling of one chunk of trades (same distributions as the original generator)."""
+    desk_idx = rng.integers(0, len(DESKS), n)
+    asset_idx, asset_names = _nested_choice(rng, desk_idx, [ASSET_CLASSES[d] for d in DESKS])
+    instrument_idx, instrument_names = _nested_choice(rng, asset_idx, [INSTRUMENTS[a] for a in asset_names])
+
+    quantity = np.round(rng.uniform(10, 1000, n), 2)
+    price = np.round(rng.uniform(10, 200, n), 2)
+    return {
+        "trade_id": _uuid4s(rng, n),
+        "desk_idx": desk_idx,
+        "desk": np.array(DESKS, dtype=object)[desk_idx],
+        "trader_name": np.array(TRADERS, dtype=object)[rng.integers(0, len(TRADERS), n)],
+        "asset_class": np.array(asset_names, dtype=object)[asset_idx],
+        "instrument": np.array(instrument_names, dtype=object)[instrument_idx],
+        "quantity": quantity,
+        "price": price,
+        "notional": np.round(quantity * price, 2),
+        "day": rng.integers(0, num_days, n),
+    }
+
+def _sample_greeks(rng: np.random.Generator, desk_idx: np.ndarray) -> Dict[str, np.ndarray]:
+    """Desk-specific sensitivities: DV01 for Rates/Credit, delta/gamma/vega for Options, zero otherwise."""
+    n = len(desk_idx)
+    rates = np.isin(desk_idx, [DESKS.index('Rates'), DESKS.index('Credit')])
+    options = desk_idx == DESKS.index('Options')
+    return {
+        "dv01": np.where(rates, np.round(rng.uniform(-1000, 1000, n), 2), 0.0),
+        "delta": np.where(options, np.round(rng.uniform(-100, 100, n), 2), 0.0),
+        "gamma": np.where(options, np.round(rng.uniform(0, 50, n), 2), 0.0),
+        "vega": np.where(options, np.round(rng.uniform(0, 100, n), 2), 0.0),
+    }
+
+def _risk_rows(rng: np.random.Generator, trades: Dict[str, Any], dates: List[str],
+               daily_snapshots: bool) -> Iterator[List[tuple]]:
+    """Yields risk_metrics rows for a chunk of trades, one batch per calc date."""
+    greeks = _sample_greeks(rng, trades["desk_idx"])
+    trade_ids = np.array(trades["trade_id"], dtype=object)
+
+    if not daily_snapshots:
+        # One row per trade, calculated on its trade date.
+        pnl = np.round(rng.uniform(-5000, 10000, len(trade_ids)), 2)
+        calc_dates = np.array(dates, dtype=object)[trades["day"]]
+        yield list(zip(trade_ids.tolist(), calc_dates.tolist(), pnl.tolist(), greeks["dv01"].tolist(),
+                       greeks["delta"].tolist(), greeks["gamma"].tolist(), greeks["vega"].tolist()))
+        return
+
+    # A snapshot per live trade per day, from its trade date to the last day: daily PnL plus
+    # sensitivities that drift around the values at inception.
+    for day, calc_date in enumerate(dates):
+        live = np.flatnonzero(trades["day"] <= day)
+        if not len(live):
+            continue
+        drift = 1.0 + rng.normal(0.0, 0.05, (4, len(live)))
+        pnl = np.round(rng.uniform(-5000, 10000, len(live)), 2)
+        columns = [np.round(greeks[name][live] * drift[i], 2).tolist()
+                   for i, name in enumerate(("dv01", "delta", "gamma", "vega"))]
+        yield list(zip(trade_ids[live].tolist(), [calc_date] * len(live), pnl.tolist(), *columns))
+
+def generate_data(db_path: str = "risk.db", num_trades: int = 1000, num_days: int = 7,
+                  daily_snapshots: bool = False, seed: Optional[int] = None,
+                  end_date: Optional[str] = None, batch_size: int = 100_000) -> Dict[str, Any]:
+    """Generates mock trading and risk data for the dashboard.
+
+    Trades are sampled with NumPy in chunks of `batch_size` and written with executemany in a
+    single transaction, after which indexes and rollups are rebuilt. With `daily_snapshots`
+    every trade gets a risk_metrics row for each day from its trade date to `end_date`
+    (default: yesterday); otherwise one row on its trade date. Returns row counts and throughput.
+    """
     print(f"Generating mock data in {db_path}...")
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+
+    # Trade dates fall in the num_days before end_date.
+    last_day = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else date.today() - timedelta(days=1)
+    dates = [(last_day - timedelta(days=num_days - 1 - i)).strftime('%Y-%m-%d') for i in range(num_days)]
 
+    trade_count = risk_count = 0
     with sqlite3.connect(db_path) as conn:
         cursor = conn.cursor()
+        for pragma, value in LOAD_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {pragma}={value};")
 
         # 1. Trades table
         cursor.execute('''
@@ -39,71 +167,65 @@ def generate_data(db_path: str = "risk.db", num_trades: int = 1000, num_days: in
         )
         ''')
 
-        # Clear existing data for fresh simulation
+        # Clear existing data for fresh simulation; indexes are rebuilt once after the load
+        drop_indexes(cursor)
         cursor.execute('DELETE FROM risk_metrics')
         cursor.execute('DELETE FROM trades')
 
-        desks = ['FX Spot', 'Rates', 'Options', 'Credit']
-        traders = ['Alice', 'Bob', 'Charlie', 'Diana', 'Eve']
-
-        asset_classes = {
-            'FX Spot': ['FX'],
-            'Rates': ['Bonds', 'Swaps'],
-            'Options': ['Equity Options', 'FX Options'],
-            'Credit': ['Corp Bonds', 'CDS']
-        }
-
-        instruments = {
-            'FX': ['EUR/USD', 'GBP/USD', 'USD/JPY', 'AUD/USD'],
-            'Bonds': ['US T-Bill 1Y', 'US T-Note 10Y'],
-            'Swaps': ['IRS 5Y', 'IRS 10Y'],
-            'Equity Options': ['AAPL Call', 'TSLA Put'],
-            'FX Options': ['EUR/USD Call', 'GBP/USD Put'],
-            'Corp Bonds': ['AAPL 2030', 'MSFT 2028'],
-            'CDS': ['CDX IG', 'CDX HY']
-        }
-
-        start_date = datetime.now() - timedelta(days=num_days)
-
-        # Generate trades
-        for _ in range(num_trades):
-            trade_id = str(uuid.uuid4())
-            desk = random.choice(desks)
-            trader = random.choice(traders)
-            asset_class = random.choice(asset_classes[desk])
-            instrument = random.choice(instruments[asset_class])
-
-            quantity = round(random.uniform(10, 1000), 2)
-            price = round(random.uniform(10, 200), 2)
-            notional = round(quantity * price, 2)
-
-            # Random date within the last num_days
-            random_days_ago = random.randint(0, num_days - 1)
-            trade_date = (start_date + timedelta(days=random_days_ago)).strftime('%Y-%m-%d')
-
-            cursor.execute('''
+        for chunk_start in range(0, num_trades, batch_size):
+            n = min(batch_size, num_trades - chunk_start)
+            trades = _sample_trades(rng, n, num_days)
+            trade_dates = np.array(dates, dtype=object)[trades["day"]]
+
+            cursor.executemany('''
                 INSERT INTO trades (trade_id, desk, trader_name, asset_class, instrument, quantity, price, notional, trade_date)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (trade_id, desk, trader, asset_class, instrument, quantity, price, notional, trade_date))
-
-            # Generate Risk metrics for the trade (for simplification, daily metrics for the trade date to current date)
-            # A real system would have daily snapshots
-
-            pnl = round(random.uniform(-5000, 10000), 2)
-
-            # Specific risk metrics based on desk
-            dv01 = round(random.uniform(-1000, 1000), 2) if desk in ['Rates', 'Credit'] else 0.0
-            delta = round(random.uniform(-100, 100), 2) if desk == 'Options' else 0.0
-            gamma = round(random.uniform(0, 50), 2) if desk == 'Options' else 0.0
-            vega = round(random.uniform(0, 100), 2) if desk == 'Options' else 0.0
-
-            cursor.execute('''
-                INSERT INTO risk_metrics (trade_id, calc_date, pnl, dv01, delta, gamma, vega)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (trade_id, trade_date, pnl, dv01, delta, gamma, vega))
-
+            ''', zip(trades["trade_id"], trades["desk"].tolist(), trades["trader_name"].tolist(),
+                     trades["asset_class"].tolist(), trades["instrument"].tolist(), trades["quantity"].tolist(),
+                     trades["price"].tolist(), trades["notional"].tolist(), trade_dates.tolist()))
+            trade_count += n
+
+            for rows in _risk_rows(rng, trades, dates, daily_snapshots):
+                cursor.executemany('''
+                    INSERT INTO risk_metrics (trade_id, calc_date, pnl, dv01, delta, gamma, vega)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', rows)
+                risk_count += len(rows)
+
+        loaded = time.perf_counter()
+        apply_schema(cursor, full_refresh=True)
+        bump_data_version(cursor)
+        # A new data set: caches and paged results of the previous one must not carry over.
+        ensure_database_id(cursor, renew=True)
         conn.commit()
-    print("Data generation complete.")
+        cursor.execute("PRAGMA synchronous=NORMAL;")
+
+    elapsed = loaded - started
+    stats = {
+        "trades": trade_count,
+        "risk_metrics": risk_count,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round((trade_count + risk_count) / elapsed) if elapsed > 0 else 0,
+        "schema_seconds": round(time.perf_counter() - loaded, 3),
+    }
+    print(f"Data generation complete: {trade_count} trades, {risk_count} risk rows in "
+          f"{elapsed:.2f}s ({stats['rows_per_second']:,} rows/sec); indexes and rollups "
+          f"built in {stats['schema_seconds']:.2f}s.")
+    return stats
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Generate mock trading and risk data.")
+    parser.add_argument("--db_path", default="risk.db")
+    parser.add_argument("--num_trades", type=int, default=1000)
+    parser.add_argument("--num_days", type=int, default=7)
+    parser.add_argument("--daily_snapshots", action="store_true",
+                        help="Emit a risk_metrics row per live trade per day instead of one per trade.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible data.")
+    parser.add_argument("--end_date", default=None, help="Last calc date (YYYY-MM-DD), default yesterday.")
+    parser.add_argument("--batch_size", type=int, default=100_000)
+    args = parser.parse_args(argv)
+    generate_data(args.db_path, args.num_trades, args.num_days, args.daily_snapshots,
+                  args.seed, args.end_date, args.batch_size)
 
 if __name__ == "__main__":
-    generate_data()
+    main()
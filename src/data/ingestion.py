@@ -0,0 +1,607 @@
+import argparse
+import fcntl
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.core.metrics import MetricsRegistry
+from src.data.data_version import bump_data_version, ensure_database_id, read_meta, write_meta
+from src.data.generator import _sample_greeks, _sample_trades
+from src.data.schema_manager import ROLLUP_TABLE, refresh_rollups
+
+TRADE_COLUMNS = ("trade_id", "desk", "trader_name", "asset_class", "instrument", "quantity", "price",
+                 "notional", "trade_date")
+RISK_COLUMNS = ("trade_id", "calc_date", "pnl", "dv01", "delta", "gamma", "vega")
+
+# Writer settings: WAL lets the read pool keep querying the last committed batch while the
+# next one is written; NORMAL sync is durable across application crashes, which is enough
+# for a feed that can be replayed.
+WRITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": "5000",
+    "temp_store": "MEMORY",
+}
+
+# SQLite's default limit on bound parameters per statement.
+_MAX_PARAMS = 999
+
+# OperationalError messages that pass once another writer lets go; anything else fails again.
+_TRANSIENT_ERRORS = ("database is locked", "database table is locked", "database is busy")
+
+class IngestBacklogFull(RuntimeError):
+    """The ingestion worker has more rows pending than it is allowed to buffer."""
+
+def _trade_row(trade: Dict[str, Any]) -> tuple:
+    row = [trade.get(column) for column in TRADE_COLUMNS]
+    if row[7] is None and row[5] is not None and row[6] is not None:
+        row[7] = round(row[5] * row[6], 2)
+    return tuple(row)
+
+def _risk_row(risk: Dict[str, Any]) -> tuple:
+    return tuple(risk.get(column) for column in RISK_COLUMNS)
+
+def is_transient_error(error: BaseException) -> bool:
+    """Whether a failed batch is worth writing again as is: the database was busy or locked."""
+    return isinstance(error, sqlite3.OperationalError) and any(
+        message in str(error).lower() for message in _TRANSIENT_ERRORS)
+
+class RiskIngestor:
+    """Appends micro-batches of trades and risk snapshots to the SQLite store.
+
+    Each batch is one write transaction: the new fact rows, their rollup deltas
+    (refresh_rollups only aggregates risk rows past its watermark) and the data version bump
+    commit together. Readers of the WAL database therefore see a batch completely or not at
+    all, and never facts without the matching rollup rows.
+
+    Risk rows are only folded into the rollup through their trade, so a risk row whose trade
+    is neither stored nor in the same batch is not written; it is returned as an orphan for
+    the caller to retry once the trade has arrived.
+
+    A feed reader passes its position as a checkpoint, stored in _meta by the same
+    transaction, so after a restart it resumes right after the last committed batch.
+    """
+
+    def __init__(self, db_path: str, metrics: Optional[MetricsRegistry] = None):
+        self.db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._trades = 0
+        self._risk_rows = 0
+        self._last_batch_seconds = 0.0
+        self._data_version: Optional[int] = None
+
+        metrics = metrics or MetricsRegistry()
+        self._rows_total = metrics.counter("ingest_rows_total", "Rows written by the ingestion path.", ["table"])
+        self._batch_duration = metrics.histogram("ingest_batch_duration_seconds",
+                                                 "Write transaction time per ingested micro-batch.")
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            # Autocommit mode: transactions are managed explicitly with BEGIN IMMEDIATE.
+            conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+            for name, value in WRITE_PRAGMAS.items():
+                conn.execute(f"PRAGMA {name}={value};")
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _known_trades(cursor: sqlite3.Cursor, trade_ids: Sequence[str]) -> set:
+        known = set()
+        for i in range(0, len(trade_ids), _MAX_PARAMS):
+            chunk = trade_ids[i:i + _MAX_PARAMS]
+            placeholders = ", ".join("?" * len(chunk))
+            known.update(row[0] for row in cursor.execute(
+                f"SELECT trade_id FROM trades WHERE trade_id IN ({placeholders})", chunk))
+        return known
+
+    def checkpoint(self, name: str) -> Optional[int]:
+        """The last committed checkpoint of a feed, or None if it never committed one."""
+        with self._lock:
+            return read_meta(self._connection().cursor(), f"checkpoint:{name}")
+
+    def ingest(self, trades: Iterable[Dict[str, Any]] = (), risk_metrics: Iterable[Dict[str, Any]] = (),
+               checkpoints: Optional[Dict[str, int]] = None) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Writes one batch; returns its stats and the orphaned risk rows (see the class docstring).
+
+        Trades are keyed by trade_id, so a replayed trade is ignored. Risk rows have no natural
+        key and are always appended; a feed must not be replayed past its `checkpoints`.
+        """
+        trades = list(trades)
+        risk_metrics = list(risk_metrics)
+        with self._lock:
+            start = time.perf_counter()
+            conn = self._connection()
+            cursor = conn.cursor()
+            # IMMEDIATE takes the write lock up front instead of failing mid-batch on upgrade.
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                cursor.executemany(f'''
+                    INSERT INTO trades ({", ".join(TRADE_COLUMNS)}) VALUES ({", ".join("?" * len(TRADE_COLUMNS))})
+                    ON CONFLICT(trade_id) DO NOTHING
+                ''', map(_trade_row, trades))
+                new_trades = cursor.rowcount if trades else 0
+
+                known = self._known_trades(cursor, sorted({risk.get("trade_id") for risk in risk_metrics} - {None}))
+                accepted = [risk for risk in risk_metrics if risk.get("trade_id") in known]
+                orphans = [risk for risk in risk_metrics if risk.get("trade_id") not in known]
+                cursor.executemany(f'''
+                    INSERT INTO risk_metrics ({", ".join(RISK_COLUMNS)}) VALUES ({", ".join("?" * len(RISK_COLUMNS))})
+                ''', map(_risk_row, accepted))
+
+                folded = refresh_rollups(cursor)
+                for name, position in (checkpoints or {}).items():
+                    write_meta(cursor, f"checkpoint:{name}", position)
+                if new_trades or accepted:
+                    version = bump_data_version(cursor)
+                    ensure_database_id(cursor)
+                else:
+                    version = self._data_version
+                cursor.execute("COMMIT")
+            except BaseException:
+                cursor.execute("ROLLBACK")
+                raise
+            elapsed = time.perf_counter() - start
+
+            self._batches += 1
+            self._trades += new_trades
+            self._risk_rows += len(accepted)
+            self._last_batch_seconds = elapsed
+            self._data_version = version
+        self._batch_duration.observe(elapsed)
+        self._rows_total.inc(new_trades, table="trades")
+        self._rows_total.inc(len(accepted), table="risk_metrics")
+        return {
+            "trades": new_trades,
+            "risk_metrics": len(accepted),
+            "orphaned": len(orphans),
+            "rollup_rows_folded": folded,
+            "data_version": version,
+            "seconds": round(elapsed, 6),
+        }, orphans
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "batches": self._batches,
+                "trades": self._trades,
+                "risk_metrics": self._risk_rows,
+                "last_batch_seconds": round(self._last_batch_seconds, 6),
+                "data_version": self._data_version,
+            }
+
+class IngestionWorker:
+    """Buffers submitted rows and writes them through a RiskIngestor in micro-batches.
+
+    A background thread flushes as soon as `batch_size` rows are pending or the oldest
+    pending row has waited `max_delay` seconds. submit() raises IngestBacklogFull once
+    `max_pending` rows are buffered, so a producer faster than the writer gets pushed back
+    instead of growing memory. Orphaned risk rows are retried with later batches for up to
+    `orphan_ttl` seconds, which covers a feed that delivers a snapshot just before its trade.
+
+    Checkpoints submitted with the rows are committed with the batch that holds them. An
+    orphan still waiting for its trade is only in memory, so it is lost if the process
+    stops before the trade arrives.
+
+    A batch that fails because the database is busy or locked is kept and written again
+    after a pause. Any other failure would fail again, so the batch is appended to the
+    `dead_letter_path` JSON-lines file (feed records plus an "error" field, which a tail of
+    that file ignores) and only its checkpoints are committed: a feed then resumes after the
+    rows that are parked there rather than replaying them.
+    """
+
+    def __init__(self, ingestor: RiskIngestor, batch_size: Optional[int] = 1000, max_delay: Optional[float] = 0.5,
+                 max_pending: Optional[int] = 100_000, orphan_ttl: Optional[float] = 30.0,
+                 dead_letter_path: Optional[str] = None, metrics: Optional[MetricsRegistry] = None):
+        self.ingestor = ingestor
+        self.batch_size = batch_size or 1000
+        self.max_delay = max_delay or 0.5
+        self.max_pending = max_pending or 100_000
+        self.orphan_ttl = orphan_ttl if orphan_ttl is not None else 30.0
+        self.dead_letter_path = dead_letter_path or f"{ingestor.db_path}.dead-letter.jsonl"
+
+        self._cond = threading.Condition()
+        self._trades: List[Dict[str, Any]] = []
+        self._risk: List[Dict[str, Any]] = []
+        self._checkpoints: Dict[str, int] = {}
+        # (risk row, first seen) of rows waiting for their trade
+        self._orphans: List[Tuple[Dict[str, Any], float]] = []
+        self._oldest: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._flushing = False
+        self._dropped_orphans = 0
+        self._failed_batches = 0
+        self._dead_letter_rows = 0
+        self._last_error: Optional[str] = None
+
+        metrics = metrics or MetricsRegistry()
+        self._pending_gauge = metrics.gauge("ingest_pending_rows", "Rows buffered for the next ingestion batch.")
+        self._orphans_dropped = metrics.counter("ingest_orphaned_risk_rows_total",
+                                                "Risk rows dropped because their trade never arrived.")
+        self._batch_errors = metrics.counter("ingest_batch_errors_total", "Ingestion batches that failed to commit.")
+        self._dead_lettered = metrics.counter("ingest_dead_letter_rows_total",
+                                              "Rows of failed batches written to the dead-letter file.")
+
+    def _pending(self) -> int:
+        return len(self._trades) + len(self._risk) + len(self._orphans)
+
+    def start(self):
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="risk-ingestion", daemon=True)
+            self._thread.start()
+
+    def submit(self, trades: Sequence[Dict[str, Any]] = (), risk_metrics: Sequence[Dict[str, Any]] = (),
+               checkpoints: Optional[Dict[str, int]] = None) -> int:
+        """Queues rows for the next batch; returns the number of rows now pending.
+
+        `checkpoints` (feed name -> position after these rows) is committed with the batch.
+        """
+        self.start()
+        with self._cond:
+            if self._pending() + len(trades) + len(risk_metrics) > self.max_pending:
+                raise IngestBacklogFull(f"Ingestion backlog is full ({self._pending()} rows pending).")
+            self._trades.extend(trades)
+            self._risk.extend(risk_metrics)
+            self._checkpoints.update(checkpoints or {})
+            # The first pending row starts the flush timer; a full batch flushes right away.
+            if self._oldest is None and (trades or risk_metrics or checkpoints):
+                self._oldest = time.monotonic()
+                self._cond.notify_all()
+            elif len(self._trades) + len(self._risk) >= self.batch_size:
+                self._cond.notify_all()
+            pending = self._pending()
+            self._pending_gauge.set(pending)
+            return pending
+
+    def _due(self) -> Optional[float]:
+        """Seconds until the next flush is due (0 = now, None = nothing pending)."""
+        if self._stopping or len(self._trades) + len(self._risk) >= self.batch_size:
+            return 0.0
+        if self._oldest is None:
+            return None
+        return max(0.0, self._oldest + self.max_delay - time.monotonic())
+
+    def _take_batch(self) -> Tuple[List[Dict[str, Any]], List[Tuple[Dict[str, Any], float]], Dict[str, int]]:
+        now = time.monotonic()
+        trades, self._trades = self._trades, []
+        risk = self._orphans + [(row, now) for row in self._risk]
+        checkpoints, self._checkpoints = self._checkpoints, {}
+        self._risk, self._orphans = [], []
+        self._oldest = None
+        return trades, risk, checkpoints
+
+    def _write(self, trades: List[Dict[str, Any]], risk: List[Tuple[Dict[str, Any], float]],
+               checkpoints: Dict[str, int]):
+        try:
+            _, orphans = self.ingestor.ingest(trades, [row for row, _ in risk], checkpoints)
+        except Exception as e:
+            self._record_error(e)
+            # Writing the same rows again would fail again: park them, so that only the
+            # checkpoints are retried and the feed moves on.
+            if not is_transient_error(e) and self._dead_letter(trades, [row for row, _ in risk], e):
+                trades, risk = [], []
+            # Busy or locked is usually a bulk load; keep the rows and try again after a pause.
+            with self._cond:
+                self._trades[:0] = trades
+                self._orphans[:0] = risk
+                # Checkpoints submitted meanwhile are further along.
+                self._checkpoints = {**checkpoints, **self._checkpoints}
+                if self._trades or self._orphans or self._checkpoints:
+                    self._oldest = time.monotonic()
+                self._cond.wait(self.max_delay)
+            return
+
+        first_seen = {id(row): seen for row, seen in risk}
+        now = time.monotonic()
+        retry = [(row, first_seen[id(row)]) for row in orphans if now - first_seen[id(row)] < self.orphan_ttl]
+        dropped = len(orphans) - len(retry)
+        if dropped:
+            self._orphans_dropped.inc(dropped)
+        with self._cond:
+            self._dropped_orphans += dropped
+            if retry:
+                self._orphans[:0] = retry
+                if self._oldest is None:
+                    self._oldest = now
+
+    def _dead_letter(self, trades: List[Dict[str, Any]], risk: List[Dict[str, Any]], error: Exception) -> bool:
+        """Appends a failed batch to the dead-letter file; False (rows kept, offset held) if that fails too."""
+        if not trades and not risk:
+            return True
+        message = f"{type(error).__name__}: {error}"
+        try:
+            with open(self.dead_letter_path, "a") as f:
+                for kind, rows in (("trade", trades), ("risk", risk)):
+                    for row in rows:
+                        f.write(json.dumps(dict(row, type=kind, error=message), default=str) + "\n")
+        except OSError as e:
+            with self._cond:
+                self._last_error = f"{message} (dead-letter write failed: {e})"
+            return False
+        self._dead_lettered.inc(len(trades) + len(risk))
+        with self._cond:
+            self._dead_letter_rows += len(trades) + len(risk)
+        return True
+
+    def _record_error(self, error: Exception):
+        self._batch_errors.inc()
+        with self._cond:
+            self._failed_batches += 1
+            self._last_error = f"{type(error).__name__}: {error}"
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    due = self._due()
+                    if due == 0.0 or (self._stopping and due is None):
+                        break
+                    self._cond.wait(due)
+                if self._stopping and not self._pending() and not self._checkpoints:
+                    self._thread = None
+                    self._cond.notify_all()
+                    return
+                trades, risk, checkpoints = self._take_batch()
+                self._flushing = True
+            try:
+                self._write(trades, risk, checkpoints)
+            finally:
+                with self._cond:
+                    self._flushing = False
+                    self._pending_gauge.set(self._pending())
+                    self._cond.notify_all()
+                    if self._stopping and self._orphans and not self._trades and not self._risk:
+                        # No trade can arrive any more; leftover orphans are dropped.
+                        self._dropped_orphans += len(self._orphans)
+                        self._orphans_dropped.inc(len(self._orphans))
+                        self._orphans = []
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Waits until everything submitted so far has been written (orphans aside)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            if self._oldest is not None:
+                self._oldest -= self.max_delay
+            self._cond.notify_all()
+            while self._trades or self._risk or self._checkpoints or self._flushing:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def stop(self, timeout: Optional[float] = 10.0):
+        """Writes what is pending and stops the background thread."""
+        with self._cond:
+            thread = self._thread
+            self._stopping = True
+            self._cond.notify_all()
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            stats = {
+                "pending_trades": len(self._trades),
+                "pending_risk_metrics": len(self._risk),
+                "waiting_orphans": len(self._orphans),
+                "dropped_orphans": self._dropped_orphans,
+                "failed_batches": self._failed_batches,
+                "dead_letter_rows": self._dead_letter_rows,
+                "last_error": self._last_error,
+            }
+        stats.update(self.ingestor.stats())
+        return stats
+
+def parse_feed_line(line: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Parses one JSON line of the feed: {"type": "trade"|"risk", ...columns}."""
+    record = json.loads(line)
+    if not isinstance(record, dict):
+        raise ValueError("Feed records must be JSON objects.")
+    kind = record.pop("type", None)
+    if kind == "trade":
+        return [record], []
+    if kind == "risk":
+        return [], [record]
+    raise ValueError(f"Unknown feed record type: {kind!r}")
+
+class JsonlTailSource:
+    """Follows a JSON-lines feed file (a stand-in for a message bus) and submits its records.
+
+    Only complete lines are consumed; a partially written last line is picked up once its
+    newline arrives. The byte offset after each submitted chunk is committed with the batch
+    that writes it, and a restarted tail resumes from the committed offset, so a restart
+    neither skips nor replays records. Without a committed offset it starts at the beginning
+    (or the end, with `from_start=False`). A file that shrinks (truncated or replaced) is read
+    again from the start. An advisory lock next to the file lets only one process follow it,
+    so API workers that all start a tail do not ingest the feed several times.
+    """
+
+    def __init__(self, path: str, worker: IngestionWorker, poll_interval: float = 0.2, from_start: bool = True):
+        self.path = path
+        self.worker = worker
+        self.poll_interval = poll_interval
+        self.from_start = from_start
+        self.checkpoint_name = f"feed:{os.path.abspath(path)}"
+        self.offset: Optional[int] = None
+        self.records = 0
+        self.bad_lines = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock_file = None
+
+    def start(self) -> bool:
+        """Starts following the file; returns False if another process already does."""
+        if self._thread is not None:
+            return True
+        lock_file = open(f"{self.path}.lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        self._thread = threading.Thread(target=self._run, name="risk-feed-tail", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._lock_file is not None:
+            # Closing the file releases the lock for the next process.
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _resume(self, size: int):
+        committed = self.worker.ingestor.checkpoint(self.checkpoint_name)
+        if committed is not None:
+            self.offset = committed
+        else:
+            self.offset = 0 if self.from_start else size
+
+    def poll(self) -> int:
+        """Submits the complete lines appended since the last poll; returns how many records."""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return 0
+        if self.offset is None:
+            self._resume(size)
+        if size < self.offset:
+            self.offset = 0
+        if size == self.offset:
+            return 0
+
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            chunk = f.read(size - self.offset)
+        end = chunk.rfind(b"\n") + 1
+        if not end:
+            return 0
+        trades, risk = [], []
+        for line in chunk[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                new_trades, new_risk = parse_feed_line(line.decode("utf-8"))
+            except (ValueError, UnicodeDecodeError):
+                self.bad_lines += 1
+                continue
+            trades.extend(new_trades)
+            risk.extend(new_risk)
+
+        while True:
+            try:
+                self.worker.submit(trades, risk, checkpoints={self.checkpoint_name: self.offset + end})
+                break
+            except IngestBacklogFull:
+                # Leave the rest in the file until the writer catches up.
+                if self._stop.wait(self.poll_interval):
+                    return 0
+        self.offset += end
+        self.records += len(trades) + len(risk)
+        return len(trades) + len(risk)
+
+    def _run(self):
+        while not self._stop.is_set():
+            if not self.poll():
+                self._stop.wait(self.poll_interval)
+
+def synthetic_records(rng: np.random.Generator, n: int,
+                      calc_date: Optional[str] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """`n` new trades booked on `calc_date` (default today), each with its first risk snapshot."""
+    calc_date = calc_date or date.today().strftime('%Y-%m-%d')
+    sampled = _sample_trades(rng, n, 1)
+    greeks = _sample_greeks(rng, sampled["desk_idx"])
+    pnl = np.round(rng.uniform(-5000, 10000, n), 2)
+    trades, risk = [], []
+    for i, trade_id in enumerate(sampled["trade_id"]):
+        trades.append({
+            "trade_id": trade_id, "desk": sampled["desk"][i], "trader_name": sampled["trader_name"][i],
+            "asset_class": sampled["asset_class"][i], "instrument": sampled["instrument"][i],
+            "quantity": float(sampled["quantity"][i]), "price": float(sampled["price"][i]),
+            "notional": float(sampled["notional"][i]), "trade_date": calc_date,
+        })
+        risk.append({"trade_id": trade_id, "calc_date": calc_date, "pnl": float(pnl[i]),
+                     **{name: float(values[i]) for name, values in greeks.items()}})
+    return trades, risk
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Ingest live trades and risk snapshots in micro-batches.")
+    parser.add_argument("--db_path", default="risk.db")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--tail", metavar="PATH", help="Follow a JSON-lines feed file.")
+    source.add_argument("--synthetic", type=float, metavar="RATE", help="Generate RATE trades per second.")
+    parser.add_argument("--emit", metavar="PATH",
+                        help="With --synthetic, append the records to this feed file instead of the database.")
+    parser.add_argument("--duration", type=float, default=None, help="Stop after this many seconds.")
+    parser.add_argument("--batch_size", type=int, default=1000)
+    parser.add_argument("--max_delay", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    deadline = time.monotonic() + args.duration if args.duration else None
+    worker = IngestionWorker(RiskIngestor(args.db_path), batch_size=args.batch_size, max_delay=args.max_delay)
+    tail = None
+    if args.tail:
+        tail = JsonlTailSource(args.tail, worker)
+        if not tail.start():
+            parser.error(f"{args.tail} is already followed by another process.")
+    rng = np.random.default_rng(args.seed)
+    started = time.monotonic()
+    sent = 0
+    try:
+        while deadline is None or time.monotonic() < deadline:
+            if args.synthetic is None:
+                time.sleep(0.5)
+                continue
+            # Keep up with the target rate, one tick per 100 ms.
+            due = int((time.monotonic() - started) * args.synthetic) - sent
+            if due > 0:
+                trades, risk = synthetic_records(rng, due)
+                if args.emit:
+                    with open(args.emit, "a") as f:
+                        for trade, snapshot in zip(trades, risk):
+                            f.write(json.dumps(dict(trade, type="trade")) + "\n")
+                            f.write(json.dumps(dict(snapshot, type="risk")) + "\n")
+                else:
+                    worker.submit(trades, risk)
+                sent += due
+            time.sleep(0.1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if tail is not None:
+            tail.stop()
+        worker.stop()
+        worker.ingestor.close()
+
+    if args.emit:
+        print(f"Appended {sent} trades with their risk snapshots to {args.emit}.")
+        return
+    stats = worker.stats()
+    print(f"Ingested {stats['trades']} trades and {stats['risk_metrics']} risk rows in {stats['batches']} "
+          f"batches into {ROLLUP_TABLE}; {stats['dropped_orphans']} orphaned risk rows dropped.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pyarrow as pa
+
+from src.core.interfaces import IDatabase, arrow_error_message
+from src.core.metrics import MetricsRegistry, record_timing
+from src.data.result_cache import estimate_size
+from src.models.schema import SchemaCatalog
+
+# Row dicts sampled to estimate the size of a list result.
+SIZE_SAMPLE_ROWS = 100
+
+class InstrumentedDatabase(IDatabase):
+    """IDatabase decorator that records latency, rows, result bytes and errors per operation.
+
+    Sits directly on the backend (below the result cache), so it measures real database work.
+    """
+
+    def __init__(self, db: IDatabase, metrics: MetricsRegistry, backend: Optional[str] = None):
+        self.db = db
+        self.backend = backend or type(db).__name__
+        self.duration = metrics.histogram(
+            "db_query_duration_seconds", "Database call latency.", ["backend", "operation"])
+        self.rows = metrics.counter(
+            "db_rows_returned_total", "Rows returned by database calls.", ["backend", "operation"])
+        self.bytes = metrics.counter(
+            "db_result_bytes_total", "Approximate in-memory size of returned results.", ["backend", "operation"])
+        self.errors = metrics.counter(
+            "db_errors_total", "Database calls that returned an error.", ["backend", "operation"])
+
+    def _record(self, operation: str, seconds: float, result: Any):
+        labels = {"backend": self.backend, "operation": operation}
+        self.duration.observe(seconds, **labels)
+        record_timing(f"db.{operation}", seconds)
+        if isinstance(result, pa.Table):
+            if arrow_error_message(result) is not None:
+                self.errors.inc(**labels)
+                return
+            self.rows.inc(result.num_rows, **labels)
+            self.bytes.inc(result.nbytes, **labels)
+        elif isinstance(result, list):
+            if result and "error" in result[0]:
+                self.errors.inc(**labels)
+                return
+            self.rows.inc(len(result), **labels)
+            if result:
+                sample = result[:SIZE_SAMPLE_ROWS]
+                self.bytes.inc(estimate_size(sample) * len(result) / len(sample), **labels)
+
+    def execute_query(self, query: str, max_rows: Optional[int] = None,
+                      timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        start = time.perf_counter()
+        rows = self.db.execute_query(query, max_rows=max_rows, timeout=timeout)
+        self._record("execute_query", time.perf_counter() - start, rows)
+        return rows
+
+    def execute_arrow(self, query: str, max_rows: Optional[int] = None,
+                      timeout: Optional[float] = None) -> pa.Table:
+        start = time.perf_counter()
+        table = self.db.execute_arrow(query, max_rows=max_rows, timeout=timeout)
+        self._record("execute_arrow", time.perf_counter() - start, table)
+        return table
+
+    def iter_query(self, query: str, batch_size: int = 1000, offset: int = 0,
+                   timeout: Optional[float] = None) -> Iterator[List[Dict[str, Any]]]:
+        rows = self.db.iter_query(query, batch_size=batch_size, offset=offset, timeout=timeout)
+        try:
+            while True:
+                start = time.perf_counter()
+                batch = next(rows, None)
+                if batch is None:
+                    return
+                self._record("iter_query", time.perf_counter() - start, batch)
+                yield batch
+        finally:
+            rows.close()
+
+    def describe_query(self, query: str) -> List[Dict[str, Any]]:
+        start = time.perf_counter()
+        columns = self.db.describe_query(query)
+        self._record("describe_query", time.perf_counter() - start, columns)
+        return columns
+
+    def explain_query(self, query: str) -> List[Dict[str, Any]]:
+        start = time.perf_counter()
+        plan = self.db.explain_query(query)
+        self._record("explain_query", time.perf_counter() - start, plan)
+        return plan
+
+    def get_schema_info(self, query: Optional[str] = None) -> str:
+        return self.db.get_schema_info(query)
+
+    def get_schema_catalog(self) -> SchemaCatalog:
+        start = time.perf_counter()
+        catalog = self.db.get_schema_catalog()
+        self._record("get_schema_catalog", time.perf_counter() - start, None)
+        if catalog.error:
+            self.errors.inc(backend=self.backend, operation="get_schema_catalog")
+        return catalog
+
+    def get_data_version(self) -> str:
+        return self.db.get_data_version()
+
+    def get_database_id(self) -> str:
+        return self.db.get_database_id()
+
+    def get_schema_version(self) -> str:
+        return self.db.get_schema_version()
+
+    def pin_query(self, query: str) -> Tuple[str, Optional[str]]:
+        return self.db.pin_query(query)
+
+    def prewarm(self, tables: Sequence[str] = ()) -> Any:
+        return self.db.prewarm(tables)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.db.stats()
@@ -0,0 +1,200 @@
+import math
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from src.core.interfaces import IDatabase, arrow_error_message
+
+LINE_METHODS = ("lttb", "minmax")
+
+def quote_identifier(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+def _is_numeric(data_type: pa.DataType) -> bool:
+    return pa.types.is_integer(data_type) or pa.types.is_floating(data_type) or pa.types.is_decimal(data_type)
+
+def _as_float(column: pa.ChunkedArray) -> np.ndarray:
+    """Numeric or temporal column as float64 (nulls -> NaN); anything else as row positions."""
+    if _is_numeric(column.type):
+        return pc.cast(column, pa.float64()).to_numpy()
+    if pa.types.is_temporal(column.type):
+        values = np.asarray(column.to_numpy(), dtype="datetime64[ns]")
+        return np.where(np.isnat(values), np.nan, values.view(np.int64).astype(np.float64))
+    return np.arange(len(column), dtype=np.float64)
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of `threshold` points that keep the line's shape."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    y = np.nan_to_num(y)
+    bucket_size = (n - 2) / (threshold - 2)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    anchor = 0
+    for i in range(threshold - 2):
+        start = int(math.floor(i * bucket_size)) + 1
+        end = int(math.floor((i + 1) * bucket_size)) + 1
+        next_end = min(int(math.floor((i + 2) * bucket_size)) + 1, n)
+        # Average of the next bucket (the last point for the final bucket) is the third vertex.
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        area = np.abs((x[anchor] - avg_x) * (y[start:end] - y[anchor])
+                      - (x[anchor] - x[start:end]) * (avg_y - y[anchor]))
+        anchor = start + int(np.argmax(area))
+        selected[i + 1] = anchor
+    return selected
+
+def minmax_indices(y: np.ndarray, threshold: int) -> np.ndarray:
+    """Min/max bucketing: the lowest and highest point of each of threshold / 2 buckets."""
+    n = len(y)
+    if threshold >= n or threshold < 2:
+        return np.arange(n)
+    y = np.nan_to_num(y)
+    bounds = np.linspace(0, n, threshold // 2 + 1).astype(np.int64)
+    selected = []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        if end > start:
+            bucket = y[start:end]
+            selected.extend((start + int(np.argmin(bucket)), start + int(np.argmax(bucket))))
+    return np.unique(np.array(selected, dtype=np.int64))
+
+class PanelDataBuilder:
+    """Prepares the data of each dashboard panel on the server so clients never chart raw results.
+
+    - bar: SUM of y_axis (COUNT for a non-numeric y) grouped by x_axis and color;
+    - line: sorted by x_axis and downsampled per color series to `max_points` (LTTB or min/max);
+    - scatter: a uniform random sample of `scatter_points` rows;
+    - table and anything else: the first `table_rows` rows.
+
+    A truncated result is reduced from the full query rather than the inline rows: bar
+    aggregations are pushed down into SQL, line and scatter panels read only their columns.
+    """
+
+    def __init__(self, db: IDatabase, max_points: Optional[int] = 1000, scatter_points: Optional[int] = 2000,
+                 table_rows: Optional[int] = 1000, line_method: Optional[str] = "lttb",
+                 max_source_rows: Optional[int] = 1_000_000, seed: int = 0):
+        self.db = db
+        self.max_points = max_points or 1000
+        self.scatter_points = scatter_points or 2000
+        self.table_rows = table_rows or 1000
+        self.line_method = line_method or "lttb"
+        if self.line_method not in LINE_METHODS:
+            raise ValueError(f"Unknown line downsampling method: {self.line_method}")
+        self.max_source_rows = max_source_rows or None
+        self.seed = seed
+
+    def build(self, dashboard_config: Optional[Dict[str, Any]], result: Dict[str, Any],
+              columnar: bool = False) -> Optional[List[Dict[str, Any]]]:
+        """Returns one entry per panel: the panel config plus "data", "source_rows" and "reduction".
+
+        With `columnar`, each panel's data is an Arrow table under "table" instead of rows.
+        """
+        if not dashboard_config or result.get("error"):
+            return None
+        # The columnar result keeps the database's column types; rows are only a fallback.
+        table = result.get("table")
+        if table is None and result.get("data"):
+            table = pa.Table.from_pylist(result["data"])
+        if table is None or table.num_rows == 0:
+            table = table if table is not None else pa.table({})
+            panels = [self._panel(panel, table, 0, None) for panel in dashboard_config.get("panels", [])]
+        else:
+            sql_query = result.get("sql_query") if result.get("truncated") else None
+            panels = []
+            for panel in dashboard_config.get("panels", []):
+                try:
+                    panels.append(self._build_panel(panel, table, sql_query))
+                except Exception as e:
+                    # The client can still show the panel as a table of the first rows.
+                    panels.append(dict(self._panel(panel, table.slice(0, self.table_rows), table.num_rows, None),
+                                       error=f"Failed to prepare panel data: {e}"))
+        if not columnar:
+            for panel in panels:
+                panel["data"] = panel.pop("table").to_pylist()
+        return panels
+
+    def rebuild(self, dashboard_config: Optional[Dict[str, Any]], sql_query: str,
+                columnar: bool = False) -> Optional[List[Dict[str, Any]]]:
+        """Builds the panels of an earlier result again from its SQL (for clients that dropped them)."""
+        head = self._fetch(sql_query, max_rows=self.table_rows + 1)
+        return self.build(dashboard_config, {"sql_query": sql_query, "table": head,
+                                             "truncated": head.num_rows > self.table_rows}, columnar)
+
+    def _build_panel(self, panel: Dict[str, Any], table: pa.Table, sql_query: Optional[str]) -> Dict[str, Any]:
+        chart_type = panel.get("type", "table")
+        x_col, y_col, color_col = panel.get("x_axis"), panel.get("y_axis"), panel.get("color")
+        columns = set(table.column_names)
+        color_col = color_col if color_col in columns else None
+        if chart_type not in ("bar", "line", "scatter") or x_col not in columns or y_col not in columns:
+            return self._panel(panel, table.slice(0, self.table_rows), table.num_rows, None)
+
+        if chart_type == "bar":
+            return self._bar(panel, table, x_col, y_col, color_col, sql_query)
+        keys = [c for c in (x_col, y_col, color_col) if c]
+        if sql_query is not None:
+            table = self._fetch(f"SELECT {', '.join(map(quote_identifier, keys))} FROM (\n{sql_query}\n) AS panel")
+        else:
+            table = table.select(keys)
+        if chart_type == "line":
+            return self._line(panel, table, x_col, y_col, color_col)
+        return self._scatter(panel, table)
+
+    @staticmethod
+    def _panel(panel: Dict[str, Any], table: pa.Table, source_rows: int, reduction: Optional[str]) -> Dict[str, Any]:
+        return dict(panel, table=table, source_rows=source_rows, reduction=reduction)
+
+    def _fetch(self, sql: str, max_rows: Optional[int] = None) -> pa.Table:
+        table = self.db.execute_arrow(sql, max_rows=max_rows or self.max_source_rows)
+        error = arrow_error_message(table)
+        if error is not None:
+            raise RuntimeError(error)
+        return table
+
+    def _bar(self, panel: Dict[str, Any], table: pa.Table, x_col: str, y_col: str, color_col: Optional[str],
+             sql_query: Optional[str]) -> Dict[str, Any]:
+        keys = [x_col] + ([color_col] if color_col else [])
+        aggregate = "sum" if _is_numeric(table.schema.field(y_col).type) else "count"
+        if sql_query is not None:
+            group = ", ".join(map(quote_identifier, keys))
+            reduced = self._fetch(f"SELECT {group}, {aggregate.upper()}({quote_identifier(y_col)}) AS {quote_identifier(y_col)}, "
+                                  f"COUNT(*) AS source_rows FROM (\n{sql_query}\n) AS panel GROUP BY {group}")
+            source_rows = pc.sum(reduced["source_rows"]).as_py() or 0
+            reduced = reduced.select(keys + [y_col])
+        else:
+            source_rows = table.num_rows
+            grouped = table.group_by(keys).aggregate([(y_col, aggregate)])
+            reduced = grouped.select(keys + [f"{y_col}_{aggregate}"]).rename_columns(keys + [y_col])
+        return self._panel(panel, reduced.sort_by([(k, "ascending") for k in keys]), source_rows, "aggregated")
+
+    def _line(self, panel: Dict[str, Any], table: pa.Table, x_col: str, y_col: str,
+              color_col: Optional[str]) -> Dict[str, Any]:
+        source_rows = table.num_rows
+        keys = ([color_col] if color_col else []) + [x_col]
+        table = table.sort_by([(k, "ascending") for k in keys])
+        if source_rows <= self.max_points:
+            return self._panel(panel, table, source_rows, None)
+
+        series = [table] if not color_col else [
+            table.filter(pc.equal(table[color_col], value)) for value in pc.unique(table[color_col]).to_pylist()
+            if value is not None
+        ]
+        threshold = max(3, self.max_points // len(series))
+        parts = []
+        for part in series:
+            y = _as_float(part[y_col])
+            if self.line_method == "lttb":
+                indices = lttb_indices(_as_float(part[x_col]), y, threshold)
+            else:
+                indices = minmax_indices(y, threshold)
+            parts.append(part.take(pa.array(indices)))
+        return self._panel(panel, pa.concat_tables(parts), source_rows, self.line_method)
+
+    def _scatter(self, panel: Dict[str, Any], table: pa.Table) -> Dict[str, Any]:
+        source_rows = table.num_rows
+        if source_rows <= self.scatter_points:
+            return self._panel(panel, table, source_rows, None)
+        rng = np.random.default_rng(self.seed)
+        indices = np.sort(rng.choice(source_rows, size=self.scatter_points, replace=False))
+        return self._panel(panel, table.take(pa.array(indices)), source_rows, "sampled")
@@ -0,0 +1,244 @@
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pyarrow as pa
+
+from src.core.interfaces import IDatabase, ISharedCache, arrow_error_message
+from src.core.shared_cache import make_key
+from src.models.schema import SchemaCatalog
+
+# Splits SQL into quoted literals/identifiers (kept verbatim) and everything else.
+_QUOTED = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")""")
+
+def normalize_sql(sql: str) -> str:
+    """Canonical form of a SQL string for cache keys: collapsed whitespace, lower-cased outside quotes."""
+    parts = _QUOTED.split(sql.strip().rstrip(";").strip())
+    normalized = []
+    for i, part in enumerate(parts):
+        if i % 2:  # quoted
+            normalized.append(part)
+        else:
+            normalized.append(re.sub(r"\s+", " ", part).lower())
+    return "".join(normalized).strip()
+
+def estimate_size(rows: Any) -> int:
+    """Approximate in-memory footprint of a result set (row dicts or Arrow table) in bytes."""
+    if isinstance(rows, pa.Table):
+        return rows.nbytes
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row)
+        for value in row.values():
+            size += sys.getsizeof(value)
+    return size
+
+class QueryResultCache:
+    """Thread-safe LRU cache of query results, bounded by total size in bytes with an optional TTL."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl: Optional[float] = None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl or None
+        self._entries: "OrderedDict[Tuple, Tuple[Any, int, Optional[float]]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    def get(self, key: Tuple) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            rows, size, expires_at = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                self._remove(key)
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return rows
+
+    def put(self, key: Tuple, rows: Any):
+        size = estimate_size(rows)
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (rows, size, expires_at)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def _remove(self, key: Tuple):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            if self._entries:
+                self._invalidations += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "invalidations": self._invalidations,
+            }
+
+class CachedDatabase(IDatabase):
+    """IDatabase decorator that serves repeated queries from a QueryResultCache.
+
+    Entries are keyed on the normalized SQL plus the backend's database id and data version,
+    so any change to the underlying data invalidates them automatically.
+
+    With a `shared` cache, results and the schema catalog are also shared with the other
+    worker processes: a local miss is looked up there before the backend runs. The data
+    version comes from the database itself, so every process agrees on which entries are
+    current and none of them needs to be told about a change.
+    """
+
+    def __init__(self, db: IDatabase, max_bytes: Optional[int] = 64 * 1024 * 1024, ttl: Optional[float] = None,
+                 shared: Optional[ISharedCache] = None):
+        self.db = db
+        self.cache = QueryResultCache(max_bytes=max_bytes, ttl=ttl) if max_bytes else None
+        self.shared = shared
+        self._version: Optional[str] = None
+        self._database_id: Optional[str] = None
+        self._catalog: Optional[SchemaCatalog] = None
+        self._catalog_key: Optional[Tuple[str, str, str]] = None
+
+    def _current_version(self) -> Tuple[str, str]:
+        """Returns (database id, data version); the id is re-read whenever the version moves."""
+        version = self.db.get_data_version()
+        if version != self._version:
+            # Data changed: every cached entry is stale, free the memory right away.
+            if self._version is not None and self.cache is not None:
+                self.cache.clear()
+            self._database_id = self.db.get_database_id()
+            self._version = version
+        return self._database_id, version
+
+    def execute_query(self, query: str, max_rows: Optional[int] = None,
+                      timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        if self.cache is None:
+            return self.db.execute_query(query, max_rows=max_rows, timeout=timeout)
+
+        key = (*self._current_version(), normalize_sql(query), max_rows)
+        rows = self._lookup(key)
+        if rows is not None:
+            return list(rows)
+
+        rows = self.db.execute_query(query, max_rows=max_rows, timeout=timeout)
+        if not (rows and "error" in rows[0]):
+            self._store(key, rows)
+        return list(rows)
+
+    def execute_arrow(self, query: str, max_rows: Optional[int] = None,
+                      timeout: Optional[float] = None) -> pa.Table:
+        if self.cache is None:
+            return self.db.execute_arrow(query, max_rows=max_rows, timeout=timeout)
+
+        key = (*self._current_version(), normalize_sql(query), max_rows, "arrow")
+        table = self._lookup(key)
+        if table is not None:
+            return table
+
+        table = self.db.execute_arrow(query, max_rows=max_rows, timeout=timeout)
+        if arrow_error_message(table) is None:
+            self._store(key, table)
+        return table
+
+    def _lookup(self, key: Tuple) -> Any:
+        value = self.cache.get(key)
+        if value is None and self.shared is not None:
+            value = self.shared.get_object(make_key("result", *key))
+            if value is not None:
+                self.cache.put(key, value)
+        return value
+
+    def _store(self, key: Tuple, value: Any):
+        self.cache.put(key, value)
+        if self.shared is not None:
+            self.shared.set_object(make_key("result", *key), value)
+
+    def iter_query(self, query: str, batch_size: int = 1000, offset: int = 0,
+                   timeout: Optional[float] = None) -> Iterator[List[Dict[str, Any]]]:
+        # Pages stream straight from the backend; caching them would defeat the constant memory bound.
+        return self.db.iter_query(query, batch_size=batch_size, offset=offset, timeout=timeout)
+
+    def describe_query(self, query: str) -> List[Dict[str, Any]]:
+        return self.db.describe_query(query)
+
+    def explain_query(self, query: str) -> List[Dict[str, Any]]:
+        return self.db.explain_query(query)
+
+    def get_schema_info(self, query: Optional[str] = None) -> str:
+        if self.shared is None:
+            return self.db.get_schema_info(query)
+        return self.get_schema_catalog().render(query)
+
+    def get_schema_catalog(self) -> SchemaCatalog:
+        if self.shared is None:
+            return self.db.get_schema_catalog()
+        # One process introspects each schema and data version; the others load its catalog.
+        catalog_key = (*self._current_version(), self.db.get_schema_version())
+        if catalog_key == self._catalog_key:
+            return self._catalog
+        key = make_key("schema", *catalog_key)
+        catalog = self.shared.get_object(key)
+        if catalog is None:
+            catalog = self.db.get_schema_catalog()
+            if catalog.error:
+                return catalog
+            self.shared.set_object(key, catalog)
+        self._catalog, self._catalog_key = catalog, catalog_key
+        return catalog
+
+    def get_data_version(self) -> str:
+        return self.db.get_data_version()
+
+    def get_database_id(self) -> str:
+        return self._current_version()[0]
+
+    def get_schema_version(self) -> str:
+        return self.db.get_schema_version()
+
+    def pin_query(self, query: str) -> Tuple[str, Optional[str]]:
+        return self.db.pin_query(query)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Returns result cache hit/miss, size and eviction counters (and the shared cache's)."""
+        stats = self.cache.stats() if self.cache is not None else {}
+        if self.shared is not None:
+            stats["shared"] = self.shared.stats()
+        return stats
+
+    def prewarm(self, tables: Sequence[str] = ()) -> Any:
+        return self.db.prewarm(tables)
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self.db.stats(), result_cache=self.cache_stats())
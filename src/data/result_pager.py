@@ -0,0 +1,189 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.core.interfaces import IDatabase, ISharedCache
+from src.core.shared_cache import make_key
+
+class ResultExpiredError(LookupError):
+    """Raised when a query id is unknown, has expired, or its data changed and it cannot be pinned."""
+
+class _PagedResult:
+    def __init__(self, sql_query: str, data_version: str, dashboard_config: Optional[Dict[str, Any]] = None,
+                 pinned_sql: Optional[str] = None, database_id: Optional[str] = None):
+        self.sql_query = sql_query
+        self.dashboard_config = dashboard_config
+        self.data_version = data_version
+        # The query bounded to the snapshot it was registered on (IDatabase.pin_query).
+        self.pinned_sql = pinned_sql
+        self.database_id = database_id
+        self.lock = threading.Lock()
+        self.last_access = time.monotonic()
+        # Open generator and the (offset, page size) it will yield next.
+        self.rows: Optional[Iterator[List[Dict[str, Any]]]] = None
+        self.position: Optional[Tuple[int, int]] = None
+
+    def close(self):
+        if self.rows is not None:
+            self.rows.close()
+        self.rows, self.position = None, None
+
+class ResultPager:
+    """Serves large query results page by page with opaque cursors.
+
+    Each registered query keeps an open `iter_query` generator positioned at the next page,
+    so sequential paging streams at constant memory. A cursor that does not match the
+    generator's position (a client going back, or a retry) restarts it at that offset.
+    An open generator holds a read snapshot, which keeps SQLite from checkpointing its WAL,
+    so generators idle for `idle_timeout` seconds are closed (the next page re-opens one at
+    its offset). Idle results are forgotten after `ttl` seconds.
+
+    With a `shared` cache, query ids are also published (for `ttl` seconds after
+    registration) so that any worker process can serve their pages: a process that does not
+    know an id opens its own cursor at the requested offset, on the same data version.
+
+    Results are pinned to the snapshot they were registered on: once ingestion commits a new
+    data version, pages (and panel rebuilds) run the backend's pinned SQL instead, so a client
+    keeps paging through the rows it started on. Backends that cannot pin expire the result.
+    """
+
+    def __init__(self, db: IDatabase, ttl: Optional[float] = 300.0, max_results: int = 256,
+                 shared: Optional[ISharedCache] = None, idle_timeout: Optional[float] = 5.0):
+        self.db = db
+        self.ttl = ttl or 300.0
+        self.idle_timeout = idle_timeout or 5.0
+        self.max_results = max_results
+        self.shared = shared
+        self._results: "OrderedDict[str, _PagedResult]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Closes idle generators; runs only while some are open.
+        self._reaper: Optional[threading.Thread] = None
+
+    def register(self, sql_query: str, dashboard_config: Optional[Dict[str, Any]] = None) -> str:
+        """Registers a query for paging (and its dashboard, to rebuild the panels) and returns its id."""
+        query_id = uuid.uuid4().hex
+        data_version, pinned_sql = self.db.pin_query(sql_query)
+        database_id = self.db.get_database_id()
+        entry = _PagedResult(sql_query, data_version, dashboard_config, pinned_sql, database_id)
+        self._add(query_id, entry)
+        if self.shared is not None:
+            self.shared.set_object(make_key("page", database_id, query_id),
+                                   (sql_query, data_version, dashboard_config, pinned_sql), ttl=self.ttl)
+        return query_id
+
+    def _add(self, query_id: str, entry: _PagedResult) -> _PagedResult:
+        with self._lock:
+            self._expire()
+            # Two requests may load the same shared id at once; both must use one entry.
+            entry = self._results.setdefault(query_id, entry)
+            while len(self._results) > self.max_results:
+                _, oldest = self._results.popitem(last=False)
+                oldest.close()
+            return entry
+
+    def _expire(self):
+        now = time.monotonic()
+        for query_id in [qid for qid, entry in self._results.items() if now - entry.last_access > self.ttl]:
+            self._results.pop(query_id).close()
+
+    def _entry(self, query_id: str) -> _PagedResult:
+        with self._lock:
+            self._expire()
+            entry = self._results.get(query_id)
+            if entry is not None:
+                self._results.move_to_end(query_id)
+                entry.last_access = time.monotonic()
+                return entry
+
+        # Registered by another worker process.
+        registered = None
+        if self.shared is not None:
+            registered = self.shared.get_object(make_key("page", self.db.get_database_id(), query_id))
+        if registered is None:
+            raise ResultExpiredError(f"Unknown or expired query id: {query_id}")
+        sql_query, data_version, dashboard_config, pinned_sql = registered
+        return self._add(query_id, _PagedResult(sql_query, data_version, dashboard_config, pinned_sql,
+                                                self.db.get_database_id()))
+
+    def _snapshot_sql(self, entry: _PagedResult) -> str:
+        """The SQL that re-reads the entry's result: as registered, or pinned once the data moved on."""
+        if self.db.get_data_version() == entry.data_version:
+            return entry.sql_query
+        # A rebuilt database may reuse rowids, so the pin only holds on the same one.
+        if entry.pinned_sql is None or self.db.get_database_id() != entry.database_id:
+            raise ResultExpiredError("The underlying data changed; re-run the query.")
+        return entry.pinned_sql
+
+    def describe(self, query_id: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Returns (sql, dashboard_config) for a query id; the SQL reads the result's snapshot."""
+        entry = self._entry(query_id)
+        return self._snapshot_sql(entry), entry.dashboard_config
+
+    def page(self, query_id: str, cursor: Optional[str] = None,
+             page_size: int = 1000) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Returns (rows, next_cursor); next_cursor is None once the result is exhausted."""
+        offset = self._decode(cursor)
+        entry = self._entry(query_id)
+
+        with entry.lock:
+            entry.last_access = time.monotonic()
+            if entry.position != (offset, page_size):
+                # Restarting re-runs the query, on the snapshot the result was registered on.
+                sql = self._snapshot_sql(entry)
+                entry.close()
+                entry.rows = self.db.iter_query(sql, batch_size=page_size, offset=offset)
+                self._start_reaper()
+            rows = next(entry.rows, [])
+            entry.last_access = time.monotonic()
+            if len(rows) < page_size:
+                entry.close()
+                return rows, None
+            entry.position = (offset + len(rows), page_size)
+            return rows, str(offset + len(rows))
+
+    def _start_reaper(self):
+        with self._lock:
+            if self._reaper is None:
+                self._reaper = threading.Thread(target=self._reap, name="result-pager-reaper", daemon=True)
+                self._reaper.start()
+
+    def _reap(self):
+        while True:
+            time.sleep(self.idle_timeout / 2)
+            with self._lock:
+                entries = [entry for entry in self._results.values() if entry.rows is not None]
+                if not entries:
+                    self._reaper = None
+                    return
+            now = time.monotonic()
+            for entry in entries:
+                # An entry serving a page right now is not idle.
+                if now - entry.last_access > self.idle_timeout and entry.lock.acquire(blocking=False):
+                    try:
+                        if time.monotonic() - entry.last_access > self.idle_timeout:
+                            entry.close()
+                    finally:
+                        entry.lock.release()
+
+    @staticmethod
+    def _decode(cursor: Optional[str]) -> int:
+        if not cursor:
+            return 0
+        if not cursor.isdigit():
+            raise ValueError(f"Invalid cursor: {cursor}")
+        return int(cursor)
+
+    def close(self):
+        with self._lock:
+            for entry in self._results.values():
+                entry.close()
+            self._results.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "open_results": len(self._results),
+                "open_cursors": sum(1 for entry in self._results.values() if entry.rows is not None),
+            }
@@ -0,0 +1,37 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.models.schema import ColumnInfo, SchemaCatalog, TableInfo
+
+# Text columns with at most this many distinct values get their values listed in the prompt.
+DISTINCT_LIMIT = 20
+TEXT_TYPES = ("TEXT", "VARCHAR", "CHAR", "STRING")
+
+def build_schema_catalog(tables: Dict[str, List[Tuple[str, str, bool]]],
+                         fetch: Callable[[str], Sequence[Sequence[Any]]],
+                         descriptions: Optional[Dict[str, str]] = None) -> SchemaCatalog:
+    """Builds a SchemaCatalog with row counts, low-cardinality values and date ranges.
+
+    `tables` maps table name -> [(column, type, is_primary_key)] and `fetch` runs a SQL
+    statement on the backend and returns its rows. The statistics SQL is portable across
+    SQLite and DuckDB. `descriptions` annotates tables (e.g. rollups) by name.
+    """
+    catalog = SchemaCatalog()
+    for table_name, column_defs in tables.items():
+        columns = [ColumnInfo(name=name, type=col_type, primary_key=pk) for name, col_type, pk in column_defs]
+        row_count = fetch(f'SELECT COUNT(*) FROM "{table_name}"')[0][0]
+
+        for col in columns:
+            if col.is_date:
+                low, high = fetch(f'SELECT MIN("{col.name}"), MAX("{col.name}") FROM "{table_name}"')[0]
+                col.min_value, col.max_value = low, high
+            elif col.type.upper().startswith(TEXT_TYPES) and not col.primary_key and not col.name.endswith("_id"):
+                values = fetch(
+                    f'SELECT DISTINCT "{col.name}" FROM "{table_name}" WHERE "{col.name}" IS NOT NULL '
+                    f'LIMIT {DISTINCT_LIMIT + 1}'
+                )
+                if values and len(values) <= DISTINCT_LIMIT:
+                    col.distinct_values = sorted(row[0] for row in values)
+
+        catalog.tables[table_name] = TableInfo(name=table_name, columns=columns, row_count=row_count,
+                                               description=(descriptions or {}).get(table_name))
+    return catalog
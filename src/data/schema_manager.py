@@ -0,0 +1,146 @@
+import argparse
+import sqlite3
+from typing import List, Optional
+
+from src.data.data_version import bump_data_version, ensure_database_id
+
+# Secondary indexes on the fact tables. The column lists make the usual dashboard access
+# paths index-only: filter trades by desk/date/instrument, then join risk_metrics on trade_id.
+INDEXES = {
+    "idx_trades_desk_date": "trades(desk, trade_date, instrument, trader_name, trade_id)",
+    "idx_trades_trade_date": "trades(trade_date, desk, trade_id)",
+    "idx_trades_instrument": "trades(instrument, trade_date, trade_id)",
+    "idx_risk_metrics_trade": "risk_metrics(trade_id, calc_date, pnl, dv01, delta, gamma, vega)",
+    "idx_risk_metrics_calc_date": "risk_metrics(calc_date)",
+}
+
+ROLLUP_TABLE = "daily_risk_rollup"
+# Watermarks of the incremental rollup refresh; "_" keeps it out of the agent's schema.
+ROLLUP_STATE_TABLE = "_rollup_state"
+
+# Shown next to the table in the text2sql schema so the agent picks the rollup over the raw facts.
+TABLE_DESCRIPTIONS = {
+    ROLLUP_TABLE: (
+        "ROLLUP of risk_metrics joined to trades, one row per calc_date x desk x instrument x trader_name "
+        "with SUMs of notional, pnl, dv01, delta, gamma, vega and the trade_count. Prefer it for "
+        "aggregations at this grain or coarser."
+    ),
+}
+
+# Fact tables that only ever get rows appended (ingestion), until a full reload replaces the
+# data set. Their rowid high-water marks therefore pin a snapshot of them.
+APPEND_ONLY_TABLES = ("trades", "risk_metrics")
+
+_MEASURES = ["notional", "pnl", "dv01", "delta", "gamma", "vega"]
+
+def rollup_select(where: str = "") -> str:
+    """The rollup's definition over risk_metrics r and trades t, in the table's column order."""
+    sums = ", ".join(f"SUM({'t' if m == 'notional' else 'r'}.{m}) AS {m}" for m in _MEASURES)
+    return f'''
+        SELECT r.calc_date AS calc_date, t.desk AS desk, t.instrument AS instrument, t.trader_name AS trader_name,
+               MAX(t.asset_class) AS asset_class, COUNT(*) AS trade_count, {sums}
+        FROM risk_metrics r JOIN trades t ON t.trade_id = r.trade_id
+        {where}
+        GROUP BY r.calc_date, t.desk, t.instrument, t.trader_name
+    '''
+
+def ensure_schema(cursor: sqlite3.Cursor):
+    """Creates the secondary indexes, the rollup table and its state table if missing."""
+    for name, definition in INDEXES.items():
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+
+    cursor.execute(f'''
+    CREATE TABLE IF NOT EXISTS {ROLLUP_TABLE} (
+        calc_date DATE,
+        desk TEXT,
+        instrument TEXT,
+        trader_name TEXT,
+        asset_class TEXT,
+        trade_count INTEGER,
+        notional REAL,
+        pnl REAL,
+        dv01 REAL,
+        delta REAL,
+        gamma REAL,
+        vega REAL,
+        PRIMARY KEY (calc_date, desk, instrument, trader_name)
+    ) WITHOUT ROWID
+    ''')
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{ROLLUP_TABLE}_desk ON {ROLLUP_TABLE}(desk, calc_date)")
+
+    cursor.execute(f'''
+    CREATE TABLE IF NOT EXISTS {ROLLUP_STATE_TABLE} (
+        rollup TEXT PRIMARY KEY,
+        source_rowid INTEGER
+    )
+    ''')
+
+def drop_indexes(cursor: sqlite3.Cursor):
+    """Drops the secondary fact-table indexes; bulk loads are faster without them."""
+    for name in INDEXES:
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+
+def _watermark(cursor: sqlite3.Cursor) -> int:
+    row = cursor.execute(f"SELECT source_rowid FROM {ROLLUP_STATE_TABLE} WHERE rollup = ?", (ROLLUP_TABLE,)).fetchone()
+    return row[0] if row else 0
+
+def refresh_rollups(cursor: sqlite3.Cursor, full: bool = False) -> int:
+    """Folds risk_metrics rows added since the last refresh into the rollup; returns how many.
+
+    risk_metrics is treated as append-only, so the refresh only aggregates rows past the stored
+    rowid watermark and adds them onto the existing rollup rows. A full rebuild is needed after
+    rows are deleted or rewritten (the generator's reload does this); it also happens
+    automatically when the table shrank below the watermark.
+    """
+    ensure_schema(cursor)
+    high = cursor.execute("SELECT COALESCE(MAX(rowid), 0) FROM risk_metrics").fetchone()[0]
+    low = _watermark(cursor)
+    if full or high < low:
+        cursor.execute(f"DELETE FROM {ROLLUP_TABLE}")
+        low = 0
+
+    added = 0
+    if high > low:
+        updates = ", ".join(f"{m} = {m} + excluded.{m}" for m in ["trade_count"] + _MEASURES)
+        cursor.execute(f'''
+            INSERT INTO {ROLLUP_TABLE} (calc_date, desk, instrument, trader_name, asset_class, trade_count, {", ".join(_MEASURES)})
+            {rollup_select("WHERE r.rowid > ? AND r.rowid <= ?")}
+            ON CONFLICT(calc_date, desk, instrument, trader_name) DO UPDATE SET {updates}
+        ''', (low, high))
+        added = high - low
+
+    cursor.execute(f'''
+        INSERT INTO {ROLLUP_STATE_TABLE} (rollup, source_rowid) VALUES (?, ?)
+        ON CONFLICT(rollup) DO UPDATE SET source_rowid = excluded.source_rowid
+    ''', (ROLLUP_TABLE, high))
+    return added
+
+def apply_schema(cursor: sqlite3.Cursor, full_refresh: bool = False) -> int:
+    """Ensures indexes and rollups exist, refreshes the rollups and updates planner statistics."""
+    ensure_schema(cursor)
+    added = refresh_rollups(cursor, full=full_refresh)
+    if full_refresh:
+        # Sampled statistics are enough for the planner and keep ANALYZE cheap on big tables.
+        cursor.execute("PRAGMA analysis_limit=1000")
+        cursor.execute("ANALYZE")
+    else:
+        cursor.execute("PRAGMA optimize")
+    return added
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Create indexes and refresh rollup tables.")
+    parser.add_argument("--db_path", default="risk.db")
+    parser.add_argument("--full", action="store_true", help="Rebuild the rollups from scratch.")
+    args = parser.parse_args(argv)
+
+    with sqlite3.connect(args.db_path) as conn:
+        cursor = conn.cursor()
+        added = apply_schema(cursor, full_refresh=args.full)
+        if added:
+            bump_data_version(cursor)
+            ensure_database_id(cursor)
+        conn.commit()
+    print(f"Schema up to date; {added} risk rows folded into {ROLLUP_TABLE}.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import re
+from typing import Dict, Optional
+
+# Comments and quoted literals/identifiers; blanked out before looking for keywords.
+_MASKED = re.compile(r"--[^\n]*|/\*.*?\*/|'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|`[^`]*`", re.DOTALL)
+_LEADING_WITH = re.compile(r"^\s*WITH(\s+RECURSIVE)?\b", re.IGNORECASE)
+_ORDER_BY = re.compile(r"\bORDER\s+BY\b", re.IGNORECASE)
+_AGGREGATE_CALL = re.compile(r"\b(?:COUNT|SUM|AVG|MIN|MAX|TOTAL|GROUP_CONCAT|STRING_AGG|MEDIAN|QUANTILE\w*)\s*\(",
+                             re.IGNORECASE)
+_AGGREGATE_OR_SORT = re.compile(
+    r"\bGROUP\s+BY\b|\bORDER\s+BY\b|\bDISTINCT\b|\bOVER\s*\(|\bUNION\b|\bEXCEPT\b|\bINTERSECT\b|"
+    + _AGGREGATE_CALL.pattern,
+    re.IGNORECASE,
+)
+_MANY_ROWS = re.compile(r"\bGROUP\s+BY\b|\bOVER\b|\bUNION\b|\bEXCEPT\b|\bINTERSECT\b", re.IGNORECASE)
+_SELECT = re.compile(r"\bSELECT\b(\s+(?:DISTINCT|ALL)\b)?", re.IGNORECASE)
+_CLAUSE_END = re.compile(r"\b(?:FROM|WHERE|GROUP|HAVING|WINDOW|ORDER|LIMIT)\b|$", re.IGNORECASE)
+_ALIASED = re.compile(r'\bAS\s+("(?:[^"]|"")+"|\w+)\s*$', re.IGNORECASE)
+_COLUMN_REF = re.compile(r'^(?:\w+\.)?("(?:[^"]|"")+"|\w+)$')
+_EXTREMUM = re.compile(r"^(?:MIN|MAX)\s*\(\s*(.*?)\s*\)$", re.IGNORECASE)
+# Result types of computed columns, by the function the expression starts with.
+_EXPRESSION_TYPES = (
+    (re.compile(r"^COUNT\s*\(", re.IGNORECASE), "INTEGER"),
+    (re.compile(r"^(?:SUM|AVG|TOTAL)\s*\(", re.IGNORECASE), "REAL"),
+    (re.compile(r"^(?:DATE|DATETIME)\s*\(", re.IGNORECASE), "DATE"),
+)
+
+def mask(sql: str) -> str:
+    """`sql` with comments and quoted text replaced by spaces; positions are unchanged."""
+    return _MASKED.sub(lambda match: " " * len(match.group(0)), sql)
+
+def top_level(sql: str) -> str:
+    """mask(sql) with everything inside parentheses blanked as well (subqueries, CTE bodies)."""
+    chars = list(mask(sql))
+    depth = 0
+    for i, char in enumerate(chars):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth = max(0, depth - 1)
+        elif depth:
+            chars[i] = " "
+    return "".join(chars)
+
+def has_order_by(sql: str) -> bool:
+    """True if the statement itself (not a subquery) sorts its result."""
+    return bool(_ORDER_BY.search(top_level(sql)))
+
+def aggregates_or_sorts(sql: str) -> bool:
+    """True if some part of the statement has to see every input row before returning one."""
+    return bool(_AGGREGATE_OR_SORT.search(mask(sql)))
+
+def returns_single_row(sql: str) -> bool:
+    """True if the statement aggregates without grouping, so its result is a single row."""
+    top = top_level(sql)
+    return bool(_AGGREGATE_CALL.search(top)) and not _MANY_ROWS.search(top)
+
+def select_list(sql: str) -> Dict[str, str]:
+    """Maps the output column names of the statement's final SELECT list to their expressions.
+
+    Best effort, for typing result columns: `*` items are skipped and an unaliased expression
+    is named by its own text, as SQLite names it.
+    """
+    top = top_level(sql)
+    selects = list(_SELECT.finditer(top))
+    if not selects:
+        return {}
+    start = selects[-1].end()
+    end = start + _CLAUSE_END.search(top[start:]).start()
+    columns, item_start = {}, start
+    for position in [i for i in range(start, end) if top[i] == ","] + [end]:
+        item = sql[item_start:position].strip()
+        item_start = position + 1
+        aliased = _ALIASED.search(item)
+        if aliased:
+            columns[aliased.group(1).strip('"')] = item[:aliased.start()].strip()
+        elif item and not item.endswith("*"):
+            reference = _COLUMN_REF.match(item)
+            columns[reference.group(1).strip('"') if reference else item] = item
+    return columns
+
+def selected_column(expression: str) -> Optional[str]:
+    """The table column an output expression carries unchanged (a reference, or its MIN/MAX), if any."""
+    expression = expression.strip()
+    extremum = _EXTREMUM.match(expression)
+    reference = _COLUMN_REF.match(extremum.group(1) if extremum else expression)
+    return reference.group(1).strip('"') if reference else None
+
+def expression_type(expression: str) -> Optional[str]:
+    """The SQL type of a computed column, when the function it applies tells (e.g. SUM -> REAL)."""
+    return next((sql_type for pattern, sql_type in _EXPRESSION_TYPES if pattern.match(expression.strip())), None)
+
+def with_ctes(sql: str, ctes: Dict[str, str], inline: bool = False) -> str:
+    """Prepends common table expressions (name -> SELECT) to a statement.
+
+    A statement that has its own WITH clause gets them spliced in front of its own, so the
+    names can shadow tables referenced anywhere in it. `inline` asks SQLite to flatten them
+    into the statement (NOT MATERIALIZED) even when they are referenced more than once.
+    """
+    sql = sql.strip().rstrip(";")
+    hint = "NOT MATERIALIZED " if inline else ""
+    definitions = ",\n".join(f"{name} AS {hint}({body})" for name, body in ctes.items())
+    match = _LEADING_WITH.match(mask(sql))
+    if match is None:
+        return f"WITH {definitions}\n{sql}"
+    recursive = " RECURSIVE" if match.group(1) else ""
+    return f"WITH{recursive} {definitions},\n{sql[match.end():].lstrip()}"
+
+def references(sql: str, name: str) -> bool:
+    """True if `name` appears as a word in the statement outside comments and literals."""
+    return bool(re.search(rf"\b{re.escape(name)}\b", mask(sql), re.IGNORECASE))
+
+def defines_cte(sql: str, name: str) -> bool:
+    """True if the statement's WITH clause defines `name` (at any nesting level)."""
+    return bool(re.search(rf"\b{re.escape(name)}\s*(?:\([^)]*\)\s*)?AS\s*(?:NOT\s+)?(?:MATERIALIZED\s*)?\(",
+                          mask(sql), re.IGNORECASE))
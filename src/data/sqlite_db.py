@@ -1,36 +1,270 @@
-from src.core.interfaces import IDatabase
-from typing import List, Dict, Any
+from src.core.interfaces import IDatabase, arrow_error
+from src.data.connection_pool import SQLiteConnectionPool
+from src.data.data_version import read_data_version, read_meta, file_identity, file_version_token
+from src.data.schema_catalog import build_schema_catalog
+from src.data.schema_manager import APPEND_ONLY_TABLES, ROLLUP_TABLE, TABLE_DESCRIPTIONS, rollup_select
+from src.data.sql_text import defines_cte, expression_type, references, select_list, selected_column, with_ctes
+from src.models.schema import SchemaCatalog
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterator, Optional, Sequence, Tuple
 import sqlite3
+import threading
+import time
+import pyarrow as pa
+
+# How many SQLite VM instructions run between time-budget checks.
+PROGRESS_INTERVAL = 10_000
 
 class SQLiteDatabase(IDatabase):
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, pool_size: Optional[int] = 8, query_timeout: Optional[float] = None,
+                 catalog_refresh: Optional[float] = 60.0):
         self.db_path = db_path
+        self.pool = SQLiteConnectionPool(db_path, size=pool_size or 8)
+        # Default wall-clock budget per statement (None = unbounded)
+        self.query_timeout = query_timeout or None
+        # Minimum age (seconds) of the catalog statistics before new data re-collects them
+        self.catalog_refresh = catalog_refresh if catalog_refresh is not None else 60.0
+        self._catalog: Optional[SchemaCatalog] = None
+        self._catalog_key: Optional[int] = None
+        # Data version and time the catalog's statistics were collected at
+        self._catalog_stats: Tuple[Optional[str], float] = (None, 0.0)
+        self._catalog_lock = threading.Lock()
+
+    @contextmanager
+    def _time_budget(self, conn: sqlite3.Connection, timeout: Optional[float]):
+        """Interrupts the running statement once `timeout` seconds have elapsed."""
+        timeout = timeout or self.query_timeout
+        if not timeout:
+            yield
+            return
+        deadline = time.monotonic() + timeout
+        conn.set_progress_handler(lambda: 1 if time.monotonic() > deadline else 0, PROGRESS_INTERVAL)
+        try:
+            yield
+        except sqlite3.OperationalError as e:
+            if str(e) == "interrupted":
+                raise sqlite3.OperationalError(f"Query exceeded the time budget of {timeout:g}s.") from e
+            raise
+        finally:
+            conn.set_progress_handler(None, 0)
 
-    def execute_query(self, query: str) -> List[Dict[str, Any]]:
+    def execute_query(self, query: str, max_rows: Optional[int] = None,
+                      timeout: Optional[float] = None) -> List[Dict[str, Any]]:
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn, self._time_budget(conn, timeout):
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 cursor.execute(query)
-                rows = cursor.fetchall()
+                rows = cursor.fetchmany(max_rows) if max_rows else cursor.fetchall()
                 return [dict(row) for row in rows]
         except sqlite3.Error as e:
             return [{"error": str(e)}]
 
-    def get_schema_info(self) -> str:
-        schema = ""
+    def execute_arrow(self, query: str, max_rows: Optional[int] = None,
+                      timeout: Optional[float] = None) -> pa.Table:
+        """Fetches plain tuples and builds the Arrow columns directly, without per-row dicts."""
+        try:
+            with self.pool.connection() as conn, self._time_budget(conn, timeout):
+                cursor = conn.cursor()
+                cursor.execute(query)
+                names = [desc[0] for desc in cursor.description or []]
+                rows = cursor.fetchmany(max_rows) if max_rows else cursor.fetchall()
+        except sqlite3.Error as e:
+            return arrow_error(str(e))
+
+        columns = list(zip(*rows)) if rows else [() for _ in names]
+        arrays = []
+        for values in columns:
+            try:
+                arrays.append(pa.array(values))
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                # SQLite columns can mix types; fall back to text.
+                arrays.append(pa.array([None if v is None else str(v) for v in values]))
+        return pa.table(arrays, names=names)
+
+    def iter_query(self, query: str, batch_size: int = 1000, offset: int = 0,
+                   timeout: Optional[float] = None) -> Iterator[List[Dict[str, Any]]]:
+        # A dedicated connection: the generator may stay open across requests and must not
+        # hold a pool slot. Its single statement reads one consistent snapshot. Each request's
+        # work (the skip to `offset`, then every batch) gets its own time budget.
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+        try:
+            conn.row_factory = sqlite3.Row
+            with self._time_budget(conn, timeout):
+                cursor = conn.execute(query)
+                while offset > 0:
+                    skipped = len(cursor.fetchmany(min(offset, batch_size)))
+                    if not skipped:
+                        return
+                    offset -= skipped
+            while True:
+                with self._time_budget(conn, timeout):
+                    rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield [dict(row) for row in rows]
+        finally:
+            conn.close()
+
+    def pin_query(self, query: str) -> Tuple[str, Optional[str]]:
+        """Pins `query` to the current rowid high-water marks of the append-only fact tables.
+
+        CTEs named like the fact tables shadow them with only the rows that existed at this
+        version, and the rollup (whose rows ingestion updates in place) with its definition
+        over those rows. The rowid bound is wrapped in likelihood(+..., 1.0) so the planner
+        neither uses it as an access path nor re-estimates the joins: the pinned statement
+        keeps the original plan, and therefore its row order, for queries on the facts.
+        """
+        bounds = ", ".join(f'(SELECT COALESCE(MAX(rowid), 0) FROM "{table}")' for table in APPEND_ONLY_TABLES)
+        try:
+            with self.pool.connection() as conn:
+                # One statement reads one snapshot: the marks belong to exactly this version.
+                row = conn.execute(f"SELECT (SELECT value FROM _meta WHERE key = 'data_version'), {bounds}").fetchone()
+        except sqlite3.Error:
+            return self.get_data_version(), None
+        version, marks = row[0], row[1:]
+        names = APPEND_ONLY_TABLES + (ROLLUP_TABLE,)
+        if version is None or any(defines_cte(query, name) for name in names):
+            return self.get_data_version(), None
+
+        ctes = {
+            table: f'SELECT * FROM main."{table}" WHERE likelihood(+rowid <= {int(mark)}, 1.0)'
+            for table, mark in zip(APPEND_ONLY_TABLES, marks)
+        }
+        if references(query, ROLLUP_TABLE):
+            ctes[ROLLUP_TABLE] = rollup_select()
+        return str(version), with_ctes(query, ctes, inline=True)
+
+    def describe_query(self, query: str) -> List[Dict[str, Any]]:
+        """Result columns from the cursor description of the query under LIMIT 0 (SQLite stops before any row).
+
+        SQLite reports no result types, so a column is typed as the catalog column it selects
+        (or its MIN/MAX), or from the function that computes it (SUM -> REAL).
+        """
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.execute(f"SELECT * FROM (\n{query.strip().rstrip(';')}\n) AS described LIMIT 0")
+                names = [desc[0] for desc in cursor.description or []]
+        except sqlite3.Error as e:
+            return [{"error": str(e)}]
+        declared: Dict[str, set] = {}
+        for table in self.get_schema_catalog().tables.values():
+            for column in table.columns:
+                declared.setdefault(column.name, set()).add(column.type)
+        expressions = select_list(query)
+        columns = []
+        for name in names:
+            expression = expressions.get(name, name)
+            types = declared.get(selected_column(expression), set())
+            columns.append({"name": name, "type": next(iter(types)) if len(types) == 1 else expression_type(expression)})
+        return columns
+
+    def explain_query(self, query: str) -> List[Dict[str, Any]]:
+        try:
+            with self.pool.connection() as conn:
+                rows = conn.execute(f"EXPLAIN QUERY PLAN {query}").fetchall()
+            return [{"id": row[0], "parent": row[1], "detail": row[3]} for row in rows]
+        except sqlite3.Error as e:
+            return [{"error": str(e)}]
+
+    def prewarm(self, tables: Sequence[str] = ()) -> Dict[str, Any]:
+        """Opens the pooled connections and reads `tables` once, so first queries find warm pages."""
+        opened = self.pool.prewarm()
+        counts = {}
+        with self.pool.connection() as conn:
+            for table in tables:
+                try:
+                    # COUNT(*) walks the smallest index (or the table), pulling it into the page cache.
+                    counts[table] = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+                except sqlite3.Error as e:
+                    counts[table] = str(e)
+        return {"connections_opened": opened, "tables": counts}
+
+    def get_schema_info(self, query: Optional[str] = None) -> str:
+        return self.get_schema_catalog().render(query)
+
+    def get_schema_catalog(self) -> SchemaCatalog:
+        """Introspects the schema once and re-uses it until the schema changes.
+
+        The statistics (row counts, distinct values, date ranges) take a full scan, so new
+        data only re-collects them once they are `catalog_refresh` seconds old. One caller
+        does that while the others keep the current catalog instead of queuing behind it.
+        """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-                tables = cursor.fetchall()
-                for table in tables:
-                    table_name = table[0]
-                    schema += f"Table: {table_name}\n"
-                    cursor.execute(f"PRAGMA table_info({table_name});")
-                    columns = cursor.fetchall()
-                    for col in columns:
-                        schema += f"  - {col[1]} ({col[2]})\n"
+                schema_version = cursor.execute("PRAGMA schema_version;").fetchone()[0]
+                if schema_version != self._catalog_key:
+                    with self._catalog_lock:
+                        if schema_version != self._catalog_key:
+                            self._refresh_catalog(cursor, schema_version)
+                        return self._catalog
+
+                stats_version, collected = self._catalog_stats
+                if (time.monotonic() - collected >= self.catalog_refresh
+                        and self.get_data_version() != stats_version
+                        and self._catalog_lock.acquire(blocking=False)):
+                    try:
+                        if schema_version == self._catalog_key:
+                            self._refresh_catalog(cursor, schema_version)
+                    finally:
+                        self._catalog_lock.release()
+                return self._catalog
         except sqlite3.Error as e:
-            return f"Error getting schema: {str(e)}"
-        return schema
+            return SchemaCatalog(error=str(e))
+
+    def _refresh_catalog(self, cursor: sqlite3.Cursor, schema_version: int):
+        # Read before the scan: a batch committed during it triggers the next refresh.
+        data_version = self.get_data_version()
+        self._catalog = self._introspect(cursor)
+        self._catalog_key = schema_version
+        self._catalog_stats = (data_version, time.monotonic())
+
+    def _introspect(self, cursor: sqlite3.Cursor) -> SchemaCatalog:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' "
+            "AND name NOT LIKE '\\_%' ESCAPE '\\' AND name NOT LIKE 'sqlite\\_%' ESCAPE '\\';"
+        )
+        tables = {}
+        for (table_name,) in cursor.fetchall():
+            cursor.execute(f"PRAGMA table_info({table_name});")
+            columns = cursor.fetchall()
+            # Columns of a composite key (e.g. rollup dimensions) are not identifiers.
+            single_key = sum(1 for col in columns if col[5]) == 1
+            tables[table_name] = [(col[1], col[2], single_key and bool(col[5])) for col in columns]
+        return build_schema_catalog(tables, lambda sql: cursor.execute(sql).fetchall(), TABLE_DESCRIPTIONS)
+
+    def get_data_version(self) -> str:
+        try:
+            with self.pool.connection() as conn:
+                version = read_data_version(conn.cursor())
+            if version is not None:
+                return str(version)
+        except sqlite3.Error:
+            pass
+        # Unversioned database (not written by our generator): fall back to file modification stamps.
+        return file_version_token(self.db_path)
+
+    def get_database_id(self) -> str:
+        try:
+            with self.pool.connection() as conn:
+                database_id = read_meta(conn.cursor(), "database_id")
+            if database_id is not None:
+                return f"sqlite:{database_id}"
+        except sqlite3.Error:
+            pass
+        return f"sqlite:{file_identity(self.db_path)}"
+
+    def get_schema_version(self) -> str:
+        try:
+            with self.pool.connection() as conn:
+                return str(conn.execute("PRAGMA schema_version;").fetchone()[0])
+        except sqlite3.Error:
+            return self.get_data_version()
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Returns connection pool hit/miss and wait-time counters."""
+        return self.pool.stats()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"db_pool": self.pool_stats()}
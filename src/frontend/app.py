@@ -1,10 +1,16 @@
 import streamlit as st
 import requests
 import pandas as pd
+import pyarrow as pa
+import base64
 import json
 import os
+import uuid
 
 API_URL = os.environ.get("API_URL", "http://localhost:8000/query")
+STREAM_URL = f"{API_URL.rstrip('/')}/stream"
+# Answers older than the last EXPANDED_ANSWERS show only their text; their dashboards render on demand.
+EXPANDED_ANSWERS = int(os.environ.get("EXPANDED_ANSWERS", "2"))
 
 st.set_page_config(page_title="Agentic Risk Dashboard", layout="wide")
 
@@ -15,6 +21,8 @@ st.markdown("Use natural language to query trading and risk data and generate dy
 with st.sidebar:
     st.header("Configuration")
     st.markdown("LLM Settings and Database parameters are configured in the backend (FastAPI).")
+    # Off by default: the panels carry the reduced data, the raw rows stay on the server.
+    show_rows = st.toggle("Show result rows", value=False)
     st.markdown("**Example Queries:**")
     st.markdown("- *Show me the top 5 trades by notional value.*")
     st.markdown("- *What is the total PnL by desk for the last week?*")
@@ -24,71 +32,160 @@ with st.sidebar:
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
+def decode_arrow(payload):
+    """Decodes base64 Arrow IPC (a data chunk or a panel's data) into a pyarrow Table."""
+    return pa.ipc.open_stream(base64.b64decode(payload)).read_all()
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def panel_frames(result_id, query_id=None, _panels=None):
+    """Returns [(panel config, DataFrame)] for a result, built once per result id.
+
+    The fresh answer passes its panels in; once evicted they are fetched again from the API by
+    query id. `_panels` is not part of the cache key. None means the result is gone.
+    """
+    if _panels is None:
+        if not query_id:
+            return None
+        response = requests.get(f"{API_URL.rstrip('/')}/{query_id}/panels", params={"data_format": "arrow"})
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        _panels = response.json().get("panels") or []
+    # Panel data arrives as Arrow IPC and goes straight into pandas (no per-row dicts).
+    return [({k: v for k, v in panel.items() if k != "arrow"}, decode_arrow(panel["arrow"]).to_pandas())
+            for panel in _panels]
+
+def render_dashboard(config, frames):
+    """Renders the dashboard panels from their server-prepared (aggregated, downsampled or sampled) data."""
+    st.subheader(config.get("title", "Dashboard View"))
+
+    # Create columns based on number of panels
+    cols = st.columns(max(1, len(frames)))
+
+    for i, (panel, df) in enumerate(frames):
+        with cols[i]:
+            st.markdown(f"**{panel.get('title', 'Chart')}**")
+            chart_type = panel.get("type", "table")
+            x_col = panel.get("x_axis")
+            y_col = panel.get("y_axis")
+            color_col = panel.get("color")
+            if panel.get("reduction") or len(df) < panel.get("source_rows", 0):
+                st.caption(f"{len(df):,} of {panel.get('source_rows', 0):,} rows ({panel.get('reduction') or 'first rows'})")
+            if panel.get("error"):
+                st.caption(panel["error"])
+
+            try:
+                if chart_type == "bar":
+                    if x_col and y_col:
+                        st.bar_chart(df, x=x_col, y=y_col, color=color_col)
+                    else:
+                        st.bar_chart(df)
+                elif chart_type == "line":
+                    if x_col and y_col:
+                        st.line_chart(df, x=x_col, y=y_col, color=color_col)
+                    else:
+                        st.line_chart(df)
+                elif chart_type == "scatter":
+                    if x_col and y_col:
+                        st.scatter_chart(df, x=x_col, y=y_col, color=color_col)
+                    else:
+                        st.scatter_chart(df)
+                else: # Default to table
+                    st.dataframe(df)
+            except Exception as e:
+                st.error(f"Error rendering {chart_type} chart: {e}")
+                st.dataframe(df)
+
+def render_answer(message, expanded=True):
+    """Renders an answer's dashboard through the cached panel path; collapsed answers only on demand."""
+    config = message.get("dashboard_config")
+    if not config:
+        return
+    if not expanded and not st.toggle("Show dashboard", key=f"show_{message['result_id']}"):
+        return
+    st.json(config, expanded=False)
+    frames = panel_frames(message["result_id"], message.get("query_id"))
+    if frames is None:
+        st.info("This result has expired on the server. Ask again to re-run it.")
+    else:
+        render_dashboard(config, frames)
+
+def iter_sse(response):
+    """Yields (event, payload) pairs from a Server-Sent Events response."""
+    event, data_lines = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if line == "":
+            if data_lines:
+                yield event, json.loads("\n".join(data_lines))
+            event, data_lines = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].strip())
+
 # Display chat messages from history on app rerun
+answers = sum(1 for message in st.session_state.messages if message["role"] == "assistant")
+seen = 0
 for message in st.session_state.messages:
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
-
-        # Display dashboard if exists in the message context
-        if "dashboard_config" in message and message["dashboard_config"]:
-            st.json(message["dashboard_config"], expanded=False)
-
-            # Basic rendering logic for Streamlit
-            config = message["dashboard_config"]
-            data = message.get("data", [])
-            if data:
-                df = pd.DataFrame(data)
-                st.subheader(config.get("title", "Dashboard View"))
-
-                panels = config.get("panels", [])
-
-                # Create columns based on number of panels
-                cols = st.columns(max(1, len(panels)))
-
-                for i, panel in enumerate(panels):
-                    with cols[i]:
-                        st.markdown(f"**{panel.get('title', 'Chart')}**")
-                        chart_type = panel.get("type", "table")
-                        x_col = panel.get("x_axis")
-                        y_col = panel.get("y_axis")
-                        color_col = panel.get("color")
-
-                        try:
-                            if chart_type == "bar":
-                                if x_col and y_col:
-                                    st.bar_chart(df, x=x_col, y=y_col, color=color_col)
-                                else:
-                                    st.bar_chart(df)
-                            elif chart_type == "line":
-                                if x_col and y_col:
-                                    st.line_chart(df, x=x_col, y=y_col, color=color_col)
-                                else:
-                                    st.line_chart(df)
-                            elif chart_type == "scatter":
-                                if x_col and y_col:
-                                    st.scatter_chart(df, x=x_col, y=y_col, color=color_col)
-                                else:
-                                    st.scatter_chart(df)
-                            else: # Default to table
-                                st.dataframe(df)
-                        except Exception as e:
-                            st.error(f"Error rendering {chart_type} chart: {e}")
-                            st.dataframe(df)
+        if message["role"] == "assistant":
+            seen += 1
+            render_answer(message, expanded=seen > answers - EXPANDED_ANSWERS)
 
 # React to user input
 if prompt := st.chat_input("Ask a question about your risk or trades..."):
     # Display user message in chat message container
     st.chat_message("user").markdown(prompt)
 
-    with st.spinner("Agents are analyzing your request..."):
-        try:
-            response = requests.post(API_URL, json={"query": prompt})
-            response_data = response.json()
-
-            error = response_data.get("error")
-            sql_query = response_data.get("sql_query")
-            dashboard_config = response_data.get("dashboard_config")
-            data = response_data.get("data", [])
+    try:
+        error = None
+        sql_query = None
+        dashboard_config = None
+        panels = None
+        query_id = None
+        row_count = 0
+        chunks = []
+        rows_df = None
+
+        # Stream the agents' progress: SQL first, then the dashboard config and its panel data.
+        with st.chat_message("assistant"):
+            status = st.empty()
+            sql_placeholder = st.empty()
+            dashboard_placeholder = st.container()
+            status.caption("Agents are analyzing your request...")
+
+            # The API prepares each panel's (aggregated / downsampled) data; raw rows are only
+            # streamed when asked for. Both arrive as Arrow record batches.
+            request = {"query": prompt, "data_format": "arrow", "include_data": show_rows}
+            with requests.post(STREAM_URL, json=request, stream=True) as response:
+                for event, payload in iter_sse(response):
+                    if event == "sql":
+                        sql_query = payload.get("sql_query")
+                        sql_placeholder.markdown(f"**Generated SQL:**\n```sql\n{sql_query}\n```")
+                        status.caption("Running query...")
+                    elif event == "data":
+                        chunks.append(decode_arrow(payload["arrow"]))
+                        received = sum(chunk.num_rows for chunk in chunks)
+                        status.caption(f"Received {received} of {payload.get('total', received)} rows...")
+                    elif event == "dashboard":
+                        dashboard_config = payload.get("dashboard_config")
+                        status.caption("Preparing panels...")
+                    elif event == "panels":
+                        panels = payload.get("panels")
+                    elif event == "error":
+                        error = payload.get("error")
+                    elif event == "done":
+                        error = payload.get("error") or error
+                        row_count = payload.get("row_count") or 0
+                        query_id = payload.get("query_id")
+
+            status.empty()
+            if chunks:
+                # One concatenation once the stream is done, not one per chunk.
+                rows_df = pa.concat_tables(chunks).to_pandas()
 
             # Construct AI message
             ai_message_content = "Here is the result of your query."
@@ -96,61 +193,30 @@ if prompt := st.chat_input("Ask a question about your risk or trades..."):
                 ai_message_content = f"**Error:** {error}"
             elif sql_query:
                 ai_message_content = f"**Generated SQL:**\n```sql\n{sql_query}\n```"
-                if len(data) > 0:
-                    ai_message_content += f"\n\nFound {len(data)} rows."
+                if row_count > 0:
+                    ai_message_content += f"\n\nFound {row_count} rows."
                 else:
                     ai_message_content += "\n\nNo data found."
+            sql_placeholder.markdown(ai_message_content)
 
-            # Add AI response to UI
-            with st.chat_message("assistant"):
-                st.markdown(ai_message_content)
-
-                if not error and dashboard_config:
-                    st.json(dashboard_config, expanded=False)
-                    df = pd.DataFrame(data)
-                    st.subheader(dashboard_config.get("title", "Dashboard View"))
-
-                    panels = dashboard_config.get("panels", [])
-                    cols = st.columns(max(1, len(panels)))
-
-                    for i, panel in enumerate(panels):
-                        with cols[i]:
-                            st.markdown(f"**{panel.get('title', 'Chart')}**")
-                            chart_type = panel.get("type", "table")
-                            x_col = panel.get("x_axis")
-                            y_col = panel.get("y_axis")
-                            color_col = panel.get("color")
-
-                            try:
-                                if chart_type == "bar":
-                                    if x_col and y_col:
-                                        st.bar_chart(df, x=x_col, y=y_col, color=color_col)
-                                    else:
-                                        st.bar_chart(df)
-                                elif chart_type == "line":
-                                    if x_col and y_col:
-                                        st.line_chart(df, x=x_col, y=y_col, color=color_col)
-                                    else:
-                                        st.line_chart(df)
-                                elif chart_type == "scatter":
-                                    if x_col and y_col:
-                                        st.scatter_chart(df, x=x_col, y=y_col, color=color_col)
-                                    else:
-                                        st.scatter_chart(df)
-                                else: # Default to table
-                                    st.dataframe(df)
-                            except Exception as e:
-                                st.error(f"Error rendering {chart_type} chart: {e}")
-                                st.dataframe(df)
-
-            # Add user and ai message to chat history
-            st.session_state.messages.append({"role": "user", "content": prompt})
-            st.session_state.messages.append({
+            # The history keeps the result by reference; its panel data lives in the panel_frames cache.
+            message = {
                 "role": "assistant",
                 "content": ai_message_content,
-                "dashboard_config": dashboard_config,
-                "data": data
-            })
-
-        except requests.exceptions.ConnectionError:
-            st.error("Failed to connect to the backend API. Please make sure the FastAPI server is running.")
+                "dashboard_config": dashboard_config if not error else None,
+                "result_id": query_id or uuid.uuid4().hex,
+                "query_id": query_id,
+            }
+            if panels is not None:
+                panel_frames(message["result_id"], query_id, _panels=panels)
+            with dashboard_placeholder:
+                render_answer(message)
+                if rows_df is not None:
+                    st.dataframe(rows_df)
+
+        # Add user and ai message to chat history
+        st.session_state.messages.append({"role": "user", "content": prompt})
+        st.session_state.messages.append(message)
+
+    except requests.exceptions.ConnectionError:
+        st.error("Failed to connect to the backend API. Please make sure the FastAPI server is running.")
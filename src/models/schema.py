@@ -0,0 +1,124 @@
+import hashlib
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+# Query words that point at columns without naming them.
+COLUMN_HINTS = {
+    "trader": ["trader_name"],
+    "traders": ["trader_name"],
+    "greeks": ["delta", "gamma", "vega"],
+    "sensitivity": ["dv01", "delta", "gamma", "vega"],
+    "exposure": ["dv01", "delta", "vega", "notional"],
+    "size": ["quantity", "notional"],
+    "profit": ["pnl"],
+    "loss": ["pnl"],
+    "p&l": ["pnl"],
+    "asset": ["asset_class"],
+    "product": ["instrument", "asset_class"],
+}
+
+# Query words that imply a time dimension.
+TIME_WORDS = {"date", "day", "daily", "days", "week", "weekly", "month", "today", "yesterday", "trend",
+              "over", "time", "history", "recent", "last", "since"}
+
+@dataclass
+class ColumnInfo:
+    name: str
+    type: str
+    primary_key: bool = False
+    distinct_values: Optional[List[Any]] = None  # only for low-cardinality columns
+    min_value: Any = None  # date ranges
+    max_value: Any = None
+
+    @property
+    def is_date(self) -> bool:
+        return self.type.upper() in ("DATE", "DATETIME", "TIMESTAMP") or self.name.endswith("_date")
+
+@dataclass
+class TableInfo:
+    name: str
+    columns: List[ColumnInfo]
+    row_count: Optional[int] = None
+    description: Optional[str] = None  # e.g. what a rollup table pre-aggregates
+
+@dataclass
+class SchemaCatalog:
+    """Introspected database schema plus the column statistics shown to the text2sql agent."""
+
+    tables: Dict[str, TableInfo] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def fingerprint(self) -> str:
+        """Hash of the table/column structure (ignores statistics)."""
+        structure = ";".join(
+            f"{table.name}(" + ",".join(f"{col.name}:{col.type}" for col in table.columns) + ")"
+            for table in self.tables.values()
+        )
+        return hashlib.sha256(structure.encode("utf-8")).hexdigest()[:16]
+
+    def literal_values(self) -> List[str]:
+        """Every listed low-cardinality column value (desk, trader, instrument names, ...)."""
+        return sorted({str(v) for table in self.tables.values() for col in table.columns
+                       for v in col.distinct_values or ()})
+
+    def _relevant(self, query: str) -> Dict[str, Set[str]]:
+        """Maps table name -> relevant column names for a query; empty when nothing matches."""
+        text = query.lower()
+        words = set(re.findall(r"[a-z0-9&_/]+", text))
+        hinted = {col for word in words for col in COLUMN_HINTS.get(word, [])}
+        wants_time = bool(words & TIME_WORDS)
+
+        relevant: Dict[str, Set[str]] = {}
+        for table in self.tables.values():
+            table_words = {table.name, table.name.rstrip("s")} | set(table.name.split("_"))
+            if words & table_words:
+                relevant[table.name] = {col.name for col in table.columns}
+                continue
+            columns = set()
+            for col in table.columns:
+                parts = set(col.name.split("_"))
+                if col.name in words or col.name in hinted or (parts - {"name", "class", "date"}) & words:
+                    columns.add(col.name)
+                elif col.distinct_values and any(
+                    re.search(rf"\b{re.escape(str(v).lower())}\b", text) for v in col.distinct_values
+                ):
+                    columns.add(col.name)
+            if columns:
+                # Rollups are narrow and only useful whole (every dimension is part of the grain).
+                relevant[table.name] = {col.name for col in table.columns} if table.description else columns
+
+        for name, columns in relevant.items():
+            table = self.tables[name]
+            # Keys for joins and date columns for filtering are almost always needed.
+            columns.update(col.name for col in table.columns if col.primary_key or col.name.endswith("_id"))
+            if wants_time:
+                columns.update(col.name for col in table.columns if col.is_date)
+        return relevant
+
+    def render(self, query: Optional[str] = None) -> str:
+        """Schema text for the LLM prompt, pruned to the tables/columns relevant to `query` if given."""
+        if self.error:
+            return f"Error getting schema: {self.error}"
+
+        relevant = self._relevant(query) if query else {}
+        schema = ""
+        for table in self.tables.values():
+            if relevant and table.name not in relevant:
+                continue
+            header = f"Table: {table.name}"
+            if table.row_count is not None:
+                header += f" ({table.row_count} rows)"
+            schema += header + "\n"
+            if table.description:
+                schema += f"  Description: {table.description}\n"
+            for col in table.columns:
+                if relevant and col.name not in relevant[table.name]:
+                    continue
+                line = f"  - {col.name} ({col.type})"
+                if col.distinct_values:
+                    line += " values: " + ", ".join(repr(v) for v in col.distinct_values)
+                elif col.min_value is not None:
+                    line += f" range: {col.min_value} .. {col.max_value}"
+                schema += line + "\n"
+        return schema
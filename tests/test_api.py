@@ -0,0 +1,76 @@
+import base64
+import json
+
+import pyarrow as pa
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.stub_llm import CANNED_SQL, StubLLMServer
+from src.api.app import app, container
+from src.data.generator import generate_data
+
+@pytest.fixture
+def client(tmp_path):
+    db_path = str(tmp_path / "risk.db")
+    generate_data(db_path, num_trades=200, num_days=3, seed=1)
+    with StubLLMServer(latency_ms=0) as llm:
+        container.config.db_path.from_value(db_path)
+        container.config.llm_base_url.from_value(llm.base_url)
+        container.reset_singletons()
+        # Without the context manager the startup hooks (warmup, ingestion) do not run.
+        yield TestClient(app)
+    container.reset_singletons()
+
+def _events(response):
+    events = []
+    for message in response.text.strip().split("\n\n"):
+        event, data = message.split("\n", 1)
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+def _decode(payload):
+    return pa.ipc.open_stream(base64.b64decode(payload)).read_all()
+
+@pytest.mark.parametrize("data_format", ["json", "arrow"])
+def test_stream_group_by_builds_panels_from_the_result(client, data_format):
+    response = client.post("/query/stream", json={"query": "total pnl by desk", "data_format": data_format})
+    assert response.status_code == 200
+    events = dict(_events(response))
+    expected = container.db().execute_query(CANNED_SQL["total pnl by desk"])
+
+    assert "error" not in events
+    assert events["done"]["row_count"] == len(expected)
+    [panel] = events["panels"]["panels"]
+    assert panel["type"] == "bar" and panel["source_rows"] == len(expected)
+    data = _decode(panel["arrow"]).to_pylist() if data_format == "arrow" else panel["data"]
+    assert sorted(row["desk"] for row in data) == sorted(row["desk"] for row in expected)
+
+def test_stream_sends_rows_only_when_asked(client):
+    silent = [name for name, _ in _events(client.post("/query/stream", json={"query": "total pnl by desk"}))]
+    assert "data" not in silent
+    events = _events(client.post("/query/stream", json={"query": "total pnl by desk", "include_data": True}))
+    rows = [row for name, payload in events if name == "data" for row in payload["rows"]]
+    assert len(rows) == dict(events)["done"]["row_count"]
+
+def test_query_json_rows_come_from_the_arrow_result(client):
+    body = client.post("/query", json={"query": "total pnl by desk", "include_data": True}).json()
+    assert body["error"] is None
+    assert body["data"] == container.db().execute_query(CANNED_SQL["total pnl by desk"])
+    assert body["panels"][0]["source_rows"] == body["row_count"]
+    lean = client.post("/query", json={"query": "total pnl by desk"}).json()
+    assert lean["data"] is None and lean["panels"][0]["data"] == body["panels"][0]["data"]
+
+def test_panels_by_reference_in_arrow(client):
+    body = client.post("/query", json={"query": "all trades"}).json()
+    url = f"/query/{body['query_id']}/panels"
+    rows = client.get(url).json()["panels"][0]["data"]
+    table = _decode(client.get(url, params={"data_format": "arrow"}).json()["panels"][0]["arrow"])
+    assert table.to_pylist() == rows and table.num_rows > 0
+
+def test_stats_come_from_every_database_decorator(client):
+    client.post("/query", json={"query": "total pnl by desk"})
+    stats = client.get("/stats").json()
+    assert stats["db_pool"]["size"] > 0
+    assert stats["result_cache"]["misses"] > 0
+    assert stats["sql_coalescing"]["executions"] > 0
+    assert {"sql_cache", "llm_gateway", "result_pager"} <= stats.keys()
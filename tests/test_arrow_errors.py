@@ -0,0 +1,29 @@
+import pytest
+
+from src.core.interfaces import arrow_error_message
+from src.data.generator import generate_data
+from src.data.panel_data import PanelDataBuilder
+from src.data.result_cache import CachedDatabase
+from src.data.sqlite_db import SQLiteDatabase
+
+ERROR_COLUMN = "SELECT desk AS error FROM trades GROUP BY desk ORDER BY desk"
+
+@pytest.fixture
+def db(tmp_path):
+    db_path = str(tmp_path / "risk.db")
+    generate_data(db_path, num_trades=100, num_days=3, seed=1)
+    return CachedDatabase(SQLiteDatabase(db_path, pool_size=2))
+
+def test_a_column_named_error_is_a_result(db):
+    table = db.execute_arrow(ERROR_COLUMN)
+    assert arrow_error_message(table) is None
+    assert table.num_rows > 1
+    assert PanelDataBuilder(db)._fetch(ERROR_COLUMN).equals(table)
+
+def test_backend_errors_are_reported_out_of_band(db):
+    table = db.execute_arrow("SELECT nope FROM trades")
+    assert "no such column" in arrow_error_message(table)
+    assert table.num_columns == 0
+    assert db.cache_stats()["entries"] == 0
+    with pytest.raises(RuntimeError, match="no such column"):
+        PanelDataBuilder(db)._fetch("SELECT nope FROM trades")
@@ -0,0 +1,32 @@
+import json
+import time
+import urllib.request
+
+from benchmarks.bench_query import percentile, summarize
+from benchmarks.stub_llm import CANNED_SQL, DEFAULT_SQL, StubLLMServer, canned_reply
+
+def _chat(base_url, prompt):
+    body = json.dumps({"model": "stub", "messages": [{"role": "system", "content": prompt}]}).encode()
+    request = urllib.request.Request(f"{base_url}/chat/completions", body, {"Content-Type": "application/json"})
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+def test_canned_replies():
+    assert canned_reply("...\nUser query: Show me the Daily PnL trend please\nSQL Query:") == CANNED_SQL["daily pnl trend"]
+    assert canned_reply("User query: something else entirely") == DEFAULT_SQL
+    dashboard = json.loads(canned_reply("You are a Text2Dashboard agent.\nUser Query: total pnl by desk"))
+    assert dashboard["title"] == "total pnl by desk" and dashboard["panels"][0]["type"] == "table"
+
+def test_stub_server_answers_chat_completions_after_its_latency():
+    with StubLLMServer(latency_ms=100) as llm:
+        start = time.perf_counter()
+        reply = _chat(llm.base_url, "User query: greeks by trader")
+        assert time.perf_counter() - start >= 0.1
+        assert llm.requests == 1
+    assert reply["choices"][0]["message"]["content"] == CANNED_SQL["greeks by trader"]
+    assert reply["usage"]["completion_tokens"] == len(CANNED_SQL["greeks by trader"].split())
+
+def test_latency_summary():
+    samples = [float(i) for i in range(1, 101)]
+    assert percentile(samples, 50) == 50.0 and percentile(samples, 99) == 99.0
+    assert summarize(samples) == {"count": 100, "mean": 50.5, "p50": 50.0, "p95": 95.0, "p99": 99.0}
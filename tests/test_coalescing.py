@@ -0,0 +1,70 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.core.coalescing import AsyncSingleFlight, SingleFlight
+from src.core.metrics import MetricsRegistry
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight("sql", MetricsRegistry())
+    calls = []
+    release = threading.Event()
+
+    def slow():
+        calls.append(1)
+        release.wait()
+        return [{"n": 1}]
+
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(flight.do, "q", slow) for _ in range(4)]
+        while flight.stats()["coalesced"] < 3:
+            time.sleep(0.001)
+        release.set()
+        results = [future.result() for future in futures]
+    assert len(calls) == 1 and all(result == [{"n": 1}] for result in results)
+    assert flight.stats() == {"executions": 1, "coalesced": 3, "coalesced_rate": 0.75, "in_flight": 0}
+    # Nothing is kept: the next call runs again.
+    flight.do("q", slow)
+    assert len(calls) == 2
+
+def test_waiters_get_the_leaders_exception():
+    flight = SingleFlight("sql")
+    entered, release = threading.Event(), threading.Event()
+
+    def failing():
+        entered.set()
+        release.wait()
+        raise RuntimeError("boom")
+
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(flight.do, "q", failing)
+        entered.wait()
+        waiter = pool.submit(flight.do, "q", lambda: pytest.fail("a second execution"))
+        while flight.stats()["coalesced"] < 1:
+            time.sleep(0.001)
+        release.set()
+        for future in (leader, waiter):
+            with pytest.raises(RuntimeError, match="boom"):
+                future.result()
+
+def test_async_flight_survives_a_cancelled_waiter():
+    flight = AsyncSingleFlight("query")
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def scenario():
+        first = asyncio.ensure_future(flight.do("k", work))
+        second = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second, first.cancelled()
+
+    assert asyncio.run(scenario()) == ("result", True)
+    assert runs == [1] and flight.stats()["in_flight"] == 0
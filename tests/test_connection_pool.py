@@ -0,0 +1,63 @@
+import sqlite3
+import threading
+
+import pytest
+
+from src.data.connection_pool import SQLiteConnectionPool
+from src.data.generator import generate_data
+from src.data.sqlite_db import SQLiteDatabase
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "risk.db")
+    generate_data(path, num_trades=50, num_days=2, seed=1)
+    return path
+
+def test_connections_are_reused(db_path):
+    pool = SQLiteConnectionPool(db_path, size=2)
+    for _ in range(5):
+        with pool.connection() as conn:
+            conn.execute("SELECT 1").fetchone()
+    stats = pool.stats()
+    assert (stats["open"], stats["misses"], stats["hits"]) == (1, 1, 4)
+
+def test_nested_leases_share_the_thread_connection(db_path):
+    pool = SQLiteConnectionPool(db_path, size=1)
+    with pool.connection() as outer, pool.connection() as inner:
+        assert inner is outer
+    assert pool.stats()["open"] == 1
+
+def test_database_switches_to_wal_and_connections_are_read_only(db_path):
+    pool = SQLiteConnectionPool(db_path, size=1)
+    with pool.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM trades")
+    assert SQLiteDatabase(db_path).execute_query("DELETE FROM trades")[0]["error"]
+
+def test_full_pool_waits_then_times_out(db_path):
+    pool = SQLiteConnectionPool(db_path, size=1, timeout=0.2)
+    leased, release = threading.Event(), threading.Event()
+
+    def hold():
+        with pool.connection():
+            leased.set()
+            release.wait()
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    leased.wait()
+    with pytest.raises(sqlite3.OperationalError, match="Timed out"):
+        with pool.connection():
+            pass
+    release.set()
+    holder.join()
+    with pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM trades").fetchone()[0] == 50
+    assert pool.stats()["waits"] == 1 and pool.stats()["open"] == 1
+
+def test_prewarm_opens_up_to_the_pool_size(db_path):
+    pool = SQLiteConnectionPool(db_path, size=3)
+    assert pool.prewarm() == 3
+    assert pool.prewarm() == 0
+    assert pool.stats()["idle"] == 3
@@ -0,0 +1,48 @@
+from src.agents.dashboard_planner import (
+    CATEGORICAL, DATE, IDENTIFIER, NUMERIC, OTHER, HeuristicDashboardPlanner, infer_column_kinds, kinds_from_types,
+)
+
+def _types(config):
+    return [panel["type"] for panel in config["panels"]] if config else None
+
+def test_column_kinds_from_values():
+    rows = [{"trade_id": "T1", "desk": "Rates", "calc_date": "2026-01-05", "pnl": 1.5, "mixed": 1},
+            {"trade_id": "T2", "desk": "FX", "calc_date": "2026-01-06", "pnl": None, "mixed": "x"}]
+    assert infer_column_kinds(rows) == {"trade_id": IDENTIFIER, "desk": CATEGORICAL, "calc_date": DATE,
+                                        "pnl": NUMERIC, "mixed": OTHER}
+
+def test_column_kinds_from_types():
+    columns = [{"name": "desk", "type": "TEXT"}, {"name": "pnl", "type": "double"},
+               {"name": "n", "type": "INTEGER"}, {"name": "day", "type": "date32[day]"},
+               {"name": "trade_date", "type": "VARCHAR"}, {"name": "book_id", "type": "TEXT"},
+               {"name": "blob", "type": None}]
+    assert kinds_from_types(columns) == {"desk": CATEGORICAL, "pnl": NUMERIC, "n": NUMERIC, "day": DATE,
+                                         "trade_date": DATE, "book_id": IDENTIFIER, "blob": OTHER}
+
+def test_obvious_shapes():
+    planner = HeuristicDashboardPlanner()
+    by_desk = [{"desk": "Rates", "pnl": 1.0}, {"desk": "FX", "pnl": 2.0}]
+    daily = [{"calc_date": "2026-01-05", "desk": "Rates", "pnl": 1.0, "dv01": 2.0}]
+    assert _types(planner.plan("pnl by desk", by_desk)) == ["bar"]
+    assert _types(planner.plan("daily pnl", daily)) == ["line", "line"]
+    assert planner.plan("daily pnl", daily)["panels"][0]["color"] == "desk"
+    assert _types(planner.plan("pnl vs dv01", [{"pnl": 1.0, "dv01": 2.0}, {"pnl": 3.0, "dv01": 1.0}])) == ["scatter"]
+    assert _types(planner.plan("total pnl", [{"pnl": 3.0, "dv01": 1.0}])) == ["table"]
+    assert _types(planner.plan("list pnl by desk", by_desk)) == ["table"]
+    assert _types(planner.plan("nothing", [])) == ["table"]
+
+def test_ambiguous_shapes_go_to_the_llm():
+    planner = HeuristicDashboardPlanner()
+    assert planner.plan("pnl", [{"a": 1.0, "b": 2.0, "c": 3.0}, {"a": 1.0, "b": 2.0, "c": 3.0}]) is None
+    assert planner.plan("pnl", [{"desk": "Rates", "pnl": 1.0, "note": 1}, {"desk": "FX", "pnl": 2.0, "note": "x"}]) is None
+    stats = planner.stats()
+    assert stats["ambiguous"] == 2 and stats["coverage"] == 0.0
+
+def test_plans_from_column_types_alone():
+    planner = HeuristicDashboardPlanner()
+    columns = [{"name": "desk", "type": "TEXT"}, {"name": "total_pnl", "type": "REAL"}]
+    assert _types(planner.plan_columns("pnl by desk", columns)) == ["bar"]
+    total = [{"name": "total_pnl", "type": "REAL"}]
+    assert _types(planner.plan_columns("total pnl", total, single_row=True)) == ["table"]
+    assert planner.plan_columns("pnl", [{"name": "x", "type": None}, {"name": "y", "type": "REAL"}]) is None
+    assert planner.stats()["heuristic_plans"] == 2
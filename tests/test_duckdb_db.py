@@ -0,0 +1,80 @@
+import numpy as np
+
+from src.core.interfaces import arrow_error_message
+from src.data.duckdb_db import DuckDBDatabase
+from src.data.generator import generate_data
+from src.data.ingestion import RiskIngestor, synthetic_records
+
+COUNT = "SELECT COUNT(*) AS n FROM trades"
+
+def _ingest(db_path, n, seed=3):
+    trades, risk = synthetic_records(np.random.default_rng(seed), n, calc_date="2026-01-05")
+    ingestor = RiskIngestor(db_path)
+    ingestor.ingest(trades, risk)
+    ingestor.close()
+
+def test_import_mode_sees_ingested_batches(tmp_path):
+    db_path = str(tmp_path / "risk.db")
+    generate_data(db_path, num_trades=100, num_days=3, seed=1)
+    db = DuckDBDatabase(db_path, mode="import")
+    version = db.get_data_version()
+    assert db.execute_query(COUNT) == [{"n": 100}]
+
+    _ingest(db_path, 25)
+    assert db.execute_query(COUNT) == [{"n": 125}]
+    assert db.execute_arrow(COUNT).to_pylist() == [{"n": 125}]
+    assert db.get_data_version() != version
+    assert db.prewarm()["imported_version"] == db.get_data_version()
+
+def test_import_mode_does_not_reimport_an_unchanged_store(tmp_path):
+    db_path = str(tmp_path / "risk.db")
+    generate_data(db_path, num_trades=50, num_days=2, seed=1)
+    db = DuckDBDatabase(db_path, mode="import")
+    for _ in range(3):
+        db.execute_query(COUNT)
+        db.get_data_version()
+    assert db._imports == 1
+    _ingest(db_path, 5)
+    db.get_data_version()
+    db.execute_query(COUNT)
+    assert db._imports == 2
+
+def _db(tmp_path, **kwargs):
+    db_path = str(tmp_path / "risk.db")
+    generate_data(db_path, num_trades=100, num_days=3, seed=1)
+    return DuckDBDatabase(db_path, mode="import", **kwargs)
+
+def test_rows_and_arrow_agree(tmp_path):
+    db = _db(tmp_path)
+    sql = "SELECT desk, COUNT(*) AS trades FROM trades GROUP BY desk ORDER BY desk"
+    rows = db.execute_query(sql)
+    assert rows and db.execute_arrow(sql).to_pylist() == rows
+    assert db.execute_arrow(sql, max_rows=2).num_rows == 2
+    assert len(db.execute_query(sql, max_rows=2)) == 2
+
+def test_errors_come_back_as_values(tmp_path):
+    db = _db(tmp_path)
+    assert "nope" in db.execute_query("SELECT nope FROM trades")[0]["error"]
+    assert "nope" in arrow_error_message(db.execute_arrow("SELECT nope FROM trades"))
+    assert "error" in db.describe_query("SELECT nope FROM trades")[0]
+
+def test_pages_follow_a_total_order(tmp_path):
+    db = _db(tmp_path)
+    everything = [row for batch in db.iter_query("SELECT trade_id FROM trades", batch_size=30) for row in batch]
+    rest = [row for batch in db.iter_query("SELECT trade_id FROM trades", batch_size=30, offset=40) for row in batch]
+    assert len(everything) == 100 and rest == everything[40:]
+
+def test_describe_reads_the_result_types(tmp_path):
+    db = _db(tmp_path)
+    columns = db.describe_query("SELECT desk, SUM(pnl) AS pnl, MAX(calc_date) AS last FROM daily_risk_rollup GROUP BY desk")
+    types = {column["name"]: column["type"] for column in columns}
+    assert types["desk"] == "string" and types["pnl"] == "double" and types["last"].startswith("date")
+
+def test_schema_catalog_and_plan(tmp_path):
+    db = _db(tmp_path)
+    catalog = db.get_schema_catalog()
+    assert {"trades", "risk_metrics"} <= set(catalog.tables) and "_meta" not in catalog.tables
+    assert db.get_schema_catalog() is catalog
+    assert db.get_database_id().startswith("duckdb:")
+    plan = db.explain_query("SELECT * FROM trades, risk_metrics")
+    assert any("CROSS_PRODUCT" in row["detail"] for row in plan)
@@ -0,0 +1,78 @@
+import pyarrow as pa
+import pytest
+import requests
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from src.api.arrow_transport import to_arrow_base64
+
+SCRIPT = "../src/frontend/app.py"
+CONFIG = {"title": "PnL by desk", "panels": [{"type": "table", "title": "Rows"}]}
+
+class _Response:
+    status_code = 200
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+    def raise_for_status(self):
+        pass
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    st.cache_data.clear()
+    yield
+    st.cache_data.clear()
+
+@pytest.fixture
+def panel_requests(monkeypatch):
+    """Answers GET /query/{id}/panels with one Arrow table panel; records the requested URLs."""
+    urls = []
+    table = pa.table({"desk": ["Rates", "FX"], "pnl": [1.5, -2.0]})
+
+    def get(url, params=None, **kwargs):
+        urls.append(url)
+        assert params == {"data_format": "arrow"}
+        return _Response({"panels": [dict(CONFIG["panels"][0], arrow=to_arrow_base64(table), source_rows=2)]})
+
+    monkeypatch.setattr(requests, "get", get)
+    return urls
+
+def _history(count, query_id=None):
+    messages = []
+    for i in range(count):
+        messages.append({"role": "user", "content": f"question {i}"})
+        messages.append({"role": "assistant", "content": f"answer {i}", "dashboard_config": CONFIG,
+                         "result_id": f"r{i}", "query_id": query_id and f"{query_id}{i}"})
+    return messages
+
+def _app(messages):
+    app = AppTest.from_file(SCRIPT)
+    app.session_state.messages = messages
+    return app.run()
+
+def test_only_the_latest_answers_render_their_dashboards(panel_requests):
+    app = _app(_history(4, query_id="q"))
+    assert not app.exception
+    # Two answers are collapsed behind a toggle; the last two fetch and render their panels.
+    assert [toggle.key for toggle in app.toggle if toggle.key] == ["show_r0", "show_r1"]
+    assert panel_requests == ["http://localhost:8000/query/q2/panels", "http://localhost:8000/query/q3/panels"]
+    assert [len(frame.value) for frame in app.dataframe] == [2, 2]
+
+    app.toggle(key="show_r0").set_value(True).run()
+    assert panel_requests[-1] == "http://localhost:8000/query/q0/panels"
+    assert len(panel_requests) == 3 and len(app.dataframe) == 3
+
+def test_panel_frames_are_cached_across_reruns(panel_requests):
+    app = _app(_history(2, query_id="q"))
+    app.run()
+    app.run()
+    assert len(panel_requests) == 2 and len(app.dataframe) == 2
+
+def test_expired_results_show_a_notice(panel_requests):
+    app = _app(_history(1))
+    assert not panel_requests
+    assert [info.value for info in app.info] == ["This result has expired on the server. Ask again to re-run it."]
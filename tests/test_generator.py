@@ -0,0 +1,46 @@
+import sqlite3
+
+from src.data.generator import ASSET_CLASSES, INSTRUMENTS, generate_data
+from src.data.schema_manager import ROLLUP_TABLE
+
+def _rows(db_path, sql):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(sql).fetchall()
+
+def test_chunked_load_writes_consistent_trades(tmp_path):
+    db_path = str(tmp_path / "risk.db")
+    stats = generate_data(db_path, num_trades=1000, num_days=5, seed=7, end_date="2026-01-09", batch_size=300)
+    assert (stats["trades"], stats["risk_metrics"]) == (1000, 1000)
+    assert _rows(db_path, "SELECT COUNT(DISTINCT trade_id), MIN(trade_date), MAX(trade_date) FROM trades") == \
+        [(1000, "2026-01-05", "2026-01-09")]
+    for desk, asset_class, instrument, notional, quantity, price in _rows(
+            db_path, "SELECT desk, asset_class, instrument, notional, quantity, price FROM trades"):
+        assert asset_class in ASSET_CLASSES[desk] and instrument in INSTRUMENTS[asset_class]
+        assert abs(notional - quantity * price) <= 0.01 + 1e-9
+    # Sensitivities only where the desk has them.
+    assert _rows(db_path, "SELECT COUNT(*) FROM risk_metrics JOIN trades USING (trade_id) "
+                          "WHERE desk = 'FX Spot' AND (dv01 <> 0 OR delta <> 0)") == [(0,)]
+    assert _rows(db_path, f"SELECT SUM(trade_count) FROM {ROLLUP_TABLE}") == [(1000,)]
+
+def test_same_seed_same_data(tmp_path):
+    paths = [str(tmp_path / f"risk{i}.db") for i in range(2)]
+    for path in paths:
+        generate_data(path, num_trades=500, num_days=3, seed=11, end_date="2026-01-09", batch_size=200)
+    dumps = [_rows(path, "SELECT * FROM trades ORDER BY trade_id") for path in paths]
+    assert dumps[0] == dumps[1]
+
+def test_daily_snapshots_cover_every_live_day(tmp_path):
+    db_path = str(tmp_path / "risk.db")
+    stats = generate_data(db_path, num_trades=200, num_days=4, daily_snapshots=True, seed=3, end_date="2026-01-09")
+    expected = _rows(db_path, "SELECT SUM(julianday('2026-01-09') - julianday(trade_date) + 1) FROM trades")[0][0]
+    assert stats["risk_metrics"] == expected
+    assert _rows(db_path, "SELECT COUNT(*) FROM risk_metrics r JOIN trades t USING (trade_id) "
+                          "WHERE r.calc_date < t.trade_date") == [(0,)]
+
+def test_regenerating_replaces_the_data_set(tmp_path):
+    db_path = str(tmp_path / "risk.db")
+    generate_data(db_path, num_trades=100, num_days=2, seed=1)
+    first_id = _rows(db_path, "SELECT value FROM _meta WHERE key = 'database_id'")
+    generate_data(db_path, num_trades=40, num_days=2, seed=2)
+    assert _rows(db_path, "SELECT COUNT(*) FROM trades") == [(40,)]
+    assert _rows(db_path, "SELECT value FROM _meta WHERE key = 'database_id'") != first_id
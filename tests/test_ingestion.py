@@ -0,0 +1,133 @@
+import json
+import sqlite3
+import time
+
+import numpy as np
+
+from src.data import ingestion
+from src.data.generator import generate_data
+from src.data.ingestion import IngestionWorker, JsonlTailSource, RiskIngestor, synthetic_records
+from src.data.schema_manager import ROLLUP_TABLE
+from src.data.sqlite_db import SQLiteDatabase
+
+def _write_feed(path, n, seed=7):
+    trades, risk = synthetic_records(np.random.default_rng(seed), n, calc_date="2026-01-05")
+    with open(path, "a") as f:
+        for trade, snapshot in zip(trades, risk):
+            f.write(json.dumps(dict(trade, type="trade")) + "\n")
+            f.write(json.dumps(dict(snapshot, type="risk")) + "\n")
+
+def _tail_once(db_path, feed_path, **kwargs):
+    """One process lifetime of the tail: follow the feed until it is drained, then stop."""
+    worker = IngestionWorker(RiskIngestor(db_path), batch_size=20, max_delay=0.05, **kwargs)
+    tail = JsonlTailSource(str(feed_path), worker)
+    while tail.poll():
+        pass
+    worker.stop()
+    worker.ingestor.close()
+
+def _counts(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return (conn.execute("SELECT COUNT(*) FROM trades").fetchone()[0],
+                conn.execute("SELECT COUNT(*) FROM risk_metrics").fetchone()[0],
+                conn.execute(f"SELECT SUM(trade_count) FROM {ROLLUP_TABLE}").fetchone()[0])
+
+def test_tail_restart_does_not_replay_feed(tmp_path):
+    db_path = str(tmp_path / "risk.db")
+    feed_path = tmp_path / "feed.jsonl"
+    generate_data(db_path, num_trades=10, num_days=3, seed=1)
+    _write_feed(feed_path, 50)
+
+    _tail_once(db_path, feed_path)
+    assert _counts(db_path) == (60, 60, 60)
+
+    # A restart resumes after the committed offset instead of re-reading the feed.
+    _tail_once(db_path, feed_path)
+    assert _counts(db_path) == (60, 60, 60)
+
+    # Records appended meanwhile are picked up exactly once.
+    _write_feed(feed_path, 5, seed=8)
+    _tail_once(db_path, feed_path)
+    assert _counts(db_path) == (65, 65, 65)
+
+def test_catalog_statistics_refresh_on_a_timer(tmp_path):
+    db_path = str(tmp_path / "risk.db")
+    generate_data(db_path, num_trades=10, num_days=3, seed=1)
+    db = SQLiteDatabase(db_path, pool_size=2, catalog_refresh=3600)
+    assert db.get_schema_catalog().tables["trades"].row_count == 10
+
+    ingestor = RiskIngestor(db_path)
+    ingestor.ingest(*synthetic_records(np.random.default_rng(3), 5, calc_date="2026-01-05"))
+    ingestor.close()
+    # A batch alone does not re-scan the tables...
+    assert db.get_schema_catalog().tables["trades"].row_count == 10
+    # ...new data does once the statistics are older than catalog_refresh.
+    db.catalog_refresh = 0
+    assert db.get_schema_catalog().tables["trades"].row_count == 15
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.01)
+
+def _poison_line():
+    # A nested object cannot be bound as a column value, so this batch can never be written.
+    trade, _ = synthetic_records(np.random.default_rng(99), 1, calc_date="2026-01-05")
+    return json.dumps(dict(trade[0], type="trade", quantity={"lots": 3})) + "\n"
+
+def test_failed_batch_goes_to_the_dead_letter_file(tmp_path):
+    db_path = str(tmp_path / "risk.db")
+    feed_path = tmp_path / "feed.jsonl"
+    dead_letter = tmp_path / "dead.jsonl"
+    generate_data(db_path, num_trades=10, num_days=3, seed=1)
+    _write_feed(feed_path, 5)
+    with open(feed_path, "a") as f:
+        f.write(_poison_line())
+    _tail_once(db_path, feed_path, dead_letter_path=str(dead_letter))
+    _write_feed(feed_path, 5, seed=8)
+    _tail_once(db_path, feed_path, dead_letter_path=str(dead_letter))
+
+    # The poisoned batch is parked, the feed moved on and later records were written.
+    parked = [json.loads(line) for line in dead_letter.read_text().splitlines()]
+    assert parked and all(record["error"].startswith("ProgrammingError") for record in parked)
+    trades, risk, _ = _counts(db_path)
+    assert trades + sum(record["type"] == "trade" for record in parked) == 21
+    assert risk + sum(record["type"] == "risk" for record in parked) == 20
+
+    # A restart neither replays the feed nor parks the batch again.
+    _tail_once(db_path, feed_path, dead_letter_path=str(dead_letter))
+    assert _counts(db_path)[:2] == (trades, risk)
+    assert len(dead_letter.read_text().splitlines()) == len(parked)
+
+def test_locked_database_is_retried_not_dead_lettered(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "risk.db")
+    generate_data(db_path, num_trades=10, num_days=3, seed=1)
+    monkeypatch.setitem(ingestion.WRITE_PRAGMAS, "busy_timeout", "50")
+    worker = IngestionWorker(RiskIngestor(db_path), batch_size=5, max_delay=0.05,
+                             dead_letter_path=str(tmp_path / "dead.jsonl"))
+
+    blocker = sqlite3.connect(db_path, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+    worker.submit(*synthetic_records(np.random.default_rng(3), 5, calc_date="2026-01-05"))
+    _wait_for(lambda: worker.stats()["failed_batches"] >= 2)
+    assert "database is locked" in worker.stats()["last_error"]
+    blocker.execute("ROLLBACK")
+    blocker.close()
+
+    assert worker.flush(timeout=5)
+    worker.stop()
+    worker.ingestor.close()
+    assert _counts(db_path) == (15, 15, 15)
+    assert worker.stats()["dead_letter_rows"] == 0 and not (tmp_path / "dead.jsonl").exists()
+
+def test_offset_holds_when_the_dead_letter_file_cannot_be_written(tmp_path):
+    db_path = str(tmp_path / "risk.db")
+    generate_data(db_path, num_trades=10, num_days=3, seed=1)
+    worker = IngestionWorker(RiskIngestor(db_path), max_delay=0.05,
+                             dead_letter_path=str(tmp_path / "missing" / "dead.jsonl"))
+    worker.submit([json.loads(_poison_line())], checkpoints={"feed": 42})
+    _wait_for(lambda: worker.stats()["failed_batches"] >= 2 and worker.stats()["pending_trades"] == 1)
+    assert "dead-letter write failed" in worker.stats()["last_error"]
+    assert worker.ingestor.checkpoint("feed") is None
+    worker.stop(timeout=0.2)
@@ -0,0 +1,104 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from benchmarks.stub_llm import CANNED_SQL, StubLLMServer
+from src.agents.llm_gateway import LLMGateway, LLMQueueTimeout, llm_priority
+
+def _gateway(**kwargs):
+    kwargs.setdefault("max_in_flight", 1)
+    return LLMGateway("http://127.0.0.1:9/v1", **kwargs)
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+def test_queued_calls_are_served_interactive_first_then_fifo():
+    gateway = _gateway()
+    held = gateway._acquire("interactive")
+    served = []
+
+    def call(name, priority):
+        backend = gateway._acquire(priority)
+        served.append(name)
+        gateway._release(backend)
+
+    threads = []
+    for name, priority in [("batch-1", "batch"), ("batch-2", "batch"), ("interactive-1", "interactive"),
+                           ("interactive-2", "interactive")]:
+        thread = threading.Thread(target=call, args=(name, priority))
+        thread.start()
+        threads.append(thread)
+        _wait_for(lambda: len(gateway._queue) == len(threads))
+    assert gateway.stats()["queue_depth"] == {"interactive": 2, "batch": 2}
+
+    gateway._release(held)
+    for thread in threads:
+        thread.join(2)
+    assert served == ["interactive-1", "interactive-2", "batch-1", "batch-2"]
+    stats = gateway.stats()
+    assert stats["queue_depth"] == {"interactive": 0, "batch": 0}
+    assert stats["backends"][0]["in_flight"] == 0
+
+def test_queue_timeout_withdraws_the_waiter():
+    gateway = _gateway(queue_timeout=0.05)
+    held = gateway._acquire("interactive")
+    with pytest.raises(LLMQueueTimeout):
+        gateway._acquire("batch")
+    assert gateway.stats()["queue_depth"]["batch"] == 0
+
+    # The timed-out waiter must not be handed the freed slot.
+    gateway._release(held)
+    assert gateway.stats()["backends"][0]["in_flight"] == 0
+    gateway._release(gateway._acquire("interactive"))
+
+def test_cancelled_async_waiter_releases_its_slot():
+    gateway = _gateway()
+
+    async def scenario():
+        held = gateway._acquire("interactive")
+        waiter = asyncio.create_task(gateway._aacquire("interactive"))
+        await asyncio.sleep(0.01)
+        assert gateway.stats()["queue_depth"]["interactive"] == 1
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert gateway.stats()["queue_depth"]["interactive"] == 0
+        gateway._release(held)
+        assert gateway.stats()["backends"][0]["in_flight"] == 0
+        gateway._release(await gateway._aacquire("batch"))
+
+    asyncio.run(scenario())
+
+def test_cancelled_async_call_frees_the_backend():
+    with StubLLMServer(latency_ms=500) as llm:
+        gateway = LLMGateway(llm.base_url, max_in_flight=1)
+
+        async def scenario():
+            call = asyncio.create_task(gateway.ainvoke([HumanMessage("User query: all trades")]))
+            await asyncio.sleep(0.1)
+            assert gateway.stats()["backends"][0]["in_flight"] == 1
+            call.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await call
+
+        asyncio.run(scenario())
+        backend = gateway.stats()["backends"][0]
+        assert backend["in_flight"] == 0 and backend["errors"] == 0
+
+def test_invoke_round_trip_and_priority_context():
+    with StubLLMServer(latency_ms=0) as llm:
+        gateway = LLMGateway(llm.base_url, max_in_flight=2)
+        with llm_priority("batch"):
+            reply = gateway.invoke([HumanMessage("User query: all trades")])
+        assert reply.content == CANNED_SQL["all trades"]
+        backend = gateway.stats()["backends"][0]
+        assert backend == {"base_url": llm.base_url, "in_flight": 0, "max_in_flight": 2, "requests": 1, "errors": 0}
+    with pytest.raises(ValueError):
+        with llm_priority("urgent"):
+            pass
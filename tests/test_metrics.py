@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from src.core.metrics import MetricsRegistry, collect_timings, record_timing, timed
+
+def test_counters_and_gauges_render_per_label_set():
+    registry = MetricsRegistry()
+    errors = registry.counter("errors_total", "Errors.", ["node"])
+    errors.inc(node="probe_sql")
+    errors.inc(2, node="probe_sql")
+    errors.inc(node='say "hi"')
+    registry.gauge("in_flight", "In flight.").set(3)
+    text = registry.render()
+    assert "# TYPE errors_total counter" in text
+    assert 'errors_total{node="probe_sql"} 3' in text
+    assert 'errors_total{node="say \\"hi\\""} 1' in text
+    assert "in_flight 3" in text
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency.", ["agent"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        latency.observe(value, agent="text2sql")
+    lines = registry.render().splitlines()
+    assert 'latency_seconds_bucket{agent="text2sql",le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{agent="text2sql",le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{agent="text2sql",le="+Inf"} 4' in lines
+    assert 'latency_seconds_sum{agent="text2sql"} 2.65' in lines
+    assert 'latency_seconds_count{agent="text2sql"} 4' in lines
+
+def test_registering_twice_returns_the_same_metric():
+    registry = MetricsRegistry()
+    assert registry.counter("hits_total", "Hits.") is registry.counter("hits_total", "Hits.")
+    with pytest.raises(ValueError):
+        registry.gauge("hits_total", "Hits.")
+
+def test_timings_are_collected_per_context():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("stage_seconds", "Stage latency.", ["step"])
+
+    async def request(name):
+        with collect_timings() as timings:
+            with timed("db", histogram, step="db"):
+                await asyncio.sleep(0.01)
+            record_timing(name, 0.002)
+            return timings
+
+    async def both():
+        return await asyncio.gather(request("a"), request("b"))
+
+    first, second = asyncio.run(both())
+    assert set(first) == {"db", "a"} and set(second) == {"db", "b"}
+    assert first["a"] == 2.0 and first["db"] >= 10.0
+    assert 'stage_seconds_count{step="db"} 2' in registry.render()
+    # Outside collect_timings() nothing is recorded.
+    record_timing("ignored", 1.0)
@@ -0,0 +1,62 @@
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from src.data.panel_data import PanelDataBuilder, lttb_indices, minmax_indices
+
+CONFIG = {"title": "PnL", "panels": [{"type": "bar", "x_axis": "desk", "y_axis": "pnl"},
+                                     {"type": "table", "title": "Rows"}]}
+
+def test_empty_result_has_empty_panels():
+    builder = PanelDataBuilder(db=None)
+    empty = pa.table({"desk": pa.array([], pa.string()), "pnl": pa.array([], pa.float64())})
+    for result in ({"data": [], "row_count": 0}, {"data": None}, {"table": empty, "row_count": 0}):
+        panels = builder.build(CONFIG, result)
+        assert [(panel["data"], panel["source_rows"]) for panel in panels] == [([], 0), ([], 0)]
+
+def test_panels_keep_the_arrow_column_types():
+    builder = PanelDataBuilder(db=None)
+    # All-null in the first rows: inferring from dicts would lose the column's type.
+    table = pa.table({"desk": ["Rates", "Rates", "FX"], "pnl": pa.array([None, None, 2.5], pa.float64())})
+    bar, rows = builder.build(CONFIG, {"table": table, "row_count": 3})
+    assert bar["reduction"] == "aggregated" and bar["source_rows"] == 3
+    assert bar["data"] == [{"desk": "FX", "pnl": 2.5}, {"desk": "Rates", "pnl": None}]
+    assert rows["data"] == table.to_pylist()
+
+def test_columnar_panels_carry_arrow_tables():
+    builder = PanelDataBuilder(db=None)
+    table = pa.table({"desk": ["Rates", "FX"], "pnl": [1.0, 2.5]})
+    bar, rows = builder.build(CONFIG, {"table": table, "row_count": 2}, columnar=True)
+    assert "data" not in bar and bar["table"].schema.field("pnl").type == pa.float64()
+    assert rows["table"].equals(table)
+
+def test_lttb_keeps_the_endpoints_and_the_threshold():
+    x = np.arange(10_000, dtype=np.float64)
+    y = np.sin(x / 500)
+    y[4321] = 50.0  # a spike the line must not lose
+    indices = lttb_indices(x, y, 100)
+    assert len(indices) == 100 and indices[0] == 0 and indices[-1] == 9_999
+    assert np.all(np.diff(indices) > 0) and 4321 in indices
+    assert np.array_equal(lttb_indices(x[:50], y[:50], 100), np.arange(50))
+
+def test_minmax_keeps_each_buckets_extremes():
+    y = np.sin(np.arange(10_000) / 500)
+    y[1234], y[8765] = 50.0, -50.0
+    indices = minmax_indices(y, 100)
+    assert len(indices) <= 100 and np.all(np.diff(indices) > 0)
+    assert {1234, 8765} <= set(indices.tolist())
+    assert np.array_equal(minmax_indices(y[:50], 100), np.arange(50))
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+def test_line_panels_are_downsampled_per_series(method):
+    n = 5_000
+    table = pa.table({"day": np.tile(np.arange(n // 2), 2), "desk": ["Rates"] * (n // 2) + ["FX"] * (n // 2),
+                      "pnl": np.random.default_rng(0).normal(size=n)})
+    builder = PanelDataBuilder(db=None, max_points=200, line_method=method)
+    config = {"panels": [{"type": "line", "x_axis": "day", "y_axis": "pnl", "color": "desk"}]}
+    (line,) = builder.build(config, {"table": table, "row_count": n})
+    assert line["reduction"] == method and line["source_rows"] == n
+    counts = {desk: sum(row["desk"] == desk for row in line["data"]) for desk in ("Rates", "FX")}
+    assert all(0 < count <= 100 for count in counts.values())
+    if method == "lttb":
+        assert counts == {"Rates": 100, "FX": 100}
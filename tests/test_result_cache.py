@@ -0,0 +1,94 @@
+import time
+
+import numpy as np
+import pytest
+
+from src.data.coalescing_db import CoalescingDatabase
+from src.data.duckdb_db import DuckDBDatabase
+from src.data.generator import generate_data
+from src.data.ingestion import RiskIngestor, synthetic_records
+from src.data.result_cache import CachedDatabase, QueryResultCache, estimate_size, normalize_sql
+from src.data.sqlite_db import SQLiteDatabase
+
+PNL = "SELECT desk, ROUND(SUM(pnl), 6) AS pnl FROM daily_risk_rollup GROUP BY desk ORDER BY desk"
+COUNT = "SELECT COUNT(*) AS n FROM trades"
+
+def _backend(kind, db_path):
+    if kind == "sqlite":
+        return SQLiteDatabase(db_path, pool_size=2)
+    return DuckDBDatabase(db_path, mode="import")
+
+def _ingest(db_path, n):
+    trades, risk = synthetic_records(np.random.default_rng(5), n, calc_date="2026-01-05")
+    ingestor = RiskIngestor(db_path)
+    ingestor.ingest(trades, risk)
+    ingestor.close()
+
+@pytest.mark.parametrize("kind", ["sqlite", "duckdb"])
+def test_ingestion_write_invalidates_cached_results(tmp_path, kind):
+    db_path = str(tmp_path / "risk.db")
+    generate_data(db_path, num_trades=100, num_days=3, seed=1)
+    db = CachedDatabase(_backend(kind, db_path))
+    before = db.execute_query(PNL)
+    assert db.execute_query(COUNT) == [{"n": 100}]
+    assert db.execute_arrow(COUNT).to_pylist() == [{"n": 100}]
+    assert db.execute_query(COUNT) == [{"n": 100}]
+    assert db.cache.stats()["hits"] == 1
+
+    _ingest(db_path, 20)
+    assert db.execute_query(COUNT) == [{"n": 120}]
+    assert db.execute_arrow(COUNT).to_pylist() == [{"n": 120}]
+    assert db.execute_query(PNL) != before
+    stats = db.cache.stats()
+    assert stats["invalidations"] == 1 and stats["hits"] == 1
+    # The fresh result is cached again under the new version.
+    assert db.execute_query(COUNT) == [{"n": 120}]
+    assert db.cache.stats()["hits"] == 2
+
+def test_normalized_sql_keeps_quoted_text():
+    assert normalize_sql("  SELECT *\n  FROM Trades WHERE desk = 'Rates';") == "select * from trades where desk = 'Rates'"
+    assert normalize_sql('select "Desk" from t') != normalize_sql('select "desk" from t')
+
+def test_lru_is_bounded_by_bytes():
+    rows = [{"desk": "Rates", "pnl": 1.0}]
+    size = estimate_size(rows)
+    cache = QueryResultCache(max_bytes=size * 2)
+    cache.put("a", rows)
+    cache.put("b", rows)
+    assert cache.get("a") == rows  # "b" is now the least recently used
+    cache.put("c", rows)
+    assert cache.get("b") is None and cache.get("a") == rows and cache.get("c") == rows
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["bytes"] == size * 2
+    # A result larger than the whole cache is not stored.
+    cache.put("big", rows * 100)
+    assert cache.get("big") is None and cache.stats()["entries"] == 2
+
+def test_entries_expire_after_the_ttl():
+    cache = QueryResultCache(ttl=0.05)
+    cache.put("a", [{"n": 1}])
+    assert cache.get("a") == [{"n": 1}]
+    time.sleep(0.06)
+    assert cache.get("a") is None and cache.stats()["expirations"] == 1
+
+def test_equivalent_sql_shares_an_entry_and_errors_are_not_cached(tmp_path):
+    db_path = str(tmp_path / "risk.db")
+    generate_data(db_path, num_trades=20, num_days=1, seed=1)
+    db = CachedDatabase(SQLiteDatabase(db_path, pool_size=1))
+    assert db.execute_query(COUNT) == db.execute_query("select   count(*) AS n\nFROM trades;")
+    assert db.cache.stats()["hits"] == 1
+    db.execute_query("SELECT nope FROM trades")
+    db.execute_query("SELECT nope FROM trades")
+    assert db.cache.stats()["entries"] == 1
+
+@pytest.mark.parametrize("kind", ["sqlite", "duckdb"])
+def test_stats_are_forwarded_through_the_decorators(tmp_path, kind):
+    db_path = str(tmp_path / "risk.db")
+    generate_data(db_path, num_trades=100, num_days=3, seed=1)
+    db = CachedDatabase(CoalescingDatabase(_backend(kind, db_path)))
+    db.execute_query(COUNT)
+    db.execute_query(COUNT)
+    stats = db.stats()
+    assert stats["result_cache"]["hits"] == 1
+    assert stats["sql_coalescing"]["executions"] == 1
+    assert ("db_pool" if kind == "sqlite" else "duckdb") in stats
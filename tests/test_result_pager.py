@@ -0,0 +1,61 @@
+import time
+
+import numpy as np
+
+from src.data.generator import generate_data
+from src.data.ingestion import RiskIngestor, synthetic_records
+from src.data.result_pager import ResultPager
+from src.data.sqlite_db import SQLiteDatabase
+
+TRADES = "SELECT trade_id, desk, notional FROM trades ORDER BY trade_id"
+ROLLUP = "SELECT desk, SUM(trade_count) AS trades FROM daily_risk_rollup GROUP BY desk ORDER BY desk"
+
+def _ingest(db_path, n):
+    trades, risk = synthetic_records(np.random.default_rng(3), n, calc_date="2026-01-05")
+    ingestor = RiskIngestor(db_path)
+    ingestor.ingest(trades, risk)
+    ingestor.close()
+
+def _all_pages(pager, query_id, page_size):
+    rows, cursor = pager.page(query_id, page_size=page_size)
+    while cursor is not None:
+        more, cursor = pager.page(query_id, cursor, page_size=page_size)
+        rows += more
+    return rows
+
+def test_pages_stay_on_their_snapshot_across_ingestion(tmp_path):
+    db_path = str(tmp_path / "risk.db")
+    generate_data(db_path, num_trades=100, num_days=3, seed=1)
+    db = SQLiteDatabase(db_path, pool_size=2)
+    pager = ResultPager(db)
+    expected = {sql: db.execute_query(sql) for sql in (TRADES, ROLLUP)}
+    ids = {sql: pager.register(sql) for sql in expected}
+    first_page, cursor = pager.page(ids[TRADES], page_size=30)
+
+    _ingest(db_path, 25)
+    assert db.execute_query("SELECT COUNT(*) AS n FROM trades") == [{"n": 125}]
+
+    # Going back restarts the query; it must still read the registered snapshot.
+    assert pager.page(ids[TRADES], page_size=30)[0] == first_page
+    assert _all_pages(pager, ids[TRADES], 30) == expected[TRADES]
+    assert _all_pages(pager, ids[ROLLUP], 2) == expected[ROLLUP]
+
+    sql, _ = pager.describe(ids[ROLLUP])
+    assert db.execute_query(sql) == expected[ROLLUP]
+
+def test_idle_cursor_is_closed_and_reopened_at_its_offset(tmp_path):
+    db_path = str(tmp_path / "risk.db")
+    generate_data(db_path, num_trades=100, num_days=3, seed=1)
+    db = SQLiteDatabase(db_path, pool_size=2)
+    pager = ResultPager(db, idle_timeout=0.1)
+    query_id = pager.register(TRADES)
+
+    rows, cursor = pager.page(query_id, page_size=40)
+    assert pager.stats()["open_cursors"] == 1
+    time.sleep(0.5)
+    assert pager.stats()["open_cursors"] == 0
+
+    while cursor is not None:
+        more, cursor = pager.page(query_id, cursor, page_size=40)
+        rows += more
+    assert rows == db.execute_query(TRADES)
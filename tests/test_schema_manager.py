@@ -0,0 +1,55 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+from src.data.generator import generate_data
+from src.data.ingestion import synthetic_records
+from src.data.schema_manager import INDEXES, ROLLUP_TABLE, apply_schema, refresh_rollups, rollup_select
+
+def _rollup(conn):
+    return conn.execute(f"SELECT * FROM {ROLLUP_TABLE} ORDER BY calc_date, desk, instrument, trader_name").fetchall()
+
+def _assert_matches_definition(conn):
+    exact = conn.execute(f"SELECT * FROM ({rollup_select()}) ORDER BY calc_date, desk, instrument, trader_name").fetchall()
+    folded = _rollup(conn)
+    assert len(folded) == len(exact)
+    for row, expected in zip(folded, exact):
+        # Keys and counts match exactly; sums up to the order they were added in.
+        assert row[:6] == expected[:6] and row[6:] == pytest.approx(expected[6:])
+
+@pytest.fixture
+def conn(tmp_path):
+    db_path = str(tmp_path / "risk.db")
+    generate_data(db_path, num_trades=300, num_days=4, seed=1)
+    with sqlite3.connect(db_path) as conn:
+        yield conn
+
+def _append(conn, n, seed):
+    trades, risk = synthetic_records(np.random.default_rng(seed), n, calc_date="2026-01-05")
+    conn.executemany("INSERT INTO trades VALUES (:trade_id, :desk, :trader_name, :asset_class, :instrument, "
+                     ":quantity, :price, :notional, :trade_date)", trades)
+    conn.executemany("INSERT INTO risk_metrics VALUES (:trade_id, :calc_date, :pnl, :dv01, :delta, :gamma, :vega)", risk)
+
+def test_rollup_matches_its_definition(conn):
+    _assert_matches_definition(conn)
+
+def test_incremental_refresh_folds_only_new_rows(conn):
+    _append(conn, 40, seed=2)
+    assert refresh_rollups(conn.cursor()) == 40
+    assert refresh_rollups(conn.cursor()) == 0
+    _assert_matches_definition(conn)
+
+def test_shrunk_table_triggers_a_full_rebuild(conn):
+    conn.execute("DELETE FROM risk_metrics WHERE rowid > 100")
+    refresh_rollups(conn.cursor())
+    _assert_matches_definition(conn)
+
+def test_indexes_serve_the_common_filters(conn):
+    apply_schema(conn.cursor())
+    names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert set(INDEXES) <= names
+    plan = " ".join(row[3] for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT SUM(r.pnl) FROM trades t JOIN risk_metrics r ON r.trade_id = t.trade_id "
+        "WHERE t.desk = 'Rates' AND t.trade_date >= '2026-01-01'"))
+    assert "idx_trades_desk_date" in plan and "idx_risk_metrics_trade" in plan
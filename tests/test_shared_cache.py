@@ -0,0 +1,120 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from src.agents.sql_cache import SemanticSQLCache
+from src.core.shared_cache import SQLiteSharedCache, create_shared_cache, make_key
+from src.data.generator import generate_data
+from src.data.result_cache import CachedDatabase
+from src.data.result_pager import ResultPager
+from src.data.sqlite_db import SQLiteDatabase
+
+COUNT = "SELECT COUNT(*) AS n FROM trades"
+
+def _cached(db_path, shared):
+    return CachedDatabase(SQLiteDatabase(db_path, pool_size=2), shared=shared)
+
+def test_recreated_database_does_not_read_old_entries(tmp_path):
+    db_path = str(tmp_path / "risk.db")
+    shared = SQLiteSharedCache(str(tmp_path / "risk.db.cache"))
+
+    generate_data(db_path, num_trades=1000, num_days=3, seed=1)
+    first = _cached(db_path, shared)
+    assert first.execute_query(COUNT) == [{"n": 1000}]
+    assert first.get_data_version() == "1"
+    first.db.pool.close()
+
+    # A new file starts again at data version 1.
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    generate_data(db_path, num_trades=5000, num_days=3, seed=2)
+    second = _cached(db_path, shared)
+    assert second.get_data_version() == "1"
+    assert second.get_database_id() != first.get_database_id()
+    assert second.execute_query(COUNT) == [{"n": 5000}]
+
+def test_workers_share_results_of_the_same_database(tmp_path):
+    db_path = str(tmp_path / "risk.db")
+    shared = SQLiteSharedCache(str(tmp_path / "risk.db.cache"))
+    generate_data(db_path, num_trades=100, num_days=3, seed=1)
+
+    assert _cached(db_path, shared).execute_query(COUNT) == [{"n": 100}]
+    assert _cached(db_path, shared).execute_query(COUNT) == [{"n": 100}]
+    assert shared.stats()["hits"] == 1
+
+def test_entries_expire_and_oversized_values_are_skipped(tmp_path):
+    shared = SQLiteSharedCache(str(tmp_path / "cache.db"), max_entry_bytes=100)
+    shared.set("short", b"x", ttl=0.05)
+    shared.set("long", b"y")
+    shared.set("big", b"z" * 101)
+    assert shared.get("short") == b"x"
+    time.sleep(0.1)
+    assert (shared.get("short"), shared.get("long"), shared.get("big")) == (None, b"y", None)
+    shared.delete("long")
+    assert shared.get("long") is None
+    assert shared.stats()["sets"] == 2
+
+def test_prune_evicts_the_least_recently_read(tmp_path, monkeypatch):
+    shared = SQLiteSharedCache(str(tmp_path / "cache.db"), max_bytes=1000)
+    monkeypatch.setattr(shared, "TOUCH_INTERVAL", 0.0)
+    for key in ("a", "b", "c"):
+        shared.set(key, key.encode() * 300)
+        time.sleep(0.01)
+    assert shared.get("a") is not None  # "b" is now the least recently read
+    time.sleep(0.01)
+    shared.set("d", b"d" * 300)
+    shared.prune()
+    assert [key for key in "abcd" if shared.get(key) is not None] == ["a", "c", "d"]
+    assert shared.stats()["bytes"] == 900
+
+def test_another_process_reads_the_entries(tmp_path):
+    path = str(tmp_path / "cache.db")
+    shared = SQLiteSharedCache(path)
+    shared.set_object("ard:test", {"rows": [1, 2, 3]})
+    script = ("import sys; from src.core.shared_cache import SQLiteSharedCache; "
+              "cache = SQLiteSharedCache(sys.argv[1]); print(cache.get_object('ard:test')); "
+              "cache.set_object('ard:reply', 'from the other worker')")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", script, path], cwd=root, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == "{'rows': [1, 2, 3]}"
+    assert shared.get_object("ard:reply") == "from the other worker"
+
+def test_keys_are_scoped_by_database():
+    assert make_key("result", "db-1", "SELECT 1", "3") == make_key("result", "db-1", "SELECT 1", "3")
+    assert make_key("result", "db-1", "SELECT 1", "3") != make_key("result", "db-2", "SELECT 1", "3")
+    assert make_key("result", "db-1", "SELECT 1", "3").startswith("ard:result:")
+
+def test_create_shared_cache_from_url(tmp_path):
+    assert create_shared_cache("") is None
+    cache = create_shared_cache(f"sqlite:///{tmp_path}/nested/cache.db", max_bytes=4096, ttl=10)
+    assert isinstance(cache, SQLiteSharedCache) and os.path.exists(tmp_path / "nested" / "cache.db")
+    assert (cache.max_bytes, cache.default_ttl) == (4096, 10)
+    for url in ("sqlite:///", "memcached://localhost:11211"):
+        with pytest.raises(ValueError):
+            create_shared_cache(url)
+
+def test_workers_share_query_ids_and_generated_sql(tmp_path):
+    db_path = str(tmp_path / "risk.db")
+    shared = SQLiteSharedCache(str(tmp_path / "risk.db.cache"))
+    generate_data(db_path, num_trades=100, num_days=3, seed=1)
+    first, second = SQLiteDatabase(db_path, pool_size=2), SQLiteDatabase(db_path, pool_size=2)
+
+    query_id = ResultPager(first, shared=shared).register("SELECT trade_id FROM trades ORDER BY trade_id",
+                                                          {"title": "Trades"})
+    pager = ResultPager(second, shared=shared)
+    rows, cursor = pager.page(query_id, page_size=60)
+    assert len(rows) == 60 and cursor == "60"
+    rows, cursor = pager.page(query_id, cursor, page_size=60)
+    assert len(rows) == 40 and cursor is None
+    assert pager.describe(query_id)[1] == {"title": "Trades"}
+
+    database_id = first.get_database_id()
+    SemanticSQLCache(shared=shared).store("total pnl by desk", database_id, "schema", "SELECT 1")
+    other = SemanticSQLCache(shared=shared)
+    assert other.lookup("Total PnL by desk?", database_id, "schema") == ("SELECT 1", "exact", 1.0)
+    assert other.lookup("Total PnL by desk?", database_id, "other schema") is None
+    assert other.stats()["shared_hits"] == 1
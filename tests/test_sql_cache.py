@@ -0,0 +1,64 @@
+from src.agents.sql_cache import SemanticSQLCache, normalize_query_text
+
+DATABASE = "sqlite:test"
+SCHEMA = "schema-1"
+LITERALS = ["Alice", "Bob", "Charlie", "Credit", "FX Spot", "Options", "Rates", "EUR/USD", "EUR/USD Call"]
+
+def _cache(*entries):
+    cache = SemanticSQLCache(similarity_threshold=0.8)
+    for query, sql in entries:
+        cache.store(query, DATABASE, SCHEMA, sql, LITERALS)
+    return cache
+
+def test_normalize_keeps_comparison_operators():
+    assert normalize_query_text("notional<1000000") == "notional < 1000000"
+    assert normalize_query_text("Notional >= 5, pnl != 0?") == "notional >= 5 pnl <> 0"
+
+def test_comparison_operator_is_not_an_exact_hit():
+    cache = _cache(("trades with notional > 1000000", "SELECT * FROM trades WHERE notional > 1000000"))
+    assert cache.lookup("trades with notional < 1000000", DATABASE, SCHEMA, LITERALS) is None
+    assert cache.lookup("trades with notional > 1000000", DATABASE, SCHEMA, LITERALS)[1] == "exact"
+
+def test_comparison_word_must_match():
+    cache = _cache(("trades with notional above 1000000", "SELECT * FROM trades WHERE notional > 1000000"))
+    assert cache.lookup("show trades with notional below 1000000", DATABASE, SCHEMA, LITERALS) is None
+
+def test_catalog_value_must_match():
+    cache = _cache(("daily pnl and delta for trader Bob on the Rates desk over the last week",
+                    "SELECT ... WHERE trader_name = 'Bob' AND desk = 'Rates'"))
+    assert cache.lookup("daily pnl and delta for trader Alice on the Rates desk over the last week",
+                        DATABASE, SCHEMA, LITERALS) is None
+    assert cache.lookup("daily pnl and delta for trader Bob on the Credit desk over the last week",
+                        DATABASE, SCHEMA, LITERALS) is None
+
+def test_sort_direction_must_match():
+    cache = _cache(("trades sorted by pnl ascending", "SELECT * FROM trades ORDER BY pnl ASC"))
+    assert cache.lookup("show trades sorted by pnl descending", DATABASE, SCHEMA, LITERALS) is None
+
+def test_rephrased_question_is_still_a_semantic_hit():
+    cache = _cache(("total pnl for Bob by desk", "SELECT desk, SUM(pnl) ... WHERE trader_name = 'Bob'"))
+    hit = cache.lookup("please show me the total pnl for bob per desk", DATABASE, SCHEMA, LITERALS)
+    assert hit is not None and hit[1] == "semantic"
+
+def test_schema_or_database_change_empties_the_cache():
+    cache = _cache(("total pnl by desk", "SELECT desk, SUM(pnl) FROM risk GROUP BY desk"))
+    assert cache.lookup("total pnl by desk", DATABASE, "schema-2", LITERALS) is None
+    cache.store("total pnl by desk", DATABASE, SCHEMA, "SELECT 1", LITERALS)
+    assert cache.lookup("total pnl by desk", "sqlite:other", SCHEMA, LITERALS) is None
+    assert cache.stats()["entries"] == 0
+
+def test_oldest_entry_is_dropped_at_capacity():
+    cache = SemanticSQLCache(max_entries=2)
+    for i, query in enumerate(("pnl by desk", "dv01 by instrument", "vega by trader")):
+        cache.store(query, DATABASE, SCHEMA, f"SELECT {i}", LITERALS)
+    assert cache.stats()["entries"] == 2
+    assert cache.lookup("pnl by desk", DATABASE, SCHEMA, LITERALS) is None
+    assert cache.lookup("vega by trader", DATABASE, SCHEMA, LITERALS)[0] == "SELECT 2"
+
+def test_restore_replaces_repaired_sql_and_hits_count_saved_latency():
+    cache = _cache(("total pnl by desk", "SELECT bad"))
+    cache.store("total pnl by desk", DATABASE, SCHEMA, "SELECT good", LITERALS)
+    cache.record_llm_latency(2.0)
+    assert cache.lookup("Total PnL by desk?", DATABASE, SCHEMA, LITERALS)[0] == "SELECT good"
+    stats = cache.stats()
+    assert stats["entries"] == 1 and stats["exact_hits"] == 1 and stats["saved_latency_seconds"] == 2.0
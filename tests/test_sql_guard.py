@@ -0,0 +1,60 @@
+import pytest
+
+from benchmarks.stub_llm import CANNED_SQL, StubLLMServer
+from src.agents.sql_guard import SQLGuard
+from src.agents.workflow import LangGraphWorkflow
+from src.data.duckdb_db import DuckDBDatabase
+from src.data.generator import generate_data
+from src.data.sqlite_db import SQLiteDatabase
+
+@pytest.fixture(scope="module")
+def db_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("guard") / "risk.db")
+    generate_data(path, num_trades=200, num_days=3, seed=1)
+    return path
+
+@pytest.fixture(params=["sqlite", "duckdb"])
+def guard(request, db_path):
+    db = SQLiteDatabase(db_path, pool_size=1) if request.param == "sqlite" else DuckDBDatabase(db_path)
+    return SQLGuard(db, large_table_rows=100, max_sort_rows=100, rewrite_limit=50)
+
+@pytest.mark.parametrize("sql, hint", [
+    ("DELETE FROM trades", "read-only SELECT"),
+    ("SELECT 1; DROP TABLE trades", "one SQL statement"),
+    ("WITH x AS (SELECT 1) INSERT INTO trades SELECT * FROM trades", "INSERT is not allowed"),
+    ("WITH x AS (SELECT 1) UPDATE trades SET desk = 'x'", "UPDATE is not allowed"),
+    ("SELECT nope FROM trades", "does not compile"),
+])
+def test_rejects_non_read_or_broken_sql(guard, sql, hint):
+    assert hint in guard.check(sql).rejected
+
+def test_literals_and_comments_do_not_trip_the_keyword_check(guard):
+    verdict = guard.check("SELECT trade_id FROM trades WHERE desk = 'DROP; DELETE' -- update later\n")
+    assert verdict.rejected is None and verdict.note is None
+
+def test_rejects_a_cartesian_product_of_large_tables(guard):
+    verdict = guard.check("SELECT t.desk, r.pnl FROM trades t, risk_metrics r")
+    assert "cartesian product" in verdict.rejected
+    assert guard.check("SELECT t.desk, r.pnl FROM trades t JOIN risk_metrics r ON r.trade_id = t.trade_id "
+                       "WHERE r.pnl > 0").rejected is None
+
+def test_bounds_an_unbounded_sort_of_a_large_scan(db_path):
+    # The sort is read from SQLite's plan (USE TEMP B-TREE FOR ORDER BY).
+    guard = SQLGuard(SQLiteDatabase(db_path, pool_size=1), large_table_rows=100, max_sort_rows=100, rewrite_limit=50)
+    verdict = guard.check("SELECT * FROM trades ORDER BY notional DESC")
+    assert verdict.sql.endswith("LIMIT 51") and verdict.rejected is None
+    for bounded in ("SELECT * FROM trades ORDER BY notional DESC LIMIT 10",
+                    "SELECT desk, SUM(notional) AS n FROM trades GROUP BY desk ORDER BY n DESC"):
+        assert guard.check(bounded).note is None
+    assert guard.stats()["rewritten"] == 1
+
+def test_workflow_sends_rejected_sql_back_a_bounded_number_of_times(db_path, monkeypatch):
+    monkeypatch.setitem(CANNED_SQL, "total pnl by desk", "SELECT t.desk, r.pnl FROM trades t, risk_metrics r")
+    db = SQLiteDatabase(db_path, pool_size=1)
+    with StubLLMServer(latency_ms=0) as llm:
+        workflow = LangGraphWorkflow(db, base_url=llm.base_url, sql_repair_attempts=2, dashboard_mode="heuristic",
+                                     sql_guard=SQLGuard(db, large_table_rows=100))
+        result = workflow.process_query("total pnl by desk")
+        assert llm.requests == 3
+    assert result["error"].startswith("SQL rejected: ") and "cartesian product" in result["error"]
+    assert result["row_count"] is None
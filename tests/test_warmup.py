@@ -0,0 +1,79 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.stub_llm import StubLLMServer
+from src.api.app import app, container
+from src.api.warmup import Warmup
+from src.core.metrics import MetricsRegistry
+from src.data.generator import generate_data
+
+def test_ready_once_the_required_steps_succeed():
+    metrics = MetricsRegistry()
+    warmup = Warmup(metrics, mode="blocking")
+    warmup.add_step("database", lambda: {"tables": 3})
+    warmup.add_step("llm", lambda: 1 / 0, required=False)
+    assert not warmup.ready and warmup.status()["state"] == "pending"
+    warmup.start()
+
+    status = warmup.status()
+    assert warmup.ready and status["state"] == "ready"
+    assert status["steps"]["database"]["detail"] == {"tables": 3}
+    assert status["steps"]["llm"]["state"] == "failed"
+    assert status["steps"]["llm"]["error"] == "ZeroDivisionError: division by zero"
+    assert "api_ready 1" in metrics.render()
+
+def test_a_failed_required_step_holds_readiness_back():
+    warmup = Warmup(mode="blocking")
+    warmup.add_step("schema", lambda: 1 / 0)
+    warmup.add_step("workflow", lambda: None)
+    warmup.start()
+    status = warmup.status()
+    assert not warmup.ready and status["state"] == "failed"
+    # Later steps still run, so the status shows everything that is wrong.
+    assert status["steps"]["workflow"]["state"] == "done"
+
+def test_steps_run_once_on_a_background_thread():
+    release = threading.Event()
+    calls = []
+    warmup = Warmup(mode="background")
+    warmup.add_step("slow", lambda: calls.append(release.wait(2)))
+    warmup.start()
+    warmup.start()
+    assert warmup.status()["state"] == "running" and not warmup.ready
+    release.set()
+    warmup._thread.join(2)
+    warmup.run()
+    assert warmup.ready and calls == [True]
+
+def test_off_mode_skips_the_steps():
+    warmup = Warmup(mode="off")
+    warmup.add_step("database", lambda: 1 / 0)
+    warmup.start()
+    assert warmup.ready and warmup.status()["steps"]["database"]["state"] == "pending"
+    with pytest.raises(ValueError):
+        Warmup(mode="lazy")
+
+def test_ready_endpoint_reports_the_startup_warmup(tmp_path):
+    db_path = str(tmp_path / "risk.db")
+    generate_data(db_path, num_trades=200, num_days=3, seed=1)
+    with StubLLMServer(latency_ms=0) as llm:
+        container.config.db_path.from_value(db_path)
+        container.config.llm_base_url.from_value(llm.base_url)
+        container.config.warmup_mode.from_value("blocking")
+        container.reset_singletons()
+        try:
+            assert TestClient(app).get("/ready").status_code == 503
+            with TestClient(app) as client:  # runs the startup hooks
+                response = client.get("/ready")
+            assert llm.requests == 1
+        finally:
+            container.config.warmup_mode.from_value("background")
+            container.reset_singletons()
+
+    body = response.json()
+    assert response.status_code == 200 and body["ready"] and body["mode"] == "blocking"
+    assert [name for name, step in body["steps"].items() if step["state"] == "done"] == ["database", "schema", "workflow", "llm"]
+    assert body["steps"]["database"]["detail"]["tables"]["trades"] == 200
+    assert body["import_seconds"] > 0
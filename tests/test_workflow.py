@@ -0,0 +1,103 @@
+import asyncio
+import time
+
+import pytest
+
+from benchmarks.stub_llm import CANNED_SQL, StubLLMServer
+from src.agents.workflow import LangGraphWorkflow
+from src.data.generator import generate_data
+from src.data.sqlite_db import SQLiteDatabase
+
+GROUP_BY = "total pnl by desk"
+
+class CountingDatabase(SQLiteDatabase):
+    """Counts full executions, so a test can tell a described query from a run one."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.executed = []
+
+    def execute_query(self, query, max_rows=None):
+        self.executed.append(query)
+        return super().execute_query(query, max_rows=max_rows)
+
+    def execute_arrow(self, query, max_rows=None):
+        self.executed.append(query)
+        return super().execute_arrow(query, max_rows=max_rows)
+
+@pytest.fixture(scope="module")
+def llm():
+    with StubLLMServer(latency_ms=0) as server:
+        yield server
+
+@pytest.fixture
+def db(tmp_path):
+    db_path = str(tmp_path / "risk.db")
+    generate_data(db_path, num_trades=200, num_days=3, seed=1)
+    return CountingDatabase(db_path, pool_size=2)
+
+def _stream(workflow, query, columnar):
+    async def collect():
+        return [event async for event in workflow.astream_query(query, columnar=columnar)]
+    return asyncio.run(collect())
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_group_by_streams_its_rows_once(llm, db, columnar):
+    workflow = LangGraphWorkflow(db, base_url=llm.base_url, dashboard_mode="heuristic")
+    expected = db.execute_query(CANNED_SQL[GROUP_BY])
+    db.executed.clear()
+    events = _stream(workflow, GROUP_BY, columnar)
+    names = [name for name, _ in events]
+    assert "error" not in names
+    chunks = [payload for name, payload in events if name == "data"]
+    streamed = [row for chunk in chunks for row in (chunk["table"].to_pylist() if columnar else chunk["rows"])]
+    assert sorted(streamed, key=lambda row: row["desk"]) == sorted(expected, key=lambda row: row["desk"])
+    # The probe only described the aggregation; execute_sql ran it, once.
+    assert db.executed == [CANNED_SQL[GROUP_BY]]
+
+    done = events[-1][1]
+    assert names[-1] == "done" and done["row_count"] == len(expected)
+    assert done["dashboard_config"]["panels"][0]["type"] == "bar"
+
+def test_plain_scan_keeps_the_limit_probe(llm, db):
+    workflow = LangGraphWorkflow(db, base_url=llm.base_url, dashboard_mode="heuristic")
+    result = workflow.process_query("all trades")
+    assert result["error"] is None
+    assert result["row_count"] == 200
+    probe, full = db.executed
+    assert probe.endswith("LIMIT 5") and full == CANNED_SQL["all trades"]
+
+def test_describe_error_stops_the_pipeline(llm, db, monkeypatch):
+    monkeypatch.setitem(CANNED_SQL, GROUP_BY, "SELECT desk, SUM(nope) AS total FROM trades GROUP BY desk")
+    workflow = LangGraphWorkflow(db, base_url=llm.base_url, dashboard_mode="heuristic")
+    result = workflow.process_query(GROUP_BY)
+    assert result["error"].startswith("SQL Execution Error: no such column")
+    assert db.executed == []
+
+def test_async_queries_overlap_without_blocking_the_loop(db):
+    questions = ["total pnl by desk", "dv01 by instrument for rates", "greeks by trader", "all trades"]
+    with StubLLMServer(latency_ms=300) as slow_llm:
+        workflow = LangGraphWorkflow(db, base_url=slow_llm.base_url, dashboard_mode="heuristic")
+
+        async def run():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            task = asyncio.create_task(ticker())
+            start = time.perf_counter()
+            results = await asyncio.gather(*(workflow.aprocess_query(q) for q in questions))
+            elapsed = time.perf_counter() - start
+            task.cancel()
+            return results, elapsed, ticks
+
+        results, elapsed, ticks = asyncio.run(run())
+    assert all(result["error"] is None for result in results)
+    # Four 300 ms LLM calls in sequence would take 1.2 s.
+    assert elapsed < 0.9
+    # The loop kept running while the LLM and the database worked.
+    assert ticks >= elapsed / 0.01 * 0.5